@@ -28,6 +28,7 @@ setup(
         'pymediainfo',
         'marshmallow',
         'marshmallow-oneofschema',
+        'numpy',
     ],
     # List additional groups of dependencies here (e.g. development
     # dependencies). You can install these using the following syntax, for
@@ -36,6 +37,7 @@ setup(
         'dev': ['bumpversion'],
         # 'doc': ['sphinx', 'cartouche'],
         'test': ['hypothesis', 'pytest'],
+        'preview': ['Pillow'],
     },
     entry_points={
         'console_scripts': [
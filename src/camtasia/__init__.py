@@ -1 +1,3 @@
+from .diffing import diff  # noqa: F401
+from .merging import merge  # noqa: F401
 from .project import load_project, new_project, use_project  # noqa: F401
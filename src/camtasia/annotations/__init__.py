@@ -0,0 +1,2 @@
+from .subtitles import import_subtitles  # noqa: F401
+from .templates import CalloutTemplate  # noqa: F401
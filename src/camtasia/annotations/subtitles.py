@@ -0,0 +1,152 @@
+"""Import of SRT and WebVTT subtitles as callouts.
+"""
+
+from bisect import bisect_left
+from dataclasses import dataclass
+import re
+
+from camtasia.frame_stamp import MILLISECONDS, Timebase
+from . import callouts
+from .templates import CalloutTemplate
+
+_TIMING = re.compile(
+    r'^\s*(?P<start>(?:\d+:)?\d+:\d+[.,]\d+)\s*-->\s*(?P<stop>(?:\d+:)?\d+:\d+[.,]\d+)')
+
+_TAG = re.compile(r'<[^>]*>')
+
+
+@dataclass
+class Cue:
+    "A single subtitle cue. Times are in milliseconds."
+    start: int
+    stop: int
+    text: str
+
+
+def read_cues(lines):
+    """Parse SRT or WebVTT cues.
+
+    Cues are parsed as they are read, so this works on arbitrarily large files. Formatting tags are stripped from the
+    cue text, and multi-line cues are joined with newlines.
+
+    Args:
+        lines: An iterable of lines, e.g. an open text file.
+
+    Returns: An iterable of Cues, in file order.
+    """
+    timing = None
+    text = []
+
+    for line in lines:
+        line = line.rstrip('\r\n')
+
+        if timing is None:
+            match = _TIMING.match(line)
+            if match:
+                timing = (_parse_timestamp(match['start']), _parse_timestamp(match['stop']))
+            # Anything else outside a cue is a header, cue number, cue identifier, NOTE or STYLE block.
+            continue
+
+        if line.strip():
+            text.append(_TAG.sub('', line))
+            continue
+
+        yield Cue(start=timing[0], stop=timing[1], text='\n'.join(text))
+        timing = None
+        text = []
+
+    if timing is not None:
+        yield Cue(start=timing[0], stop=timing[1], text='\n'.join(text))
+
+
+def import_subtitles(track, path, style=None, frame_rate=30, translation=(0, 0), split_overlaps=False,
+                     encoding='utf-8-sig'):
+    """Import an SRT or WebVTT subtitle file as callouts on a track.
+
+    Cue times are converted to frames exactly, rounding to the nearest frame. All callouts for a track are inserted in
+    a single batch.
+
+    Args:
+        track: The Track to add callouts to.
+        path: The path to the subtitle file.
+        style: The style of the callouts, either a CalloutTemplate or an annotation dict. By default plain white text
+            is used.
+        frame_rate: The project's edit rate, i.e. `project.edit_rate`.
+        translation: The `(x, y)` translation of the callouts.
+        split_overlaps: If true, cues which overlap each other or existing media on `track` are placed on new tracks
+            inserted above `track`. If false, overlapping cues cause a ValueError.
+        encoding: The encoding of the subtitle file.
+
+    Returns: A list of the new TrackMedia.
+
+    Raises:
+        OSError: The file can't be read.
+        ValueError: A cue is malformed, or overlaps existing media and `split_overlaps` is false.
+    """
+    if style is None:
+        style = callouts.text('', 'Arial', 'Regular', font_size=48.0, height=120.0, width=1200.0)
+    if not isinstance(style, CalloutTemplate):
+        style = CalloutTemplate(style)
+
+    timebase = Timebase.between(MILLISECONDS, frame_rate)
+
+    items = []
+    with open(path, encoding=encoding) as handle:
+        for cue in read_cues(handle):
+            start = timebase.convert(cue.start)
+            stop = timebase.convert(cue.stop)
+            items.append((style(text=cue.text), start, max(stop - start, 1), translation))
+
+    if not split_overlaps:
+        return track.medias.add_annotations(items)
+
+    lanes = _assign_lanes(items, [(m.start, m.start + m.duration) for m in track.medias])
+
+    medias = track.medias.add_annotations(lanes[0])
+    for lane_number, lane_items in enumerate(lanes[1:], start=1):
+        lane_track = track._timeline.tracks.insert_track(
+            track.index + lane_number, f'{track.name} {lane_number + 1}')
+        medias.extend(lane_track.medias.add_annotations(lane_items))
+    return medias
+
+
+def _assign_lanes(items, occupied):
+    """Distribute annotation items over as few lanes as possible such that no lane has overlaps.
+
+    Lane 0 already holds the `occupied` `(start, stop)` intervals.
+
+    Returns: A list of lanes, each a list of items.
+    """
+    occupied = sorted(occupied)
+    occupied_starts = [start for start, _ in occupied]
+
+    def fits_occupied(start, stop):
+        index = bisect_left(occupied_starts, stop)
+        # Only the interval starting latest before `stop` can overlap, since intervals in a track don't overlap.
+        return index == 0 or occupied[index - 1][1] <= start
+
+    lanes = [[]]
+    lane_ends = [0]
+    for item in sorted(items, key=lambda item: item[1]):
+        start, stop = item[1], item[1] + item[2]
+        for lane_number, lane_end in enumerate(lane_ends):
+            if lane_end <= start and (lane_number > 0 or fits_occupied(start, stop)):
+                break
+        else:
+            lane_number = len(lanes)
+            lanes.append([])
+            lane_ends.append(0)
+
+        lanes[lane_number].append(item)
+        lane_ends[lane_number] = stop
+
+    return lanes
+
+
+def _parse_timestamp(timestamp):
+    "Parse a '[hh:]mm:ss.ttt' or '[hh:]mm:ss,ttt' timestamp into milliseconds."
+    clock, fraction = re.split('[.,]', timestamp)
+    parts = [int(part) for part in clock.split(':')]
+    hours, minutes, seconds = [0] * (3 - len(parts)) + parts
+    milliseconds = int(fraction.ljust(3, '0')[:3])
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
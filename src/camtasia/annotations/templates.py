@@ -0,0 +1,84 @@
+"""Compiled annotation templates.
+
+The functions in `callouts` and `shapes` build a complete annotation dict on every call. When generating thousands of
+annotations in the same style, compile the style once into a `CalloutTemplate` and stamp out instances from that
+instead::
+
+    caption = CalloutTemplate(callouts.text('', 'Montserrat', 'Regular', font_size=48.0))
+    annotations = [caption(text=line) for line in lines]
+"""
+
+import copy
+
+
+class CalloutTemplate:
+    """An annotation style, compiled for cheap repeated instantiation.
+
+    Instances are independent copies of the style, so they can be modified freely.
+
+    Args:
+        annotation: An annotation dict, as produced by functions in the `annotations` package.
+    """
+
+    def __init__(self, annotation):
+        self._annotation = copy.deepcopy(annotation)
+        self._copy = _compile_copier(self._annotation)
+
+    def __call__(self, text=None, width=None, height=None):
+        """Create an annotation from the template.
+
+        Args:
+            text: The text of the annotation. By default the template's text is used.
+            width: The width of the annotation. By default the template's width is used.
+            height: The height of the annotation. By default the template's height is used.
+
+        Returns: A new annotation dict.
+
+        Raises:
+            ValueError: `text` is given but the template is not a text annotation.
+        """
+        annotation = self._copy(self._annotation)
+
+        if text is not None:
+            if 'text' not in annotation:
+                raise ValueError('Template annotation has no text')
+            annotation['text'] = text
+
+        if width is not None:
+            annotation['width'] = float(width)
+
+        if height is not None:
+            annotation['height'] = float(height)
+
+        return annotation
+
+
+def _compile_copier(value):
+    """Build a function which deep-copies values with the same structure as `value`.
+
+    The structure is analysed once, so the returned function only has to visit the nested containers rather than
+    every value, as `copy.deepcopy()` does.
+    """
+    if isinstance(value, dict):
+        nested = [(key, _compile_copier(item)) for key, item in value.items() if isinstance(item, (dict, list))]
+
+        def copy_dict(source):
+            result = dict(source)
+            for key, copier in nested:
+                result[key] = copier(source[key])
+            return result
+
+        return copy_dict
+
+    if isinstance(value, list):
+        if not any(isinstance(item, (dict, list)) for item in value):
+            return list
+
+        copiers = [_compile_copier(item) for item in value]
+
+        def copy_list(source):
+            return [copier(item) for copier, item in zip(copiers, source)]
+
+        return copy_list
+
+    return lambda source: source
@@ -0,0 +1,2 @@
+from .waveform import Waveform, Waveforms  # noqa: F401
+from .wav import WavReader  # noqa: F401
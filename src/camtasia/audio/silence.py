@@ -0,0 +1,100 @@
+"""Detection of silent stretches in audio.
+"""
+
+import numpy as np
+
+from .wav import DEFAULT_BLOCK_FRAMES
+
+DEFAULT_THRESHOLD_DB = -40.0
+DEFAULT_MIN_DURATION = 0.5
+DEFAULT_PADDING = 0.1
+
+# The length, in seconds, of the windows over which loudness is measured.
+DEFAULT_WINDOW = 0.01
+
+
+def detect_silence(reader,
+                   threshold_db=DEFAULT_THRESHOLD_DB,
+                   min_duration=DEFAULT_MIN_DURATION,
+                   padding=DEFAULT_PADDING,
+                   window=DEFAULT_WINDOW):
+    """Find the silent stretches in audio.
+
+    Audio is measured in short windows: a window is silent if its RMS level, across all channels, is below
+    `threshold_db`. Runs of silent windows at least `min_duration` long are reported, shrunk by `padding` at each end
+    so that the audio around them is not clipped. Silence at the very start or end of the audio is not padded on the
+    outer side.
+
+    The audio is streamed in blocks, so this works in bounded memory regardless of the length of the audio.
+
+    Args:
+        reader: A `WavReader` for the audio.
+        threshold_db: The level, in dBFS, below which audio is considered silent.
+        min_duration: The shortest silence, in seconds, to report.
+        padding: The amount, in seconds, by which to shrink each silence at each end.
+        window: The length, in seconds, of the windows in which the level is measured.
+
+    Returns: An iterable of `(start, stop)` tuples of sample frames, in order.
+    """
+    window_frames = max(1, round(window * reader.sample_rate))
+    min_frames = round(min_duration * reader.sample_rate)
+    padding_frames = round(padding * reader.sample_rate)
+    block_frames = max(1, DEFAULT_BLOCK_FRAMES // window_frames) * window_frames
+
+    # Compare mean squares rather than RMS in dB, which saves a sqrt and log per window.
+    threshold = np.float32(10 ** (threshold_db / 10))
+
+    def padded(start, stop):
+        if stop - start < min_frames:
+            return None
+        start = start + padding_frames if start > 0 else start
+        stop = stop - padding_frames if stop < reader.frame_count else stop
+        return (start, stop) if start < stop else None
+
+    run_start = None
+    for first, samples in reader.blocks(block_frames):
+        silent = _silent_windows(samples, window_frames, threshold)
+
+        # Window boundaries at which silence starts (+1) or stops (-1), with the run carried in from the previous block.
+        edges = np.diff(np.concatenate(([run_start is not None], silent, [False])).astype(np.int8))
+        starts = np.flatnonzero(edges == 1)
+        stops = np.flatnonzero(edges == -1)
+
+        # A run carried over from the previous block is ended by the first stop.
+        run_starts = [] if run_start is None else [run_start]
+        run_starts.extend(first + s * window_frames for s in starts.tolist())
+
+        run_stops = [min(first + s * window_frames, first + len(samples)) for s in stops.tolist()]
+
+        # If the block ends in silence the last run stays open.
+        if silent.size and silent[-1]:
+            run_start = run_starts.pop()
+            run_stops.pop()
+        else:
+            run_start = None
+
+        for start, stop in zip(run_starts, run_stops):
+            silence = padded(start, stop)
+            if silence is not None:
+                yield silence
+
+    if run_start is not None:
+        silence = padded(run_start, reader.frame_count)
+        if silence is not None:
+            yield silence
+
+
+def _silent_windows(samples, window_frames, threshold):
+    "Determine which windows of a block of samples are silent."
+    window_count = -(-len(samples) // window_frames)
+    padded = np.zeros((window_count * window_frames, samples.shape[1]), dtype=np.float32)
+    padded[:len(samples)] = samples
+
+    squares = np.square(padded).reshape(window_count, -1)
+    sums = squares.sum(axis=1)
+
+    # The final window may be short, so divide by the number of samples actually in each window.
+    counts = np.full(window_count, window_frames * samples.shape[1], dtype=np.float32)
+    counts[-1] = (len(samples) - (window_count - 1) * window_frames) * samples.shape[1]
+
+    return sums / counts < threshold
@@ -0,0 +1,131 @@
+"""Chunked reading of WAV sample data.
+"""
+
+import numpy as np
+
+from camtasia.media_bin.header_probe import read_wav_format, WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT
+
+# Default number of sample frames per block when streaming. About 1.5s at 44.1kHz.
+DEFAULT_BLOCK_FRAMES = 1 << 16
+
+
+class WavReader:
+    """Streams the sample data of a WAV file in blocks.
+
+    The sample data is memory-mapped, so only the blocks actually being processed are ever resident in memory.
+
+    Args:
+        file_path: Path to the WAV file.
+
+    Raises:
+        FileNotFoundError: `file_path` does not exist.
+        ValueError: `file_path` is not a WAV file we can read.
+    """
+
+    def __init__(self, file_path):
+        with open(file_path, 'rb') as handle:
+            header = handle.read(12)
+            if header[:4] != b'RIFF' or header[8:12] != b'WAVE':
+                raise ValueError(f'Not a WAV file: {file_path}')
+            wav_format = read_wav_format(handle)
+
+        if wav_format is None or wav_format.block_align == 0:
+            raise ValueError(f'Unable to read WAV format of {file_path}')
+
+        self._format = wav_format
+        self._sample_dtype = _sample_dtype(wav_format)
+        self._frame_count = wav_format.data_size // wav_format.block_align
+
+        if self._frame_count == 0:
+            # numpy refuses to memory-map an empty region.
+            self._data = np.zeros(0, dtype=np.uint8)
+        else:
+            self._data = np.memmap(
+                file_path,
+                dtype=np.uint8,
+                mode='r',
+                offset=wav_format.data_offset,
+                shape=(self._frame_count * wav_format.block_align,))
+
+    @property
+    def sample_rate(self):
+        return self._format.sample_rate
+
+    @property
+    def channels(self):
+        return self._format.channels
+
+    @property
+    def frame_count(self):
+        "The number of sample frames (i.e. samples per channel) in the file."
+        return self._frame_count
+
+    def read(self, start, stop):
+        """Read a range of sample frames.
+
+        Args:
+            start: The first frame to read.
+            stop: The frame after the last to read.
+
+        Returns: A float32 array of shape `(frames, channels)` with samples scaled to [-1.0, 1.0].
+        """
+        start = max(0, start)
+        stop = min(self._frame_count, stop)
+        if stop <= start:
+            return np.zeros((0, self.channels), dtype=np.float32)
+
+        block_align = self._format.block_align
+        raw = self._data[start * block_align:stop * block_align]
+        return _decode(raw, self._sample_dtype).reshape(stop - start, self.channels)
+
+    def blocks(self, block_frames=DEFAULT_BLOCK_FRAMES, start=0, stop=None):
+        """Iterate over the sample data in blocks.
+
+        Args:
+            block_frames: The number of sample frames in each block. The final block may be shorter.
+            start: The first frame to read.
+            stop: The frame after the last to read. Defaults to the end of the file.
+
+        Returns: An iterable of `(first_frame, samples)` tuples, where `samples` is as returned by `read()`.
+        """
+        stop = self._frame_count if stop is None else min(stop, self._frame_count)
+        for first in range(start, stop, block_frames):
+            yield first, self.read(first, min(first + block_frames, stop))
+
+
+def _sample_dtype(wav_format):
+    bytes_per_sample = wav_format.block_align // max(wav_format.channels, 1)
+
+    if wav_format.format_tag == WAVE_FORMAT_IEEE_FLOAT:
+        dtypes = {4: '<f4', 8: '<f8'}
+    elif wav_format.format_tag == WAVE_FORMAT_PCM:
+        # 24-bit samples have no numpy type and are unpacked by hand.
+        dtypes = {1: 'u1', 2: '<i2', 3: None, 4: '<i4'}
+    else:
+        dtypes = {}
+
+    if bytes_per_sample not in dtypes:
+        raise ValueError(
+            f'Unsupported WAV sample format: tag={wav_format.format_tag} bytes-per-sample={bytes_per_sample}')
+
+    return dtypes[bytes_per_sample]
+
+
+def _decode(raw, sample_dtype):
+    "Decode raw sample bytes into float32 samples in the range [-1.0, 1.0]."
+    if sample_dtype is None:
+        # 24-bit little-endian PCM: widen to 32 bits by shifting into the top three bytes.
+        triples = raw.reshape(-1, 3).astype(np.int32)
+        samples = (triples[:, 0] << 8) | (triples[:, 1] << 16) | (triples[:, 2] << 24)
+        return samples.astype(np.float32) / np.float32(2 ** 31)
+
+    samples = raw.view(sample_dtype)
+
+    if samples.dtype.kind == 'f':
+        return samples.astype(np.float32)
+
+    if samples.dtype.kind == 'u':
+        # 8-bit PCM is unsigned, centered on 128.
+        return (samples.astype(np.float32) - 128) / 128
+
+    return samples.astype(np.float32) / np.float32(2 ** (8 * samples.dtype.itemsize - 1))
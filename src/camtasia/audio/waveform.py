@@ -0,0 +1,247 @@
+"""Precomputed waveform peaks for audio media.
+
+Drawing a waveform needs, for each horizontal pixel, the minimum and maximum sample values in the stretch of audio the
+pixel covers. Computing these from the audio every time is slow for long recordings, so we compute them once at several
+zoom levels and store them in a small binary sidecar file in the project directory. The sidecar is keyed by the size and
+modification time of the audio file, so it is recomputed automatically when the audio changes.
+"""
+
+import os
+from pathlib import Path
+import struct
+
+import numpy as np
+
+from camtasia.media_bin import MediaType
+from .wav import WavReader
+
+# Zoom levels, in sample frames per peak. Each level must be a multiple of the first.
+DEFAULT_LEVELS = (256, 1024, 4096, 16384)
+
+# The directory, relative to the project root, in which sidecars are stored.
+SIDECAR_DIR = 'waveforms'
+
+_MAGIC = b'TSCW'
+_VERSION = 1
+_HEADER = struct.Struct('<4sHHIQH')
+_LEVEL_HEADER = struct.Struct('<IQ')
+
+# Peaks are stored as signed 16-bit values, scaled from [-1.0, 1.0].
+_PEAK_DTYPE = np.dtype('<i2')
+_PEAK_SCALE = 32767
+
+# The number of base-level peaks computed per block read from the audio file.
+_PEAKS_PER_BLOCK = 256
+
+
+class Waveform:
+    """Min/max peak pairs for an audio file at several zoom levels.
+
+    The peak arrays are memory-mapped from the sidecar file.
+
+    Args:
+        sidecar_path: Path to the sidecar file.
+
+    Raises:
+        ValueError: The sidecar file is not in the expected format.
+    """
+
+    def __init__(self, sidecar_path):
+        self._path = Path(sidecar_path)
+
+        with self._path.open('rb') as handle:
+            magic, version, channels, sample_rate, frame_count, level_count = _HEADER.unpack(
+                handle.read(_HEADER.size))
+            if magic != _MAGIC or version != _VERSION:
+                raise ValueError(f'Not a waveform sidecar file: {self._path}')
+
+            level_headers = [_LEVEL_HEADER.unpack(handle.read(_LEVEL_HEADER.size)) for _ in range(level_count)]
+
+        self._channels = channels
+        self._sample_rate = sample_rate
+        self._frame_count = frame_count
+
+        self._peaks = {}
+        offset = _HEADER.size + level_count * _LEVEL_HEADER.size
+        for samples_per_peak, peak_count in level_headers:
+            shape = (peak_count, channels, 2)
+            if peak_count == 0:
+                self._peaks[samples_per_peak] = np.zeros(shape, dtype=_PEAK_DTYPE)
+            else:
+                self._peaks[samples_per_peak] = np.memmap(
+                    self._path, dtype=_PEAK_DTYPE, mode='r', offset=offset, shape=shape)
+            offset += peak_count * channels * 2 * _PEAK_DTYPE.itemsize
+
+    @property
+    def path(self) -> Path:
+        "The path to the sidecar file."
+        return self._path
+
+    @property
+    def channels(self):
+        return self._channels
+
+    @property
+    def sample_rate(self):
+        return self._sample_rate
+
+    @property
+    def frame_count(self):
+        "The number of sample frames in the audio the peaks were computed from."
+        return self._frame_count
+
+    @property
+    def levels(self):
+        "The available zoom levels, in sample frames per peak, from finest to coarsest."
+        return tuple(self._peaks)
+
+    def peaks(self, samples_per_peak=None):
+        """Get the peaks at a zoom level.
+
+        Args:
+            samples_per_peak: The zoom level. If this is not one of the available `levels`, the finest level which is no
+                finer than this is used (or the finest level, if they are all coarser). Defaults to the finest level.
+
+        Returns: An int16 array of shape `(peaks, channels, 2)` holding `(min, max)` pairs scaled to +/-32767.
+        """
+        return self._peaks[self.level_for(samples_per_peak)]
+
+    def level_for(self, samples_per_peak):
+        "The available zoom level to use when `samples_per_peak` is requested."
+        levels = self.levels
+        if samples_per_peak is None:
+            return levels[0]
+        candidates = [level for level in levels if level <= samples_per_peak]
+        return candidates[-1] if candidates else levels[0]
+
+    def __repr__(self):
+        return f'Waveform(path="{self.path}", levels={self.levels})'
+
+
+class Waveforms:
+    """Waveform peaks for the audio media in a project's media bin, keyed by media-bin ID.
+
+    Peaks are computed on first request and cached in sidecar files under the project directory.
+
+    Args:
+        project: The Project whose media to use.
+        levels: The zoom levels, in sample frames per peak, to compute.
+    """
+
+    def __init__(self, project, levels=DEFAULT_LEVELS):
+        levels = tuple(sorted(levels))
+        if not levels or any(level % levels[0] for level in levels):
+            raise ValueError(f'Waveform levels must be multiples of the finest level: {levels}')
+
+        self._project = project
+        self._levels = levels
+
+    @property
+    def sidecar_dir(self) -> Path:
+        "The directory in which sidecar files are stored."
+        return self._project.file_path / SIDECAR_DIR
+
+    def __getitem__(self, media_id) -> Waveform:
+        """Get the waveform for a media-bin audio media.
+
+        Args:
+            media_id: The ID of the media in the media bin.
+
+        Returns: A Waveform.
+
+        Raises:
+            KeyError: There is no media with the specified ID.
+            ValueError: The media is not audio, or is in an unsupported format.
+        """
+        media = self._project.media_bin[media_id]
+        if media.type != MediaType.Audio:
+            raise ValueError(f'Media {media_id} is not audio')
+
+        audio_path = self._project.file_path / media.source
+        stat = audio_path.stat()
+        sidecar_path = self.sidecar_dir / f'{media_id}-{stat.st_size}-{stat.st_mtime_ns}.peaks'
+
+        if sidecar_path.exists():
+            waveform = Waveform(sidecar_path)
+            if waveform.levels == self._levels:
+                return waveform
+
+        self._remove_sidecars(media_id)
+        write_sidecar(WavReader(audio_path), sidecar_path, self._levels)
+        return Waveform(sidecar_path)
+
+    def _remove_sidecars(self, media_id):
+        "Remove any (presumably stale) sidecars for a media."
+        if self.sidecar_dir.exists():
+            for path in self.sidecar_dir.glob(f'{media_id}-*.peaks'):
+                path.unlink()
+
+
+def compute_peaks(reader, levels=DEFAULT_LEVELS):
+    """Compute min/max peaks for audio at several zoom levels.
+
+    Audio is read in blocks, so memory use is bounded by the size of the finest level rather than that of the audio.
+
+    Args:
+        reader: A `WavReader` for the audio.
+        levels: The zoom levels, in sample frames per peak. Each must be a multiple of the finest.
+
+    Returns: A dict mapping each level to a float32 array of shape `(peaks, channels, 2)` of `(min, max)` pairs.
+    """
+    levels = sorted(levels)
+    base = levels[0]
+
+    base_peaks = [
+        _reduce_peaks(np.stack((samples, samples), axis=-1), base)
+        for _, samples in reader.blocks(base * _PEAKS_PER_BLOCK)
+    ]
+    base_peaks = np.concatenate(base_peaks) if base_peaks else np.zeros((0, reader.channels, 2), dtype=np.float32)
+
+    return {level: _reduce_peaks(base_peaks, level // base) for level in levels}
+
+
+def write_sidecar(reader, sidecar_path, levels=DEFAULT_LEVELS):
+    """Compute peaks for audio and write them to a sidecar file.
+
+    The file is written under a temporary name and then renamed, so readers never see a partial file.
+
+    Args:
+        reader: A `WavReader` for the audio.
+        sidecar_path: The path of the sidecar file to write.
+        levels: The zoom levels, in sample frames per peak.
+    """
+    peaks = compute_peaks(reader, levels)
+
+    sidecar_path = Path(sidecar_path)
+    sidecar_path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = sidecar_path.with_suffix('.tmp')
+
+    with temp_path.open('wb') as handle:
+        handle.write(_HEADER.pack(_MAGIC, _VERSION, reader.channels, reader.sample_rate, reader.frame_count,
+                                  len(peaks)))
+        for level, level_peaks in peaks.items():
+            handle.write(_LEVEL_HEADER.pack(level, len(level_peaks)))
+        for level_peaks in peaks.values():
+            quantized = np.round(np.clip(level_peaks, -1.0, 1.0) * _PEAK_SCALE).astype(_PEAK_DTYPE)
+            handle.write(quantized.tobytes())
+
+    os.replace(temp_path, sidecar_path)
+
+
+def _reduce_peaks(peaks, factor):
+    """Combine each run of `factor` consecutive `(min, max)` pairs into a single pair.
+
+    A final, shorter run is combined into a pair of its own.
+    """
+    if factor == 1:
+        return peaks
+
+    full = len(peaks) // factor * factor
+    head = peaks[:full].reshape(-1, factor, *peaks.shape[1:])
+    parts = [np.stack((head[..., 0].min(axis=1), head[..., 1].max(axis=1)), axis=-1)]
+
+    if full < len(peaks):
+        tail = peaks[full:]
+        parts.append(np.stack((tail[..., 0].min(axis=0), tail[..., 1].max(axis=0)), axis=-1)[np.newaxis])
+
+    return np.concatenate(parts)
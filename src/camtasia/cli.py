@@ -4,8 +4,9 @@ import sys
 import docopt_subcommands as dsc
 from exit_codes import ExitCode, ExitCodeError
 
-from camtasia import new_project, use_project
-from camtasia import operations
+from camtasia import diff, load_project, merge, new_project, use_project
+from camtasia import marker_io, operations
+from camtasia.extras import markers_by_time
 from camtasia.frame_stamp import FrameStamp
 
 
@@ -153,7 +154,7 @@ def timeline_markers_ls(_, args):
 def track_markers_ls(_, args):
     """usage: {program} track-markers-ls <project> [<track-index>]
 
-    List all track markers, or just those for a specific track.
+    List all track markers, or just those for a specific track, in time order.
     """
     project_dir = args['<project>']
     track_index = None if args['<track-index>'] is None else int(args['<track-index>'])
@@ -164,14 +165,137 @@ def track_markers_ls(_, args):
         else:
             tracks = [proj.timeline.tracks[track_index]]
 
-        for track in tracks:
-            for media in track.medias:
-                for marker in media.markers:
-                    print(marker.name, marker.time, FrameStamp(marker.time, proj.edit_rate))
+        for marker, _, _ in markers_by_time(proj, tracks=tracks, timeline_markers=False):
+            print(marker.name, marker.time, FrameStamp(marker.time, proj.edit_rate))
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def timeline_markers_import(_, args):
+    """usage: {program} timeline-markers-import [options] <project> <file>
+
+    Add timeline markers from a marker file.
+
+    Options:
+        --format=<format>  The marker file format: csv, json or chapters. By default this is determined by the
+                           file extension (.csv, .json or .txt). Use '-' as the file to read from stdin.
+        --duplicates-okay  Allow more than one marker at the same time.
+    """
+    with use_project(args['<project>']) as proj:
+        _import_markers(proj.timeline.markers, proj, args)
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def timeline_markers_export(_, args):
+    """usage: {program} timeline-markers-export [options] <project> <file>
+
+    Write the timeline markers to a marker file.
+
+    Options:
+        --format=<format>  The marker file format: csv, json or chapters. By default this is determined by the
+                           file extension (.csv, .json or .txt). Use '-' as the file to write to stdout.
+    """
+    with use_project(args['<project>'], save_on_exit=False) as proj:
+        _export_markers(proj.timeline.markers, proj, args)
 
     return ExitCode.OK
 
 
+@dsc.command()
+def media_markers_import(_, args):
+    """usage: {program} media-markers-import [options] <project> <track-index> <media-id> <file>
+
+    Add markers to a media on a track from a marker file. Marker times are relative to the start of the timeline.
+
+    Options:
+        --format=<format>  The marker file format: csv, json or chapters. By default this is determined by the
+                           file extension (.csv, .json or .txt). Use '-' as the file to read from stdin.
+        --duplicates-okay  Allow more than one marker at the same time.
+    """
+    try:
+        track_index = int(args['<track-index>'])
+        media_id = int(args['<media-id>'])
+    except ValueError:
+        return ExitCode.USAGE
+
+    with use_project(args['<project>']) as proj:
+        try:
+            media = proj.timeline.tracks[track_index].medias[media_id]
+        except (IndexError, KeyError) as exc:
+            raise ExitCodeError(str(exc), ExitCode.DATA_ERR)
+        _import_markers(media.markers, proj, args)
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def track_markers_export(_, args):
+    """usage: {program} track-markers-export [options] <project> <file> [<track-index>]
+
+    Write all track markers, or just those for a specific track, to a marker file in time order.
+
+    Options:
+        --format=<format>  The marker file format: csv, json or chapters. By default this is determined by the
+                           file extension (.csv, .json or .txt). Use '-' as the file to write to stdout.
+    """
+    track_index = None if args['<track-index>'] is None else int(args['<track-index>'])
+
+    with use_project(args['<project>'], save_on_exit=False) as proj:
+        if track_index is None:
+            tracks = proj.timeline.tracks
+        else:
+            tracks = [proj.timeline.tracks[track_index]]
+
+        markers = (marker for marker, _, _ in markers_by_time(proj, tracks=tracks, timeline_markers=False))
+        _export_markers(markers, proj, args)
+
+    return ExitCode.OK
+
+
+def _marker_file_format(args):
+    fmt = args['--format']
+    if fmt is None:
+        if args['<file>'] == '-':
+            raise ExitCodeError('--format is required when reading stdin or writing stdout', ExitCode.USAGE)
+        try:
+            fmt = marker_io.format_for_path(Path(args['<file>']))
+        except ValueError as exc:
+            raise ExitCodeError(str(exc), ExitCode.USAGE)
+    if fmt not in marker_io.FORMATS:
+        raise ExitCodeError(f'Unknown marker format: {fmt}', ExitCode.USAGE)
+    return fmt
+
+
+def _import_markers(markers, proj, args):
+    fmt = _marker_file_format(args)
+    try:
+        if args['<file>'] == '-':
+            new_markers = list(marker_io.read_markers(sys.stdin, fmt, proj.edit_rate))
+        else:
+            with open(args['<file>'], encoding='utf-8-sig', newline='') as handle:
+                new_markers = list(marker_io.read_markers(handle, fmt, proj.edit_rate))
+        markers.add_many(new_markers, duplicates_okay=args['--duplicates-okay'])
+    except OSError as exc:
+        raise ExitCodeError(str(exc), ExitCode.NO_INPUT)
+    except ValueError as exc:
+        raise ExitCodeError(str(exc), ExitCode.DATA_ERR)
+
+
+def _export_markers(markers, proj, args):
+    fmt = _marker_file_format(args)
+    try:
+        if args['<file>'] == '-':
+            marker_io.write_markers(sys.stdout, markers, fmt, proj.edit_rate)
+        else:
+            with open(args['<file>'], mode='wt', encoding='utf-8', newline='') as handle:
+                marker_io.write_markers(handle, markers, fmt, proj.edit_rate)
+    except OSError as exc:
+        raise ExitCodeError(str(exc), ExitCode.CANT_CREATE)
+
+
 @dsc.command()
 def track_media_ls(_, args):
     """usage: {program} track-media-ls <project> [<track-index>]
@@ -195,6 +319,98 @@ def track_media_ls(_, args):
     return ExitCode.OK
 
 
+@dsc.command()
+def validate_handler(_, args):
+    """usage: {program} validate <project>
+
+    Check a project for problems which would stop Camtasia from opening it, e.g. duplicate IDs or overlapping clips.
+    """
+    with use_project(args['<project>'], save_on_exit=False) as project:
+        problems = project.validate()
+
+    for problem in problems:
+        print(problem)
+
+    return ExitCode.DATA_ERR if problems else ExitCode.OK
+
+
+@dsc.command()
+def diff_handler(_, args):
+    """usage: {program} diff <project-a> <project-b>
+
+    List the differences between two projects, e.g. clips which were added, moved or trimmed.
+    """
+    with use_project(args['<project-a>'], save_on_exit=False) as project_a:
+        with use_project(args['<project-b>'], save_on_exit=False) as project_b:
+            for change in diff(project_a, project_b):
+                print(change)
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def concatenate_handler(_, args):
+    """usage: {program} concatenate [--no-copy] <project> <input-project>...
+
+    Append projects end to end to the timeline of <project>.
+
+    Options:
+        --no-copy  Refer to the input projects' media files where they are, rather than copying them.
+    """
+    inputs = [load_project(path) for path in args['<input-project>']]
+    with use_project(args['<project>']) as project:
+        try:
+            starts = operations.concatenate(inputs, into=project, copy_media=not args['--no-copy'])
+        except ValueError as exc:
+            raise ExitCodeError(str(exc), ExitCode.DATA_ERR) from exc
+        except OSError as exc:
+            raise ExitCodeError(str(exc), ExitCode.OS_ERR) from exc
+
+    for path, start in zip(args['<input-project>'], starts):
+        print(f'{start} {path}')
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def split_at_markers_handler(_, args):
+    """usage: {program} split-at-markers <project> <out-dir>
+
+    Split a project into several projects, cutting its timeline at the timeline markers.
+    """
+    with use_project(args['<project>'], save_on_exit=False) as project:
+        try:
+            paths = operations.split_at_markers(project, args['<out-dir>'])
+        except OSError as exc:
+            raise ExitCodeError(str(exc), ExitCode.CANT_CREATE) from exc
+
+    for path in paths:
+        print(path)
+
+    return ExitCode.OK
+
+
+@dsc.command()
+def merge_handler(_, args):
+    """usage: {program} merge <base> <ours> <theirs>
+
+    Merge the changes made in <theirs> into <ours>, where both were edited from <base>. <ours> is saved with the
+    result. Conflicting changes are listed, and resolved in favour of <ours>.
+    """
+    with use_project(args['<base>'], save_on_exit=False) as base:
+        with use_project(args['<theirs>'], save_on_exit=False) as theirs:
+            with use_project(args['<ours>']) as ours:
+                try:
+                    conflicts = merge(base, ours, theirs)
+                except ValueError as exc:
+                    raise ExitCodeError(str(exc), ExitCode.DATA_ERR)
+
+    for conflict in conflicts:
+        print(f'conflict: {conflict}', file=sys.stderr)
+
+    return ExitCode.OK
+
+
 def main(argv=None):
     try:
         return dsc.main('pytsc', argv=argv)
@@ -0,0 +1,121 @@
+"""Compact in-memory representation of project data.
+
+Large projects repeat the same strings (e.g. clip types and interpolation codes) and the same small dicts (e.g. default
+'scale0' and 'scale1' parameters, and empty metadata) thousands of times. `loads()` parses project JSON so that each
+distinct string is stored once, and each distinct small dict of plain values is stored once as a `SharedDict`.
+
+SharedDicts are read-only. Code which modifies project data in place must first get a private copy of a possibly
+shared dict with `writable()`. The API does this itself. Replacing a shared dict, e.g. `parameters['scale0'] = ...`, is
+always fine.
+"""
+
+from dataclasses import dataclass
+import json
+import sys
+
+
+class SharedDict(dict):
+    """A dict which may be shared by many places in the project data, and so can't be modified.
+
+    Copies of a SharedDict (e.g. by `copy.deepcopy()`) are the SharedDict itself, as for other immutable values.
+    `dict(shared)` makes a private, modifiable copy.
+    """
+
+    __slots__ = ()
+
+    def _read_only(self, *args, **kwargs):
+        raise TypeError('Shared project data cannot be modified. Use camtasia.compact.writable() to get a copy.')
+
+    __setitem__ = __delitem__ = __ior__ = _read_only
+    clear = pop = popitem = setdefault = update = _read_only
+
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+
+def writable(container, key):
+    """Get a dict from project data so that it can be modified in place.
+
+    This is like `container.setdefault(key, {})`, except that a SharedDict is first replaced by a private copy.
+
+    Args:
+        container: The dict holding the dict to get.
+        key: The key of the dict to get.
+
+    Returns: The dict at `container[key]`, which is not shared.
+    """
+    value = container.get(key)
+    if value is None:
+        value = container[key] = {}
+    elif type(value) is SharedDict:
+        value = container[key] = dict(value)
+    return value
+
+
+@dataclass
+class CompactStats:
+    """How much memory compact loading saved.
+
+    Attributes:
+        strings_shared: The number of strings replaced by an identical string already loaded.
+        dicts_shared: The number of dicts replaced by a SharedDict.
+        bytes_saved: The approximate number of bytes saved, i.e. the size of the replaced objects.
+    """
+    strings_shared: int = 0
+    dicts_shared: int = 0
+    bytes_saved: int = 0
+
+
+class _Compactor:
+    "An `object_pairs_hook` for `json.loads()` which shares repeated strings and small dicts."
+
+    def __init__(self):
+        self.stats = CompactStats()
+        self._strings = {}
+        self._dicts = {}
+
+    def _string(self, value):
+        shared = self._strings.setdefault(value, value)
+        if shared is not value:
+            self.stats.strings_shared += 1
+            self.stats.bytes_saved += sys.getsizeof(value)
+        return shared
+
+    def _dict(self, value):
+        # Types are part of the key, since e.g. 1, 1.0 and True are equal but are written differently.
+        key = tuple((name, type(item), item) for name, item in value.items())
+        shared = self._dicts.get(key)
+        if shared is None:
+            shared = self._dicts[key] = SharedDict(value)
+        else:
+            self.stats.dicts_shared += 1
+            self.stats.bytes_saved += sys.getsizeof(value)
+        return shared
+
+    def __call__(self, pairs):
+        result = {}
+        for key, value in pairs:
+            if type(value) is str:
+                value = self._string(value)
+            elif type(value) is dict and all(type(item) not in (dict, list, SharedDict) for item in value.values()):
+                # Only dicts held directly by other dicts are shared. Those in lists, e.g. keyframes, are often
+                # modified in place.
+                value = self._dict(value)
+            result[self._string(key)] = value
+        return result
+
+
+def loads(text):
+    """Parse project JSON into a compact representation.
+
+    Args:
+        text: The JSON text of a project file.
+
+    Returns: A `(data, stats)` tuple of the project dict and a CompactStats.
+    """
+    compactor = _Compactor()
+    data = json.loads(text, object_pairs_hook=compactor)
+    return data, compactor.stats
@@ -0,0 +1,279 @@
+"""Structural comparison of projects.
+
+Comparing two versions of a project as text is slow and noisy, since small edits can move large parts of the JSON
+around. Instead, `diff()` compares projects structurally: clips are matched by ID, media bin entries by ID and source,
+and changes are reported in terms of what they mean, e.g. that a clip was moved or trimmed.
+
+Every JSON subtree is hashed bottom-up (i.e. a Merkle tree), so unchanged tracks, clips and media are recognised by
+comparing a single hash, however large they are.
+"""
+
+from dataclasses import dataclass
+import hashlib
+import json
+from typing import Any
+
+from camtasia.timeline.traversal import csml_tracks, walk
+
+# Clip fields whose changes mean the clip moved or was trimmed.
+_TRIM_KEYS = frozenset(['duration', 'mediaStart', 'mediaDuration'])
+
+# Clip fields which are compared separately, or which hold nested clips compared in their own right.
+_NESTED_KEYS = frozenset(['medias', 'tracks'])
+
+
+@dataclass
+class Change:
+    """A difference between two projects.
+
+    Attributes:
+        kind: What changed, e.g. 'clip-moved'. See `diff()` for the kinds of change.
+        subject: What the change applies to, e.g. 'clip 12'.
+        old: The old value, if any.
+        new: The new value, if any.
+    """
+    kind: str
+    subject: str
+    old: Any = None
+    new: Any = None
+
+    def __str__(self):
+        if self.old is None and self.new is None:
+            return f'{self.kind} {self.subject}'
+        return f'{self.kind} {self.subject}: {self.old} -> {self.new}'
+
+
+class MerkleHasher:
+    """Hashes JSON values bottom-up, so that every subtree's hash is computed only once.
+
+    Hashes are cached by object identity, so a hasher must only be used while the values it has hashed are unchanged.
+    """
+
+    def __init__(self):
+        self._cache = {}
+
+    def __call__(self, value):
+        "Get the hash of a JSON value, as bytes."
+        if not isinstance(value, (dict, list)):
+            return hashlib.blake2b(json.dumps(value).encode('utf-8'), digest_size=16).digest()
+
+        cached = self._cache.get(id(value))
+        if cached is not None and cached[0] is value:
+            return cached[1]
+
+        digest = hashlib.blake2b(digest_size=16)
+        if isinstance(value, dict):
+            digest.update(b'{')
+            for key in sorted(value):
+                digest.update(json.dumps(key).encode('utf-8'))
+                digest.update(self(value[key]))
+        else:
+            digest.update(b'[')
+            for item in value:
+                digest.update(self(item))
+
+        # Keep a reference to the value so that its id() isn't reused while it's cached.
+        self._cache[id(value)] = (value, digest.digest())
+        return self._cache[id(value)][1]
+
+
+def diff(project_a, project_b):
+    """Compare two projects.
+
+    The kinds of change reported are:
+
+    * 'project-changed': A top-level project setting, e.g. 'editRate', changed.
+    * 'media-added', 'media-removed', 'media-changed': An entry in the media bin, matched by ID and source.
+    * 'track-added', 'track-removed', 'track-renamed', 'track-changed': A track, matched by position.
+    * 'clip-added', 'clip-removed': A clip (i.e. a track media, at any depth of nesting), matched by ID.
+    * 'clip-moved': A clip's start or track changed.
+    * 'clip-trimmed': A clip's duration, media start or media duration changed.
+    * 'clip-effects-changed': A clip's effects changed.
+    * 'clip-changed': Any other property of a clip changed.
+    * 'marker-added', 'marker-removed', 'marker-renamed': A timeline marker, or a media marker of a clip present in
+      both projects.
+    * 'timeline-changed': Any other timeline setting changed.
+
+    Args:
+        project_a: The old Project.
+        project_b: The new Project.
+
+    Returns: A list of Changes.
+    """
+    return diff_data(project_a._data, project_b._data)
+
+
+def diff_data(data_a, data_b, hasher=None):
+    """Compare two project dicts. This is like `diff()` but takes the raw data of the projects.
+
+    Args:
+        data_a: The old project dict.
+        data_b: The new project dict.
+        hasher: An optional MerkleHasher, e.g. one shared across several comparisons of the same data.
+
+    Returns: A list of Changes.
+    """
+    hasher = MerkleHasher() if hasher is None else hasher
+    if hasher(data_a) == hasher(data_b):
+        return []
+
+    changes = []
+
+    for key in _changed_keys(data_a, data_b, hasher, exclude=('sourceBin', 'timeline')):
+        changes.append(Change('project-changed', key, data_a.get(key), data_b.get(key)))
+
+    changes.extend(_diff_media_bin(data_a.get('sourceBin', []), data_b.get('sourceBin', []), hasher))
+
+    timeline_a, timeline_b = data_a['timeline'], data_b['timeline']
+    if hasher(timeline_a) != hasher(timeline_b):
+        changes.extend(_diff_tracks(timeline_a, timeline_b, hasher))
+        changes.extend(_diff_clips(timeline_a, timeline_b, hasher))
+        changes.extend(_diff_markers('timeline', _toc(timeline_a), _toc(timeline_b)))
+
+        parameters_a = {k: v for k, v in timeline_a.get('parameters', {}).items() if k != 'toc'}
+        parameters_b = {k: v for k, v in timeline_b.get('parameters', {}).items() if k != 'toc'}
+        if hasher(parameters_a) != hasher(parameters_b):
+            changes.append(Change('timeline-changed', 'parameters'))
+        for key in _changed_keys(timeline_a, timeline_b, hasher,
+                                 exclude=('sceneTrack', 'trackAttributes', 'parameters')):
+            changes.append(Change('timeline-changed', key))
+
+    return changes
+
+
+def _changed_keys(dict_a, dict_b, hasher, exclude=()):
+    "Get the keys whose values differ between two dicts, in sorted order."
+    return [key for key in sorted(set(dict_a) | set(dict_b))
+            if key not in exclude
+            and (key not in dict_a or key not in dict_b or hasher(dict_a[key]) != hasher(dict_b[key]))]
+
+
+def _diff_media_bin(bin_a, bin_b, hasher):
+    if hasher(bin_a) == hasher(bin_b):
+        return
+
+    media_a = {(record['id'], record['src']): record for record in bin_a}
+    media_b = {(record['id'], record['src']): record for record in bin_b}
+
+    for key, record in media_a.items():
+        subject = f'media {key[0]} ({key[1]})'
+        if key not in media_b:
+            yield Change('media-removed', subject)
+        elif hasher(record) != hasher(media_b[key]):
+            yield Change('media-changed', subject, new=', '.join(_changed_keys(record, media_b[key], hasher)))
+
+    for key in sorted(media_b.keys() - media_a.keys()):
+        yield Change('media-added', f'media {key[0]} ({key[1]})')
+
+
+def _diff_tracks(timeline_a, timeline_b, hasher):
+    attributes_a, attributes_b = timeline_a['trackAttributes'], timeline_b['trackAttributes']
+
+    for index in range(max(len(attributes_a), len(attributes_b))):
+        subject = f'track {index}'
+        if index >= len(attributes_b):
+            yield Change('track-removed', subject, old=attributes_a[index].get('ident'))
+        elif index >= len(attributes_a):
+            yield Change('track-added', subject, new=attributes_b[index].get('ident'))
+        elif hasher(attributes_a[index]) != hasher(attributes_b[index]):
+            for key in _changed_keys(attributes_a[index], attributes_b[index], hasher):
+                old, new = attributes_a[index].get(key), attributes_b[index].get(key)
+                if key == 'ident':
+                    yield Change('track-renamed', subject, old, new)
+                else:
+                    yield Change('track-changed', f'{subject} {key}', old, new)
+
+
+def _clip_index(timeline_data):
+    "Map clip IDs to `(track position, record)` tuples."
+    return {record['id']: (path[0], record) for path, record in walk(csml_tracks(timeline_data)) if 'id' in record}
+
+
+def _diff_clips(timeline_a, timeline_b, hasher):
+    tracks_a, tracks_b = csml_tracks(timeline_a), csml_tracks(timeline_b)
+    if hasher(tracks_a) == hasher(tracks_b):
+        return
+
+    clips_a = _clip_index(timeline_a)
+    clips_b = _clip_index(timeline_b)
+
+    for clip_id, (track_a, record_a) in clips_a.items():
+        subject = f'clip {clip_id}'
+        if clip_id not in clips_b:
+            yield Change('clip-removed', subject)
+            continue
+
+        track_b, record_b = clips_b[clip_id]
+        if track_a == track_b and hasher(record_a) == hasher(record_b):
+            continue
+
+        if track_a != track_b or record_a.get('start') != record_b.get('start'):
+            yield Change('clip-moved', subject, (track_a, record_a.get('start')), (track_b, record_b.get('start')))
+
+        changed = _changed_keys(record_a, record_b, hasher, exclude=_NESTED_KEYS | {'start'})
+        if _TRIM_KEYS.intersection(changed):
+            yield Change('clip-trimmed', subject,
+                         tuple(record_a.get(key) for key in sorted(_TRIM_KEYS)),
+                         tuple(record_b.get(key) for key in sorted(_TRIM_KEYS)))
+        if 'effects' in changed:
+            yield Change('clip-effects-changed', subject,
+                         [e.get('effectName') for e in record_a.get('effects', [])],
+                         [e.get('effectName') for e in record_b.get('effects', [])])
+        if 'parameters' in changed:
+            yield from _diff_markers(subject, _toc(record_a), _toc(record_b))
+            parameters_a = {k: v for k, v in record_a.get('parameters', {}).items() if k != 'toc'}
+            parameters_b = {k: v for k, v in record_b.get('parameters', {}).items() if k != 'toc'}
+            changed.extend(_changed_keys(parameters_a, parameters_b, hasher))
+        # Effects keep their settings in the clip's metadata too.
+        reported = {'effects', 'parameters', 'metadata'} if 'effects' in changed else {'effects', 'parameters'}
+        other = [key for key in changed if key not in _TRIM_KEYS and key not in reported]
+        if other:
+            yield Change('clip-changed', subject, new=', '.join(other))
+
+    for clip_id in sorted(clips_b.keys() - clips_a.keys()):
+        yield Change('clip-added', f'clip {clip_id}', new=(clips_b[clip_id][0], clips_b[clip_id][1].get('start')))
+
+
+def _toc(record):
+    return record.get('parameters', {}).get('toc', {}).get('keyframes', [])
+
+
+def _diff_markers(owner, keyframes_a, keyframes_b):
+    "Compare marker keyframes, matching them by time and name."
+    markers_a = sorted((k['time'], k['value']) for k in keyframes_a)
+    markers_b = sorted((k['time'], k['value']) for k in keyframes_b)
+    if markers_a == markers_b:
+        return
+
+    removed = _multiset_difference(markers_a, markers_b)
+    added = _multiset_difference(markers_b, markers_a)
+
+    # A marker removed and another added at the same time is a rename.
+    added_at = {}
+    for time, name in added:
+        added_at.setdefault(time, []).append(name)
+
+    for time, name in removed:
+        if added_at.get(time):
+            yield Change('marker-renamed', f'{owner} marker at {time}', name, added_at[time].pop(0))
+        else:
+            yield Change('marker-removed', f'{owner} marker at {time}', old=name)
+
+    for time, names in sorted(added_at.items()):
+        for name in names:
+            yield Change('marker-added', f'{owner} marker at {time}', new=name)
+
+
+def _multiset_difference(items_a, items_b):
+    "Get the items of sorted list `items_a` not matched by items of sorted list `items_b`."
+    remaining = {}
+    for item in items_b:
+        remaining[item] = remaining.get(item, 0) + 1
+
+    difference = []
+    for item in items_a:
+        if remaining.get(item, 0):
+            remaining[item] -= 1
+        else:
+            difference.append(item)
+    return difference
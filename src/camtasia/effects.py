@@ -298,3 +298,94 @@ class EffectSchema(OneOfSchema):
     def get_obj_type(self, obj):
         return obj.name
 
+
+# Building marshmallow schemas is expensive, so we build this once and share it.
+_EFFECT_SCHEMA = EffectSchema()
+
+
+def dump_effect(effect, validate=False):
+    """Serialize an Effect to the dict stored in a project file.
+
+    Effects with a hand-written serializer bypass marshmallow unless `validate` is true.
+
+    Args:
+        effect: The Effect to serialize.
+        validate: Whether to serialize through the marshmallow schema.
+
+    Returns: A dict suitable for the 'effects' list of a track media record.
+    """
+    if not validate:
+        dumper = _EFFECT_DUMPERS.get(type(effect))
+        if dumper is not None:
+            return dumper(effect)
+    return _EFFECT_SCHEMA.dump(effect)
+
+
+def load_effect(effect_data, validate=False):
+    """Deserialize an Effect from the dict stored in a project file.
+
+    Effects with a hand-written deserializer bypass marshmallow unless `validate` is true. Data that the hand-written
+    deserializer can't make sense of is passed on to marshmallow so that errors are reported consistently.
+
+    Args:
+        effect_data: A dict from the 'effects' list of a track media record.
+        validate: Whether to deserialize through the marshmallow schema.
+
+    Returns: A new Effect.
+
+    Raises:
+        marshmallow.ValidationError: `effect_data` is not a valid effect.
+    """
+    if not validate:
+        loader = _EFFECT_LOADERS.get(effect_data.get(EffectSchema.type_field))
+        if loader is not None:
+            try:
+                return loader(effect_data)
+            except (KeyError, TypeError):
+                pass
+    return _EFFECT_SCHEMA.load(effect_data)
+
+
+def _dump_chroma_key_effect(effect):
+    return {
+        EffectSchema.type_field: CHROMA_KEY_NAME,
+        "category": effect.category,
+        "parameters": {
+            COMPENSATION_KEY: float(effect.compensation),
+            COLOR_ALPHA_KEY: float(effect.alpha),
+            COLOR_RED_KEY: float(effect.red),
+            COLOR_GREEN_KEY: float(effect.green),
+            COLOR_BLUE_KEY: float(effect.blue),
+            DEFRINGE_KEY: float(effect.defringe),
+            "enabled": 1,
+            INVERT_EFFECT_KEY: float(effect.inverted),
+            SOFTNESS_KEY: float(effect.softness),
+            TOLERANCE_KEY: float(effect.tolerance),
+        }
+    }
+
+
+def _load_chroma_key_effect(effect_data):
+    parameters = effect_data["parameters"]
+    return ChromaKeyEffect(
+        tolerance=float(parameters[TOLERANCE_KEY]),
+        softness=float(parameters[SOFTNESS_KEY]),
+        hue=RGBA.from_floats(
+            red=float(parameters[COLOR_RED_KEY]),
+            green=float(parameters[COLOR_GREEN_KEY]),
+            blue=float(parameters[COLOR_BLUE_KEY]),
+            alpha=float(parameters[COLOR_ALPHA_KEY]),
+        ),
+        defringe=float(parameters[DEFRINGE_KEY]),
+        inverted=bool(parameters[INVERT_EFFECT_KEY]),
+        compensation=float(parameters[COMPENSATION_KEY]),
+    )
+
+
+_EFFECT_DUMPERS = {
+    ChromaKeyEffect: _dump_chroma_key_effect,
+}
+
+_EFFECT_LOADERS = {
+    CHROMA_KEY_NAME: _load_chroma_key_effect,
+}
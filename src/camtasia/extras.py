@@ -1,6 +1,8 @@
 """Utilities and helper functions.
 """
 
+import heapq
+
 
 def media_markers(project):
     """Get all media markers in a project.
@@ -16,3 +18,42 @@ def media_markers(project):
         for media in track.medias
         for marker in media.markers
     )
+
+
+def markers_by_time(project, start=None, stop=None, tracks=None, timeline_markers=True):
+    """Get the media markers and timeline markers in a project in time order.
+
+    Each media's markers are already kept in time order, so this merges them lazily rather than sorting every marker in
+    the project. Stop iterating as soon as you have what you need, or give a time window, and markers outside it are
+    never built.
+
+    Args:
+        project: The Project to fetch data from.
+        start: The earliest timeline time of markers to include. By default there is no lower limit.
+        stop: The timeline time (exclusive) before which markers must be. By default there is no upper limit.
+        tracks: An iterable of Tracks whose media markers to include. By default all tracks are included.
+        timeline_markers: Whether to include timeline markers.
+
+    Returns: An iterable of `(Marker, Media, Track)` tuples ordered by marker time. For timeline markers, `Media` and
+        `Track` are None. Markers with the same time are ordered timeline markers first, then by track and media.
+    """
+    timeline = project.timeline
+    if tracks is None:
+        tracks = timeline.tracks
+
+    def window(markers):
+        if start is None and stop is None:
+            return iter(markers)
+        return iter(markers.between(
+            float('-inf') if start is None else start,
+            float('inf') if stop is None else stop))
+
+    def media_stream(media, track):
+        for marker in window(media.markers):
+            yield marker, media, track
+
+    streams = [media_stream(media, track) for track in tracks for media in track.medias]
+    if timeline_markers:
+        streams.insert(0, ((marker, None, None) for marker in window(timeline.markers)))
+
+    return heapq.merge(*streams, key=lambda item: item[0].time)
@@ -1,7 +1,116 @@
 from dataclasses import dataclass
 from datetime import timedelta
+from fractions import Fraction
+from functools import lru_cache
+from math import lcm
 from typing import Tuple
 
+import numpy as np
+
+# The number of ticks per second in common time bases.
+MILLISECONDS = 1000
+MICROSECONDS = 1000000
+
+_ROUNDINGS = ('nearest', 'floor', 'ceil')
+
+
+class Timebase:
+    """Exact conversion of times from one time base to another.
+
+    Times in Camtasia projects are counted in ticks of various rates: the project's edit rate for the timeline, each bin
+    media's edit rate for its range (e.g. the sample rate for audio), milliseconds, and so forth. A Timebase converts
+    tick counts from one rate to another using exact integer arithmetic, so repeated conversions never drift.
+
+    Use `Timebase.between()` rather than the constructor to share cached instances.
+
+    Args:
+        from_rate: The ticks per second of the source time base.
+        to_rate: The ticks per second of the destination time base.
+    """
+
+    def __init__(self, from_rate, to_rate):
+        factor = Fraction(to_rate) / Fraction(from_rate)
+        self._from_rate = from_rate
+        self._to_rate = to_rate
+        self._numerator = factor.numerator
+        self._denominator = factor.denominator
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def between(from_rate, to_rate):
+        "Get the (cached) Timebase converting from `from_rate` to `to_rate`."
+        return Timebase(from_rate, to_rate)
+
+    @property
+    def from_rate(self):
+        return self._from_rate
+
+    @property
+    def to_rate(self):
+        return self._to_rate
+
+    @property
+    def factor(self) -> Fraction:
+        "The exact ratio by which tick counts are multiplied."
+        return Fraction(self._numerator, self._denominator)
+
+    @property
+    def inverse(self):
+        "The Timebase converting in the opposite direction."
+        return Timebase.between(self._to_rate, self._from_rate)
+
+    def exact(self, ticks) -> Fraction:
+        "Convert a tick count exactly, without rounding."
+        return Fraction(ticks * self._numerator, self._denominator)
+
+    def convert(self, ticks, rounding='nearest') -> int:
+        """Convert a tick count.
+
+        Args:
+            ticks: The integer tick count in the source time base.
+            rounding: How to round to a whole tick: 'nearest' (halves round up), 'floor' or 'ceil'.
+
+        Returns: The integer tick count in the destination time base.
+        """
+        scaled = ticks * self._numerator
+        if rounding == 'nearest':
+            return (2 * scaled + self._denominator) // (2 * self._denominator)
+        if rounding == 'floor':
+            return scaled // self._denominator
+        if rounding == 'ceil':
+            return -(-scaled // self._denominator)
+        raise ValueError(f'Unknown rounding: {rounding}. Expected one of {_ROUNDINGS}')
+
+    def convert_array(self, ticks, rounding='nearest'):
+        """Convert an array of tick counts at once.
+
+        This uses the same exact integer arithmetic as `convert()`, so results are identical. Tick counts times the
+        conversion factor's numerator must fit in 64 bits.
+
+        Args:
+            ticks: An array-like of integer tick counts in the source time base.
+            rounding: As for `convert()`.
+
+        Returns: An int64 array of tick counts in the destination time base.
+
+        Raises:
+            ValueError: A tick count is not a whole number.
+        """
+        ticks = np.asarray(ticks)
+        if ticks.dtype.kind not in 'iub' and np.any(ticks % 1 != 0):
+            raise ValueError('Tick counts must be whole numbers. Convert fractional tick counts with convert().')
+        scaled = ticks.astype(np.int64) * self._numerator
+        if rounding == 'nearest':
+            return (2 * scaled + self._denominator) // (2 * self._denominator)
+        if rounding == 'floor':
+            return scaled // self._denominator
+        if rounding == 'ceil':
+            return -(-scaled // self._denominator)
+        raise ValueError(f'Unknown rounding: {rounding}. Expected one of {_ROUNDINGS}')
+
+    def __repr__(self):
+        return f'Timebase(from_rate={self.from_rate}, to_rate={self.to_rate})'
+
 
 @dataclass
 class FrameStamp:
@@ -10,6 +119,8 @@ class FrameStamp:
     Times in Camtasia projects are generally reported in terms of frames. To turn these into clock times, you need to
     also know a frame rate. This class captures those two bits of data.
     """
+    __slots__ = ('frame_number', 'frame_rate')
+
     frame_number: int
     frame_rate: int
 
@@ -27,15 +138,15 @@ class FrameStamp:
     @property
     def time(self) -> timedelta:
         "The time of the frame as a high-resolution (i.e. subsecond) timedelta."
-        seconds = self.frame_number / self.frame_rate
-        return timedelta(seconds=seconds)
+        microseconds = Timebase.between(self.frame_rate, MICROSECONDS).convert(self.frame_number)
+        return timedelta(microseconds=microseconds)
 
     def __str__(self):
         secs, frame = self.frame_time
         return f'{secs};{frame}'
 
     def __lt__(self, rhs):
-        return self.time < rhs.time
+        return self.frame_number * rhs.frame_rate < rhs.frame_number * self.frame_rate
 
     def __add__(self, rhs):
         return self._add(self.frame_rate, self.frame_number,
@@ -51,20 +162,10 @@ class FrameStamp:
 
         The result is reported in the lower-common-multiple frame-rate, with frame numbers adjusted accordingly.
         """
-        common_frame_rate = _lcm(frame_rate_1, frame_rate_2)
+        common_frame_rate = lcm(frame_rate_1, frame_rate_2)
         lhs_frame = (common_frame_rate // frame_rate_1) * frame_number_1
         rhs_frame = (common_frame_rate // frame_rate_2) * frame_number_2
 
         return FrameStamp(
             frame_number=lhs_frame + rhs_frame,
             frame_rate=common_frame_rate)
-
-
-def _lcm(x, y):
-    "Quick-and-dirty LCM"
-    mul = x * y
-
-    while y > 0:
-        x, y = y, x % y
-
-    return mul // x
@@ -0,0 +1,198 @@
+"""Reading and writing markers in external formats.
+
+Three formats are supported:
+
+* 'csv': A header row of `time,name` followed by one row per marker. Times are in seconds, e.g. `12.345`.
+* 'json': A JSON array of `{"time": seconds, "name": name}` objects.
+* 'chapters': One `[hh:]mm:ss[.ttt] name` line per marker, as used for video chapters.
+
+Times are converted to and from frames through the project's edit rate, rounding to the nearest frame and millisecond
+respectively. Markers are read and written as streams, so the files can be arbitrarily large (except for reading JSON,
+which is parsed in one go).
+"""
+
+import csv
+from fractions import Fraction
+import json
+import re
+
+from camtasia.frame_stamp import MILLISECONDS, Timebase
+
+FORMATS = ('csv', 'json', 'chapters')
+
+_SUFFIX_FORMATS = {
+    '.csv': 'csv',
+    '.json': 'json',
+    '.txt': 'chapters',
+}
+
+_CHAPTER = re.compile(r'^\s*(?P<time>(?:\d+:)?\d+:\d+(?:[.,]\d+)?)\s+(?P<name>.*?)\s*$')
+
+
+def format_for_path(path):
+    """Determine the marker format to use for a file from its extension.
+
+    Args:
+        path: A pathlib.Path.
+
+    Returns: One of `FORMATS`.
+
+    Raises:
+        ValueError: The extension is not associated with a format.
+    """
+    try:
+        return _SUFFIX_FORMATS[path.suffix.lower()]
+    except KeyError:
+        raise ValueError(f'Unknown marker file extension: {path.suffix}. Expected one of {tuple(_SUFFIX_FORMATS)}')
+
+
+def read_markers(handle, fmt, edit_rate):
+    """Read markers from a file.
+
+    Args:
+        handle: A text file opened for reading. For CSV it should be opened with `newline=''`.
+        fmt: One of `FORMATS`.
+        edit_rate: The edit rate of the project the markers are for.
+
+    Returns: An iterable of `(name, time)` tuples, with times in frames, in file order.
+
+    Raises:
+        ValueError: `fmt` is unknown, or the file is malformed.
+    """
+    timebase = Timebase.between(MILLISECONDS, edit_rate)
+    for name, milliseconds in _READERS[_check_format(fmt)](handle):
+        yield name, timebase.convert(milliseconds)
+
+
+def write_markers(handle, markers, fmt, edit_rate):
+    """Write markers to a file.
+
+    Args:
+        handle: A text file opened for writing. For CSV it should be opened with `newline=''`.
+        markers: An iterable of Markers.
+        fmt: One of `FORMATS`.
+        edit_rate: The edit rate of the project the markers are from.
+
+    Returns: The number of markers written.
+
+    Raises:
+        ValueError: `fmt` is unknown.
+    """
+    timebase = Timebase.between(edit_rate, MILLISECONDS)
+    return _WRITERS[_check_format(fmt)](
+        handle,
+        ((marker.name, timebase.convert(marker.time)) for marker in markers))
+
+
+def _check_format(fmt):
+    if fmt not in FORMATS:
+        raise ValueError(f'Unknown marker format: {fmt}. Expected one of {FORMATS}')
+    return fmt
+
+
+def _read_csv(handle):
+    reader = csv.DictReader(handle)
+    if reader.fieldnames is None or not {'time', 'name'} <= set(reader.fieldnames):
+        raise ValueError("CSV marker files must have 'time' and 'name' columns")
+    for row in reader:
+        yield row['name'], _parse_seconds(row['time'])
+
+
+def _write_csv(handle, markers):
+    writer = csv.writer(handle)
+    writer.writerow(('time', 'name'))
+    count = 0
+    for name, milliseconds in markers:
+        writer.writerow((_format_seconds(milliseconds), name))
+        count += 1
+    return count
+
+
+def _read_json(handle):
+    try:
+        entries = json.load(handle)
+    except json.JSONDecodeError as exc:
+        raise ValueError(f'Invalid JSON marker file: {exc}') from exc
+
+    if not isinstance(entries, list):
+        raise ValueError('JSON marker files must contain an array')
+
+    for entry in entries:
+        try:
+            yield str(entry['name']), _parse_seconds(str(entry['time']))
+        except (KeyError, TypeError):
+            raise ValueError(f"JSON markers must have 'time' and 'name' fields: {entry}")
+
+
+def _write_json(handle, markers):
+    count = 0
+    handle.write('[')
+    for name, milliseconds in markers:
+        handle.write(',\n' if count else '\n')
+        handle.write(f'  {{"time": {_format_seconds(milliseconds)}, "name": {json.dumps(name)}}}')
+        count += 1
+    handle.write('\n]\n' if count else ']\n')
+    return count
+
+
+def _read_chapters(handle):
+    for line in handle:
+        if not line.strip():
+            continue
+        match = _CHAPTER.match(line)
+        if match is None:
+            raise ValueError(f'Invalid chapter line: {line.rstrip()}')
+        yield match['name'], _parse_clock(match['time'])
+
+
+def _write_chapters(handle, markers):
+    count = 0
+    for name, milliseconds in markers:
+        handle.write(f'{_format_clock(milliseconds)} {name}\n')
+        count += 1
+    return count
+
+
+_READERS = {
+    'csv': _read_csv,
+    'json': _read_json,
+    'chapters': _read_chapters,
+}
+
+_WRITERS = {
+    'csv': _write_csv,
+    'json': _write_json,
+    'chapters': _write_chapters,
+}
+
+
+def _parse_seconds(text):
+    "Parse a decimal number of seconds into milliseconds."
+    try:
+        seconds = Fraction(text.strip())
+    except (ValueError, ZeroDivisionError):
+        raise ValueError(f'Invalid marker time: {text}')
+    return round(seconds * 1000)
+
+
+def _format_seconds(milliseconds):
+    sign = '-' if milliseconds < 0 else ''
+    seconds, milliseconds = divmod(abs(milliseconds), 1000)
+    return f'{sign}{seconds}.{milliseconds:03}'
+
+
+def _parse_clock(timestamp):
+    "Parse a '[hh:]mm:ss[.ttt]' timestamp into milliseconds."
+    clock, _, fraction = timestamp.replace(',', '.').partition('.')
+    parts = [int(part) for part in clock.split(':')]
+    hours, minutes, seconds = [0] * (3 - len(parts)) + parts
+    milliseconds = int(fraction.ljust(3, '0')[:3])
+    return ((hours * 60 + minutes) * 60 + seconds) * 1000 + milliseconds
+
+
+def _format_clock(milliseconds):
+    seconds, milliseconds = divmod(max(milliseconds, 0), 1000)
+    minutes, seconds = divmod(seconds, 60)
+    hours, minutes = divmod(minutes, 60)
+    clock = f'{hours:02}:{minutes:02}:{seconds:02}'
+    return f'{clock}.{milliseconds:03}' if milliseconds else clock
@@ -0,0 +1,204 @@
+"""Fast header-only probing of common media formats.
+
+MediaInfo is thorough but comparatively slow, and for simple formats all we need to describe the media is a handful of
+values from the file header. The functions here read just enough of a file to produce a dict with the same keys that
+`pymediainfo.Track.to_data()` would give us for the fields we actually use, i.e. the fields consumed by
+`_visual_track_to_json()` and `_audio_track_to_json()`.
+"""
+
+from collections import namedtuple
+import struct
+
+# How much of a file we read up front. This is enough for everything except JPEGs with large EXIF blocks, for which we
+# skip from segment to segment.
+_HEADER_SIZE = 4096
+
+_PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+# JPEG start-of-frame markers, i.e. the ones carrying the image dimensions. 0xC4, 0xC8 and 0xCC are not SOF markers.
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+# JPEG markers which stand alone, i.e. which are not followed by a segment length.
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+WAVE_FORMAT_PCM = 0x0001
+WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+
+def probe_header(file_path):
+    """Describe a media file by reading only its header.
+
+    Args:
+        file_path: Path to the media file.
+
+    Returns: A dict of track data compatible with `pymediainfo.Track.to_data()`, or None if the format is not one we
+        know how to probe (in which case the caller should fall back to MediaInfo).
+
+    Raises:
+        FileNotFoundError: `file_path` does not exist.
+    """
+    with open(file_path, 'rb') as handle:
+        header = handle.read(_HEADER_SIZE)
+
+        try:
+            if header.startswith(_PNG_SIGNATURE):
+                return _probe_png(header)
+            if header.startswith(b'\xff\xd8'):
+                return _probe_jpeg(handle)
+            if header[:6] in (b'GIF87a', b'GIF89a'):
+                return _probe_gif(header)
+            if header.startswith(b'BM'):
+                return _probe_bmp(header)
+            if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+                return _probe_wav(handle)
+        except struct.error:
+            # Truncated or otherwise odd header. Let MediaInfo have a go at it.
+            return None
+
+    return None
+
+
+def _image_track(width, height, bit_depth):
+    return {
+        'kind_of_stream': 'Image',
+        'width': width,
+        'height': height,
+        'bit_depth': bit_depth,
+    }
+
+
+def _probe_png(header):
+    # The IHDR chunk must come first: length, type, width, height, bit depth, ...
+    if header[12:16] != b'IHDR':
+        return None
+    width, height, bit_depth = struct.unpack_from('>IIB', header, 16)
+    return _image_track(width, height, bit_depth)
+
+
+def _probe_jpeg(handle):
+    handle.seek(2)
+    while True:
+        marker_start = handle.read(2)
+        if len(marker_start) < 2 or marker_start[0] != 0xFF:
+            return None
+
+        marker = marker_start[1]
+
+        # Fill bytes may precede a marker.
+        while marker == 0xFF:
+            fill = handle.read(1)
+            if not fill:
+                return None
+            marker = fill[0]
+
+        if marker in _JPEG_STANDALONE_MARKERS:
+            continue
+
+        if marker == 0xDA:
+            # Start of scan without a frame header. Not something we understand.
+            return None
+
+        (length,) = struct.unpack('>H', handle.read(2))
+
+        if marker in _JPEG_SOF_MARKERS:
+            precision, height, width = struct.unpack('>BHH', handle.read(5))
+            return _image_track(width, height, precision)
+
+        handle.seek(length - 2, 1)
+
+
+def _probe_gif(header):
+    width, height, flags = struct.unpack_from('<HHB', header, 6)
+    # Bits 4-6 of the packed field hold the colour resolution minus one.
+    bit_depth = ((flags >> 4) & 0x07) + 1
+    return _image_track(width, height, bit_depth)
+
+
+def _probe_bmp(header):
+    (dib_size,) = struct.unpack_from('<I', header, 14)
+    if dib_size == 12:
+        # OS/2 BITMAPCOREHEADER
+        width, height, _, bits_per_pixel = struct.unpack_from('<HHHH', header, 18)
+    else:
+        width, height, _, bits_per_pixel = struct.unpack_from('<iiHH', header, 18)
+
+    # 24- and 32-bit bitmaps are 8 bits per channel, which is how MediaInfo reports them.
+    bit_depth = 8 if bits_per_pixel in (24, 32) else bits_per_pixel
+
+    # Negative heights indicate top-down bitmaps.
+    return _image_track(abs(width), abs(height), bit_depth)
+
+
+WavFormat = namedtuple('WavFormat', 'format_tag channels sample_rate block_align bit_depth data_offset data_size')
+WavFormat.__doc__ = "The layout of the sample data in a WAV file."
+
+
+def read_wav_format(handle):
+    """Read the format of a WAV file from its 'fmt ' and 'data' chunk headers.
+
+    Args:
+        handle: A binary file object for the WAV file.
+
+    Returns: A `WavFormat`, or None if the file lacks the chunks we need.
+    """
+    fmt = None
+
+    handle.seek(12)
+    while True:
+        chunk_header = handle.read(8)
+        if len(chunk_header) < 8:
+            return None
+
+        chunk_id, chunk_size = struct.unpack('<4sI', chunk_header)
+
+        if chunk_id == b'data':
+            break
+
+        if chunk_id == b'fmt ':
+            fmt = handle.read(chunk_size)
+        else:
+            handle.seek(chunk_size, 1)
+
+        # Chunks are word-aligned.
+        if chunk_size % 2:
+            handle.seek(1, 1)
+
+    if fmt is None:
+        return None
+
+    format_tag, channels, sample_rate, _, block_align, bit_depth = struct.unpack_from('<HHIIHH', fmt)
+
+    if format_tag == _WAVE_FORMAT_EXTENSIBLE:
+        # The real format tag is the first two bytes of the sub-format GUID.
+        (format_tag,) = struct.unpack_from('<H', fmt, 24)
+
+    return WavFormat(
+        format_tag=format_tag,
+        channels=channels,
+        sample_rate=sample_rate,
+        block_align=block_align,
+        bit_depth=bit_depth,
+        data_offset=handle.tell(),
+        data_size=chunk_size)
+
+
+def _probe_wav(handle):
+    wav_format = read_wav_format(handle)
+
+    if wav_format is None \
+            or wav_format.format_tag not in (WAVE_FORMAT_PCM, WAVE_FORMAT_IEEE_FLOAT) \
+            or wav_format.block_align == 0 \
+            or wav_format.sample_rate == 0:
+        return None
+
+    samples_count = wav_format.data_size // wav_format.block_align
+
+    return {
+        'kind_of_stream': 'Audio',
+        'sampling_rate': wav_format.sample_rate,
+        'channel_s': wav_format.channels,
+        'bit_depth': wav_format.bit_depth,
+        'samples_count': samples_count,
+        'duration': samples_count * 1000 // wav_format.sample_rate,
+    }
@@ -7,6 +7,10 @@ from typing import Iterable, Tuple
 from pymediainfo import MediaInfo
 from xml.etree.ElementTree import ParseError
 
+from camtasia.frame_stamp import MILLISECONDS, Timebase
+from camtasia.wrapper_cache import WrapperCache
+from .header_probe import probe_header
+
 
 class MediaType(Enum):
     # NB: These must match camtasia's codes for media types, i.e. as used in 'sourceBin/sourceTracks/type'.
@@ -26,7 +30,10 @@ class IntEncodedTime:
     time represented in frames.
     """
 
+    __slots__ = ('_encoded_time', '_seconds', '_milliseconds')
+
     def __init__(self, encoded_time):
+        self._encoded_time = encoded_time
         self._seconds, self._milliseconds = divmod(encoded_time, 1000)
 
     @property
@@ -38,16 +45,19 @@ class IntEncodedTime:
         return self._milliseconds
 
     def to_frame(self, frame_rate=30):
-        return int((self.seconds + self.milliseconds / 1000) * frame_rate)
+        "The (whole) frame containing this time at `frame_rate`."
+        return Timebase.between(MILLISECONDS, frame_rate).convert(self._encoded_time, rounding='floor')
 
     def __str__(self):
         return f'{self.seconds}s{self.milliseconds}ms'
 
     def __repr__(self):
-        return f'IntEncodedTime(encoded_time={self.seconds + self.milliseconds * 1000})'
+        return f'IntEncodedTime(encoded_time={self._encoded_time})'
 
 
 class Media:
+    __slots__ = ('_data',)
+
     def __init__(self, data):
         self._data = data
 
@@ -79,6 +89,24 @@ class Media:
 
         return tuple(map(IntEncodedTime, self._data['sourceTracks'][0]['range']))
 
+    @property
+    def edit_rate(self):
+        """The rate, in units per second, in which the media's range is measured.
+
+        This is 1000 (i.e. milliseconds) for media imported by this library, but may be e.g. the video frame rate or the
+        audio sample rate for media imported by Camtasia.
+        """
+        return self._data['sourceTracks'][0].get('editRate', MILLISECONDS)
+
+    def frame_range(self, frame_rate) -> Tuple[int, int]:
+        """The start and stop of the media as a `(start, stop)` tuple of whole frames at `frame_rate`.
+
+        Unlike `range`, this takes the media's `edit_rate` into account.
+        """
+        timebase = Timebase.between(self.edit_rate, frame_rate)
+        start, stop = self._data['sourceTracks'][0]['range']
+        return (timebase.convert(start, rounding='floor'), timebase.convert(stop, rounding='floor'))
+
     @property
     def last_modification(self):
         return datetime.datetime.strptime(
@@ -105,6 +133,7 @@ class MediaBin:
     def __init__(self, media_bin_data, root_path):
         self._data = media_bin_data
         self._root_path = root_path
+        self._wrappers = WrapperCache()
 
     def __len__(self):
         return len(self._data)
@@ -113,7 +142,7 @@ class MediaBin:
         """Get iterator of Media instances in this bin.
         """
         for record in self._data:
-            yield Media(record)
+            yield self._wrappers.get(record, Media)
 
     def __getitem__(self, media_id):
         """Get the media with the specified ID.
@@ -144,7 +173,7 @@ class MediaBin:
 
         for idx, record in enumerate(self._data):
             if record['id'] == media_id:
-                self._data.pop(idx)
+                self._wrappers.forget(self._data.pop(idx))
                 return
 
         raise KeyError('No media with id{}'.format(media_id))
@@ -166,10 +195,7 @@ class MediaBin:
             ValueError: `file_path` can't be parsed as a media file.
         """
 
-        try:
-            media_info = MediaInfo.parse(file_path)
-        except ParseError as e:
-            raise ValueError(f'Unable to parse media file {file_path}') from e
+        track = _probe_media(file_path)
 
         # Copy the file into the project's media directory
         timestamp = datetime.datetime.now()
@@ -181,8 +207,6 @@ class MediaBin:
         max_media_id = max((rec['id'] for rec in self._data), default=0)
         next_media_id = max_media_id + 1
 
-        # TODO: The actual media info always seems to be the second element. Look into this.
-        track = media_info.tracks[1].to_data()
         media_type = _get_media_type(track)
 
         to_json = {
@@ -199,6 +223,29 @@ class MediaBin:
         return self[next_media_id]
 
 
+def _probe_media(file_path):
+    """Get the track data describing the media in `file_path`.
+
+    Simple image and audio formats are handled by reading their headers directly. Everything else goes through
+    MediaInfo.
+
+    Raises:
+        FileNotFoundError: `file_path` does not exist.
+        ValueError: `file_path` can't be parsed as a media file.
+    """
+    track = probe_header(file_path)
+    if track is not None:
+        return track
+
+    try:
+        media_info = MediaInfo.parse(file_path)
+    except ParseError as e:
+        raise ValueError(f'Unable to parse media file {file_path}') from e
+
+    # TODO: The actual media info always seems to be the second element. Look into this.
+    return media_info.tracks[1].to_data()
+
+
 def _visual_track_to_json(track, media_id, source_file, timestamp):
     media_rect = (0, 0, track['width'], track['height'])
     return {
@@ -0,0 +1,397 @@
+"""Three-way merging of concurrent edits to a project.
+
+When several jobs edit copies of the same project, `merge()` combines their edits. It compares each edited version
+(ours and theirs) with the version they started from (the base) and keeps the changes made in either. Projects are
+merged structurally rather than as text:
+
+* Project and timeline settings are merged key by key.
+* Media bin entries are merged by ID.
+* Tracks are matched by position, and their attributes merged key by key. Tracks added in theirs are added after ours.
+* Clips (i.e. track media) are matched by ID and merged field by field, so e.g. one job can trim a clip while another
+  adds an effect to it. Nested clips are merged as part of the clip containing them.
+* Timeline markers and media markers are merged as sets of `(time, name)` pairs.
+
+Clips and media bin entries added in theirs are given new IDs if their IDs are already used in ours. A change is a
+conflict if ours and theirs change the same thing differently, or if a clip from theirs would overlap a clip in ours.
+Conflicts are resolved in favour of ours and reported.
+"""
+
+from collections import Counter
+import copy
+from dataclasses import dataclass
+
+from camtasia.diffing import MerkleHasher
+from camtasia.timeline.traversal import csml_tracks, walk
+
+_MISSING = object()
+
+
+@dataclass
+class Conflict:
+    """A change in theirs which could not be merged, because ours changed the same thing differently.
+
+    Attributes:
+        subject: What conflicted, e.g. 'clip 12 duration'.
+        description: What happened to it.
+    """
+    subject: str
+    description: str
+
+    def __str__(self):
+        return f'{self.subject}: {self.description}'
+
+
+def merge(base, ours, theirs):
+    """Merge the changes made in two versions of a project.
+
+    The changes in `theirs` are applied to `ours`, which is modified in place. Save it to keep the result.
+
+    Args:
+        base: The Project which `ours` and `theirs` were edited from.
+        ours: The Project into which to merge.
+        theirs: The Project whose changes to merge.
+
+    Returns: A list of Conflicts. Where there are conflicts, `ours` keeps its own version.
+
+    Raises:
+        ValueError: The projects have different edit rates.
+    """
+    conflicts = merge_data(base._data, ours._data, theirs._data)
+
+    # The merge replaces records, so wrappers cached by the project are stale.
+    ours._timeline = None
+    ours._media_bin = None
+
+    return conflicts
+
+
+def merge_data(base_data, our_data, their_data):
+    """Merge the changes made in two versions of a project dict. This is like `merge()` but takes raw project data.
+
+    Args:
+        base_data: The project dict which the others were edited from.
+        our_data: The project dict into which to merge. It is modified in place.
+        their_data: The project dict whose changes to merge.
+
+    Returns: A list of Conflicts.
+
+    Raises:
+        ValueError: The projects have different edit rates.
+    """
+    if not base_data.get('editRate') == our_data.get('editRate') == their_data.get('editRate'):
+        raise ValueError('Projects with different edit rates cannot be merged. Retime them first.')
+
+    return _Merger(base_data, our_data, their_data).merge()
+
+
+class _Merger:
+    def __init__(self, base_data, our_data, their_data):
+        self._base = base_data
+        self._ours = our_data
+        self._theirs = their_data
+        self._hash = MerkleHasher()
+        self._conflicts = []
+
+    def merge(self):
+        hashes = [self._hash(data) for data in (self._base, self._ours, self._theirs)]
+        if hashes[2] in hashes[:2]:
+            return []
+
+        top_level = self._merge_dict(self._base, self._ours, self._theirs, 'project',
+                                     skip=('sourceBin', 'timeline'))
+        bin_id_map = self._merge_media_bin()
+        self._merge_timeline(bin_id_map)
+
+        for key in list(self._ours):
+            if key not in top_level and key not in ('sourceBin', 'timeline'):
+                del self._ours[key]
+        self._ours.update(top_level)
+
+        return self._conflicts
+
+    def _conflict(self, subject, description):
+        self._conflicts.append(Conflict(subject, description))
+
+    def _merge_value(self, base, ours, theirs, subject):
+        "Three-way merge of a single value, treated as a whole."
+        base_hash, our_hash, their_hash = (None if value is _MISSING else self._hash(value)
+                                           for value in (base, ours, theirs))
+        if their_hash == base_hash or their_hash == our_hash:
+            return ours
+        if our_hash == base_hash:
+            return theirs
+        self._conflict(subject, 'changed in both versions')
+        return ours
+
+    def _merge_dict(self, base, ours, theirs, subject, skip=(), merge_nested=None):
+        """Three-way merge of a dict, key by key.
+
+        `merge_nested` optionally maps keys to functions `(base, ours, theirs, subject)` used to merge their values when
+        the key is present in all three dicts. Keys in `skip` are left out of the result.
+        """
+        merge_nested = merge_nested or {}
+        result = {}
+        keys = list(ours) + [key for key in theirs if key not in ours]
+        for key in keys:
+            if key in skip:
+                continue
+            values = (base.get(key, _MISSING), ours.get(key, _MISSING), theirs.get(key, _MISSING))
+            if key in merge_nested and _MISSING not in values:
+                value = merge_nested[key](*values, f'{subject} {key}')
+            else:
+                value = self._merge_value(*values, f'{subject} {key}')
+            if value is not _MISSING:
+                result[key] = value
+        return result
+
+    def _merge_records(self, base, ours, theirs, subject, merge_changed):
+        """Three-way merge of records which are present in all three versions or may have been added or deleted.
+
+        Returns: The merged record, or _MISSING if it is deleted.
+        """
+        if base is _MISSING:
+            return ours if ours is not _MISSING else theirs
+
+        if ours is _MISSING or theirs is _MISSING:
+            survivor = theirs if ours is _MISSING else ours
+            if survivor is _MISSING or self._hash(survivor) == self._hash(base):
+                return _MISSING
+            if ours is _MISSING:
+                self._conflict(subject, 'deleted in ours but changed in theirs; kept deleted')
+                return _MISSING
+            self._conflict(subject, 'changed in ours but deleted in theirs; kept')
+            return ours
+
+        base_hash, our_hash, their_hash = (self._hash(record) for record in (base, ours, theirs))
+        if their_hash == base_hash or their_hash == our_hash:
+            return ours
+        if our_hash == base_hash:
+            return theirs
+        return merge_changed(base, ours, theirs, subject)
+
+    def _merge_media_bin(self):
+        """Merge the media bins.
+
+        Returns: A dict mapping the IDs of media added in theirs to the IDs they have in the merged project, for those
+            whose IDs had to change.
+        """
+        base = {record['id']: record for record in self._base.get('sourceBin', [])}
+        ours = {record['id']: record for record in self._ours.get('sourceBin', [])}
+        theirs = {record['id']: record for record in self._theirs.get('sourceBin', [])}
+
+        next_id = max(list(ours) + list(theirs) + [0]) + 1
+        id_map = {}
+        merged = []
+        renumbered = []
+        for media_id in list(ours) + [media_id for media_id in theirs if media_id not in ours]:
+            base_record = base.get(media_id, _MISSING)
+            our_record = ours.get(media_id, _MISSING)
+            their_record = theirs.get(media_id, _MISSING)
+
+            if (base_record is _MISSING and our_record is not _MISSING and their_record is not _MISSING
+                    and self._hash(our_record) != self._hash(their_record)):
+                # Both added different media with the same ID. Keep ours, and give theirs a new ID.
+                id_map[media_id] = next_id
+                renumbered.append(dict(their_record, id=next_id))
+                next_id += 1
+                their_record = _MISSING
+
+            record = self._merge_records(base_record, our_record, their_record, f'media {media_id}',
+                                         self._merge_value)
+            if record is not _MISSING:
+                merged.append(record)
+
+        self._ours['sourceBin'] = merged + renumbered
+        return id_map
+
+    def _merge_timeline(self, bin_id_map):
+        base, ours, theirs = self._base['timeline'], self._ours['timeline'], self._theirs['timeline']
+
+        parameters = self._merge_dict(
+            base.get('parameters', {}), ours.get('parameters', {}), theirs.get('parameters', {}),
+            'timeline parameters', merge_nested={'toc': self._merge_toc})
+        settings = self._merge_dict(base, ours, theirs, 'timeline',
+                                    skip=('sceneTrack', 'trackAttributes', 'parameters'))
+
+        track_counts = [len(csml_tracks(data)) for data in (base, ours, theirs)]
+        if min(track_counts[1:]) < track_counts[0]:
+            # Tracks are matched by position, so removing tracks changes which tracks match.
+            if self._hash(csml_tracks(theirs)) != self._hash(csml_tracks(base)):
+                self._conflict('tracks', 'tracks were removed; kept the tracks of ours')
+        else:
+            self._merge_tracks(base, ours, theirs, bin_id_map)
+
+        for key in list(ours):
+            if key not in settings and key not in ('sceneTrack', 'trackAttributes', 'parameters'):
+                del ours[key]
+        ours.update(settings)
+        if parameters or 'parameters' in ours:
+            ours['parameters'] = parameters
+
+    def _merge_tracks(self, base, ours, theirs, bin_id_map):
+        base_count = len(csml_tracks(base))
+        our_count = len(csml_tracks(ours))
+
+        def merged_position(their_position):
+            "The position in the merged tracks of a track of theirs."
+            if their_position < base_count:
+                return their_position
+            return our_count + their_position - base_count
+
+        # Track attributes.
+        attributes = ours['trackAttributes']
+        for position, their_attributes in enumerate(theirs['trackAttributes']):
+            if position < base_count:
+                attributes[position] = self._merge_dict(
+                    base['trackAttributes'][position], attributes[position], their_attributes, f'track {position}')
+            else:
+                attributes.append(copy.deepcopy(their_attributes))
+
+        tracks = csml_tracks(ours)
+        for their_track in csml_tracks(theirs)[base_count:]:
+            tracks.append(dict(copy.deepcopy(their_track), medias=[]))
+        for position, track in enumerate(tracks):
+            track['trackIndex'] = position
+
+        # Clips.
+        base_clips = _top_level_clips(base)
+        our_clips = _top_level_clips(ours)
+        their_clips = _top_level_clips(theirs)
+
+        # IDs in use in the merged project, and IDs which must not be given to renumbered clips.
+        taken = {record['id'] for _, record in walk(tracks) if 'id' in record}
+        taken.add(ours.get('id', 0))
+        reserved = taken | {record['id'] for _, record in walk(csml_tracks(theirs)) if 'id' in record}
+        next_id = max(reserved) + 1
+
+        # Where a clip from theirs would overlap, use this record instead (None meaning to leave the clip out).
+        fallbacks = {}
+        merged_medias = [[] for _ in tracks]
+
+        for clip_id in list(our_clips) + [clip_id for clip_id in their_clips if clip_id not in our_clips]:
+            subject = f'clip {clip_id}'
+            base_position, base_record = base_clips.get(clip_id, (None, _MISSING))
+            our_position, our_record = our_clips.get(clip_id, (None, _MISSING))
+            their_position, their_record = their_clips.get(clip_id, (None, _MISSING))
+
+            if their_record is not _MISSING:
+                their_record = _remap_sources(their_record, bin_id_map)
+
+            if base_record is _MISSING and their_record is not _MISSING:
+                if our_record is not _MISSING:
+                    merged_medias[our_position].append(our_record)
+                    if self._hash(our_record) == self._hash(their_record):
+                        continue
+                    # Both added different clips with the same ID. Keep ours, and give theirs a new ID.
+                next_id = _renumber(their_record, taken, reserved, next_id)
+                merged_medias[merged_position(their_position)].append(their_record)
+                fallbacks[id(their_record)] = None
+                continue
+
+            record = self._merge_records(base_record, our_record, their_record, subject, self._merge_clip)
+            if record is _MISSING:
+                continue
+
+            position = our_position
+            if their_position is not None and base_position is not None and our_position == base_position:
+                position = merged_position(their_position)
+            merged_medias[position].append(record)
+            if record is not our_record:
+                fallbacks[id(record)] = (our_position, our_record) if our_record is not _MISSING else None
+
+        for track, medias in zip(tracks, merged_medias):
+            track['medias'] = medias
+
+        self._resolve_overlaps(tracks, fallbacks)
+
+    def _merge_clip(self, base, ours, theirs, subject):
+        return self._merge_dict(base, ours, theirs, subject, merge_nested={
+            'parameters': lambda b, o, t, s: self._merge_dict(b, o, t, s, merge_nested={'toc': self._merge_toc}),
+            'metadata': self._merge_dict,
+        })
+
+    def _merge_toc(self, base, ours, theirs, subject):
+        "Merge the 'toc' parameters holding markers, treating markers as a multiset of `(time, name)` pairs."
+        def marker(keyframe):
+            return keyframe.get('time'), keyframe.get('value')
+
+        base_markers = Counter(marker(keyframe) for keyframe in base.get('keyframes', []))
+        our_markers = Counter(marker(keyframe) for keyframe in ours.get('keyframes', []))
+        their_markers = Counter(marker(keyframe) for keyframe in theirs.get('keyframes', []))
+
+        # Markers which ours added too are not added twice.
+        removed = base_markers - their_markers
+        added = (their_markers - base_markers) - (our_markers - base_markers)
+
+        keyframes = []
+        for keyframe in ours.get('keyframes', []):
+            if removed[marker(keyframe)] > 0:
+                removed[marker(keyframe)] -= 1
+            else:
+                keyframes.append(keyframe)
+        for keyframe in theirs.get('keyframes', []):
+            if added[marker(keyframe)] > 0:
+                added[marker(keyframe)] -= 1
+                keyframes.append(copy.deepcopy(keyframe))
+
+        keyframes.sort(key=lambda keyframe: keyframe.get('time', 0))
+        toc = self._merge_dict(base, ours, theirs, subject, skip=('keyframes',))
+        toc['keyframes'] = keyframes
+        return toc
+
+    def _resolve_overlaps(self, tracks, fallbacks):
+        "Fall back to ours' version of clips from theirs which overlap other clips."
+        pending = list(range(len(tracks)))
+        while pending:
+            position = pending.pop()
+            medias = sorted(tracks[position]['medias'], key=lambda record: record['start'])
+            tracks[position]['medias'] = medias
+            for previous, record in zip(medias, medias[1:]):
+                if record['start'] >= previous['start'] + previous['duration']:
+                    continue
+                culprit = record if id(record) in fallbacks else previous
+                if id(culprit) not in fallbacks:
+                    continue
+                fallback = fallbacks.pop(id(culprit))
+                medias.remove(culprit)
+                self._conflict(f"clip {culprit['id']}", 'overlaps another clip in the merged project; kept ours')
+                if fallback is not None:
+                    fallback_position, fallback_record = fallback
+                    tracks[fallback_position]['medias'].append(fallback_record)
+                    pending.append(fallback_position)
+                pending.append(position)
+                break
+
+
+def _top_level_clips(timeline_data):
+    "Map the IDs of clips directly on tracks to `(track position, record)` tuples."
+    return {record['id']: (position, record)
+            for position, track in enumerate(csml_tracks(timeline_data))
+            for record in track['medias']}
+
+
+def _remap_sources(record, bin_id_map):
+    "Copy a clip record, pointing it (and its nested clips) at the new IDs of media bin entries."
+    record = copy.deepcopy(record)
+    if bin_id_map:
+        for _, nested in walk([{'medias': [record]}]):
+            if nested.get('src') in bin_id_map:
+                nested['src'] = bin_id_map[nested['src']]
+    return record
+
+
+def _renumber(record, taken, reserved, next_id):
+    """Give a clip record, and its nested clips, IDs which are not already taken.
+
+    Returns: The next candidate ID.
+    """
+    for _, nested in walk([{'medias': [record]}]):
+        if 'id' not in nested:
+            continue
+        if nested['id'] in taken:
+            while next_id in reserved:
+                next_id += 1
+            nested['id'] = next_id
+            reserved.add(next_id)
+        taken.add(nested['id'])
+    return next_id
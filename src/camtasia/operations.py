@@ -5,6 +5,28 @@ a track or removing adding new media to the media bin. Some operations, though,
 and are thus more complicated. This module provides some of these more complex operations as functions.
 """
 
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+import copy
+import datetime
+from fractions import Fraction
+import hashlib
+import json
+import math
+import os
+from pathlib import Path
+import re
+import shutil
+
+from camtasia.audio import WavReader
+from camtasia.audio.silence import detect_silence
+from camtasia.frame_stamp import Timebase
+from camtasia.media_bin import MediaType
+from camtasia.project import new_project
+from camtasia.timeline.track import _piece_record
+from camtasia.timeline.track_media import EffectTemplate
+from camtasia.timeline.traversal import csml_tracks, walk
+
 
 def add_media_to_track(proj, track_index, media_id, start, duration=None, effects=None):
     """Add a track reference to media-bin media.
@@ -48,3 +70,519 @@ def remove_media(project, media_id, clear_tracks=False):
 
     del project.media_bin[media_id]
 
+
+def apply_effect(project, effect, where=None, replace=False):
+    """Apply an effect to many medias across all tracks.
+
+    The effect is serialized only once, however many medias it is applied to.
+
+    Args:
+        project: The Camtasia project.
+        effect: The Effect to apply.
+        where: An optional predicate taking a `(Track, TrackMedia)` pair. The effect is applied only to medias for which
+            this returns true. By default the effect is applied to all medias.
+        replace: If true, an existing effect with the same name is replaced rather than a new one added.
+
+    Returns: The number of medias the effect was applied to.
+    """
+    template = EffectTemplate(effect)
+
+    count = 0
+    for track in project.timeline.tracks:
+        if where is None:
+            track_where = None
+        else:
+            def track_where(media, track=track):
+                return where(track, media)
+
+        count += track.medias.apply_effect(template, where=track_where, replace=replace)
+    return count
+
+
+def mark_silences(project, track_index=None, name='silence', **detect_options):
+    """Add media markers at the start of each silence in the audio on the timeline.
+
+    Only WAV audio is analysed. Clips of other audio, e.g. MP3, are skipped.
+
+    Args:
+        project: The Camtasia project.
+        track_index: The index of the track to process. By default all tracks are processed.
+        name: The name to give the markers.
+        detect_options: Options for `camtasia.audio.silence.detect_silence()`, e.g. `threshold_db`.
+
+    Returns: The number of markers added.
+
+    Raises:
+        KeyError: The specified track can't be found.
+    """
+    count = 0
+    for _, media, silences in _timeline_silences(project, track_index, detect_options):
+        count += len(media.markers.add_many(((name, silence_start) for silence_start, _ in silences),
+                                            duplicates_okay=True))
+    return count
+
+
+def cut_silences(project, track_index=None, **detect_options):
+    """Cut the silences out of the audio on the timeline.
+
+    Each audio clip containing silence is split into the pieces between the silences. The pieces stay where they are on
+    the timeline. Only WAV audio is analysed. Clips of other audio, e.g. MP3, are skipped.
+
+    Args:
+        project: The Camtasia project.
+        track_index: The index of the track to process. By default all tracks are processed.
+        detect_options: Options for `camtasia.audio.silence.detect_silence()`, e.g. `threshold_db`.
+
+    Returns: The number of silences cut.
+
+    Raises:
+        KeyError: The specified track can't be found.
+    """
+    # Collect all the cuts before making any, since cutting changes the track's medias.
+    cuts = [(track, media.id, silences)
+            for track, media, silences in _timeline_silences(project, track_index, detect_options)]
+
+    for track, media_id, silences in cuts:
+        track.medias.cut(media_id, silences)
+
+    return sum(len(silences) for _, _, silences in cuts)
+
+
+def _timeline_silences(project, track_index, detect_options):
+    """Find the silences in the audio clips on the timeline.
+
+    Each bin media is analysed at most once, however many clips use it. Only WAV audio is analysed, so clips of other
+    audio are skipped.
+
+    Returns: An iterable of `(Track, TrackMedia, silences)` tuples, where `silences` is a non-empty list of
+        `(start, stop)` timeline frame ranges within the TrackMedia.
+    """
+    if track_index is None:
+        tracks = list(project.timeline.tracks)
+    else:
+        tracks = [project.timeline.tracks[track_index]]
+
+    bin_medias = {media.id: media for media in project.media_bin}
+    bin_silences = {}
+
+    for track in tracks:
+        for media in track.medias:
+            bin_media = bin_medias.get(media.source)
+            if bin_media is None or bin_media.type != MediaType.Audio:
+                continue
+
+            if bin_media.id not in bin_silences:
+                try:
+                    reader = WavReader(project.file_path / bin_media.source)
+                except ValueError:
+                    # Only WAV audio can be analysed. Other audio, e.g. MP3, is skipped.
+                    bin_silences[bin_media.id] = None
+                else:
+                    bin_silences[bin_media.id] = (reader.sample_rate, list(detect_silence(reader, **detect_options)))
+
+            if bin_silences[bin_media.id] is None:
+                continue
+            sample_rate, silences = bin_silences[bin_media.id]
+            visible = _visible_ranges(media, silences, sample_rate, project.edit_rate)
+            if visible:
+                yield track, media, visible
+
+
+def _visible_ranges(media, sample_ranges, sample_rate, edit_rate):
+    """Map ranges of sample frames in a TrackMedia's underlying media to the timeline.
+
+    Ranges are shrunk to whole frames, and clipped to the visible part of the media. The media's scalar (the number of
+    timeline frames per media frame) is taken into account, as by `Track.medias.cut()`.
+    """
+    start = media.start
+    stop = media.start + media.duration
+    media_start = Fraction(media.media_start)
+    scalar = Fraction(str(media._data.get('scalar', 1)))
+    frames_per_sample = Fraction(edit_rate, sample_rate)
+
+    def timeline_frame(sample):
+        return start + (sample * frames_per_sample - media_start) * scalar
+
+    ranges = []
+    for sample_start, sample_stop in sample_ranges:
+        range_start = max(start, math.ceil(timeline_frame(sample_start)))
+        range_stop = min(stop, math.floor(timeline_frame(sample_stop)))
+        if range_start < range_stop:
+            ranges.append((range_start, range_stop))
+    return ranges
+
+
+# Fields of track media records holding times, paired with the fields (if any) holding the matching durations.
+_RECORD_TIMES = (('start', 'duration'), ('mediaStart', 'mediaDuration'), ('minMediaStart', None),
+                 ('trimStartSum', None))
+
+
+def retime(project, new_edit_rate):
+    """Change the edit rate of a project, converting all times in the timeline.
+
+    This converts clip starts and durations (including those of clips nested in groups and stitched media), timeline and
+    media marker times, parameter keyframe times, and animation track times. All times are gathered in one pass and
+    converted together, rounding to the nearest frame. Durations are recomputed from converted start and end times
+    rather than converted separately, so clips which abut before conversion still abut afterwards.
+
+    Args:
+        project: The Camtasia project.
+        new_edit_rate: The new edit rate, e.g. 60.
+    """
+    times = []
+    # (container, key, index, start index) tuples. If the start index is not None, the value to store is the duration
+    # from the time at the start index to the time at the index.
+    setters = []
+
+    def add_time(container, key):
+        times.append(container[key])
+        setters.append((container, key, len(times) - 1, None))
+        return len(times) - 1
+
+    def add_duration(container, key, start_index, end_time):
+        times.append(end_time)
+        setters.append((container, key, len(times) - 1, start_index))
+
+    def add_keyframes(parameters):
+        for parameter in parameters.values():
+            if not isinstance(parameter, dict):
+                continue
+            for keyframe in parameter.get('keyframes', ()):
+                start_index = add_time(keyframe, 'time')
+                if 'endTime' in keyframe:
+                    add_time(keyframe, 'endTime')
+                    if 'duration' in keyframe:
+                        add_duration(keyframe, 'duration', start_index, keyframe['endTime'])
+                elif 'duration' in keyframe:
+                    add_duration(keyframe, 'duration', start_index, keyframe['time'] + keyframe['duration'])
+
+    timeline_data = project.timeline._data
+    add_keyframes(timeline_data.get('parameters', {}))
+
+    for _, record in walk(csml_tracks(timeline_data)):
+        for time_key, duration_key in _RECORD_TIMES:
+            if time_key not in record:
+                continue
+            start_index = add_time(record, time_key)
+            if duration_key in record:
+                add_duration(record, duration_key, start_index, record[time_key] + record[duration_key])
+
+        add_keyframes(record.get('parameters', {}))
+
+        for segments in record.get('animationTracks', {}).values():
+            for segment in segments:
+                if 'range' not in segment:
+                    continue
+                start_index = add_time(segment['range'], 0)
+                add_time(segment['range'], 1)
+                if 'endTime' in segment:
+                    add_time(segment, 'endTime')
+                if 'duration' in segment:
+                    add_duration(segment, 'duration', start_index, segment['range'][0] + segment['duration'])
+
+    # Times are normally whole frames, which are converted together. Any others are converted exactly, one by one.
+    timebase = Timebase.between(project.edit_rate, new_edit_rate)
+    fractional = {index: timebase.convert(Fraction(time))
+                  for index, time in enumerate(times) if not isinstance(time, int)}
+    converted = timebase.convert_array([0 if index in fractional else time
+                                        for index, time in enumerate(times)]).tolist()
+    for index, time in fractional.items():
+        converted[index] = time
+
+    for container, key, index, start_index in setters:
+        if start_index is None:
+            container[key] = converted[index]
+        else:
+            container[key] = converted[index] - converted[start_index]
+
+    project._data['editRate'] = new_edit_rate
+    project.timeline.mark_changed()
+
+
+def concatenate(projects, into, copy_media=True, max_workers=None):
+    """Join projects end to end, appending them to the timeline of another project.
+
+    Each project's tracks are appended to the tracks in the same position in `into`, starting where the previous
+    project ended, and its timeline markers move with it. Tracks are added to `into` as needed. Media bin entries are
+    merged, so that media used by several projects (i.e. the same source file, or copies of it) is in the media bin
+    only once. Media bin and clip IDs (including those of nested clips) are renumbered so that they are unique.
+
+    This takes time linear in the total number of clips.
+
+    Args:
+        projects: An iterable of the Projects to append. They are not modified.
+        into: The Project to append to. Save it to keep the result.
+        copy_media: Whether to copy the media files into `into`'s media directory. If false, the media bin refers to
+            the files where they are, by absolute path.
+        max_workers: The maximum number of threads with which to copy media files. Defaults to the executor's default.
+
+    Returns: A list of the frames on `into`'s timeline at which each project starts.
+
+    Raises:
+        ValueError: A project has a different edit rate from `into`.
+        OSError: Error copying media files.
+    """
+    projects = list(projects)
+    for project in projects:
+        if project.edit_rate != into.edit_rate:
+            raise ValueError(f'{project} has edit rate {project.edit_rate} but {into} has edit rate '
+                             f'{into.edit_rate}. Retime it first.')
+
+    # Plan the media bin, and copy media, before changing anything else.
+    source_bin = into._data.setdefault('sourceBin', [])
+    bin_files = _BinFiles()
+    for record in source_bin:
+        bin_files.add((into.file_path / record['src']).resolve(), record['id'])
+    next_bin_id = max((record['id'] for record in source_bin), default=0) + 1
+    bin_id_maps = []
+    new_records = []
+    copies = []
+    media_dir = Path('media') / str(datetime.datetime.now().timestamp())
+
+    for index, project in enumerate(projects):
+        bin_id_map = {}
+        for record in project._data.get('sourceBin', []):
+            source_file = (project.file_path / record['src']).resolve()
+            bin_id = bin_files.find(source_file)
+            if bin_id is None:
+                new_record = copy.deepcopy(record)
+                new_record['id'] = bin_id = next_bin_id
+                next_bin_id += 1
+                if copy_media:
+                    dest = media_dir / f'{index}-{record["id"]}' / source_file.name
+                    copies.append((source_file, into.file_path / dest))
+                    new_record['src'] = dest.as_posix()
+                else:
+                    new_record['src'] = str(source_file)
+                new_records.append(new_record)
+            bin_files.add(source_file, bin_id)
+            bin_id_map[record['id']] = bin_id
+        bin_id_maps.append(bin_id_map)
+
+    if copies:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            list(executor.map(_copy_media_file, *zip(*copies)))
+    source_bin.extend(new_records)
+
+    timeline = into.timeline
+    into_tracks = csml_tracks(timeline._data)
+    offset = timeline.end_frame
+    starts = []
+
+    for project, bin_id_map in zip(projects, bin_id_maps):
+        starts.append(offset)
+        project_timeline = project.timeline
+        tracks = copy.deepcopy(csml_tracks(project_timeline._data))
+
+        records = [record for _, record in walk(tracks)]
+        next_id = timeline._media_index.allocate(len(records))
+        for record in records:
+            if 'id' in record:
+                record['id'] = next_id
+                next_id += 1
+            if record.get('src') in bin_id_map:
+                record['src'] = bin_id_map[record['src']]
+
+        for position, track in enumerate(tracks):
+            if position == len(into_tracks):
+                timeline._data['trackAttributes'].append(
+                    copy.deepcopy(project_timeline._data['trackAttributes'][position]))
+                into_tracks.append(dict(track, trackIndex=position, medias=[]))
+            for record in track['medias']:
+                record['start'] += offset
+            into_tracks[position]['medias'].extend(track['medias'])
+
+        # Marker keyframes are copied whole, so that ranged markers keep their spans.
+        marker_keyframes = project_timeline.markers._toc_keyframes()
+        if marker_keyframes:
+            timeline.markers._toc_keyframes(create=True).extend(
+                dict(keyframe, time=keyframe['time'] + offset,
+                     endTime=keyframe.get('endTime', keyframe['time']) + offset)
+                for keyframe in marker_keyframes)
+        offset += project_timeline.end_frame
+
+    timeline.markers.reindex()
+    timeline.mark_changed()
+    return starts
+
+
+class _BinFiles:
+    """The media files in a media bin, for finding the entry for a file by path or by content.
+
+    Files are compared by content only when they have the same size, and each file is hashed at most once.
+    """
+
+    def __init__(self):
+        self._ids = {}
+        self._by_size = {}
+        self._digests = {}
+
+    @staticmethod
+    def _size(path):
+        try:
+            return path.stat().st_size
+        except OSError:
+            return None
+
+    def _digest(self, path):
+        digest = self._digests.get(path)
+        if digest is None:
+            hasher = hashlib.blake2b()
+            with path.open('rb') as handle:
+                for chunk in iter(lambda: handle.read(1 << 20), b''):
+                    hasher.update(chunk)
+            digest = self._digests[path] = hasher.digest()
+        return digest
+
+    def add(self, path, bin_id):
+        """Record that a media bin entry refers to a file.
+
+        Args:
+            path: The resolved path of the file.
+            bin_id: The ID of the media bin entry.
+        """
+        if path in self._ids:
+            return
+        self._ids[path] = bin_id
+        size = self._size(path)
+        if size is not None:
+            self._by_size.setdefault(size, []).append(path)
+
+    def find(self, path):
+        """Find the media bin entry for a file, or for another file with the same content.
+
+        Args:
+            path: The resolved path of the file.
+
+        Returns: The ID of the media bin entry, or None if there is none.
+        """
+        bin_id = self._ids.get(path)
+        if bin_id is not None:
+            return bin_id
+        others = self._by_size.get(self._size(path), ())
+        if others:
+            digest = self._digest(path)
+            for other in others:
+                if self._digest(other) == digest:
+                    return self._ids[other]
+        return None
+
+
+def _copy_media_file(source, dest):
+    dest.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy2(source, dest)
+
+
+def split_at_markers(project, out_dir, max_workers=None):
+    """Split a project into several projects, cutting its timeline at the timeline markers.
+
+    Each segment of the timeline between markers becomes a new project, named after the marker starting it, with times
+    rebased so that the segment starts at frame 0. Clips which cross a marker are trimmed to the segment, keeping the
+    media markers in view. Each project's media bin holds only the media which it uses. Media files are hardlinked into
+    the new projects rather than copied, where the file system allows it.
+
+    The projects are written in parallel.
+
+    Args:
+        project: The Project to split. It is not modified.
+        out_dir: The directory in which to create the new projects.
+        max_workers: The maximum number of threads with which to write projects. Defaults to the executor's default.
+
+    Returns: A list of the paths of the new projects, in timeline order.
+
+    Raises:
+        FileExistsError: A project to be created already exists.
+        OSError: Error writing projects or linking media files.
+    """
+    timeline = project.timeline
+    end = timeline.end_frame
+
+    # Segment boundaries, and the marker (if any) starting each segment.
+    names = {}
+    for marker in timeline.markers:
+        if 0 <= marker.time < end:
+            names.setdefault(marker.time, marker.name)
+    boundaries = sorted(names.keys() | {0})
+    stops = boundaries[1:] + [end]
+
+    tracks = csml_tracks(timeline._data)
+    segment_medias = [[[] for _ in tracks] for _ in boundaries]
+    for position, track in enumerate(tracks):
+        for record in track['medias']:
+            start = record['start']
+            stop = start + record['duration']
+            first = bisect_right(boundaries, start) - 1
+            last = bisect_left(boundaries, stop) - 1
+            for index in range(first, last + 1):
+                segment_start, segment_stop = boundaries[index], stops[index]
+                if index == first == last:
+                    piece = copy.deepcopy(record)
+                else:
+                    piece = _piece_record(record, record['id'], max(start, segment_start), min(stop, segment_stop),
+                                          keep_markers_before=index == first, keep_markers_after=index == last)
+                piece['start'] -= segment_start
+                segment_medias[index][position].append(piece)
+
+    skeleton = _skeleton(project._data)
+    source_bin = {record['id']: record for record in project._data.get('sourceBin', [])}
+    out_dir = Path(out_dir)
+    jobs = []
+
+    for index, (segment_start, segment_stop) in enumerate(zip(boundaries, stops)):
+        data = copy.deepcopy(skeleton)
+        segment_tracks = csml_tracks(data['timeline'])
+        for track, medias in zip(segment_tracks, segment_medias[index]):
+            track['medias'] = medias
+
+        used = {record['src'] for _, record in walk(segment_tracks) if 'src' in record}
+        data['sourceBin'] = [copy.deepcopy(source_bin[media_id]) for media_id in sorted(used) if media_id in source_bin]
+
+        keyframes = data['timeline'].get('parameters', {}).get('toc', {}).get('keyframes')
+        if keyframes is not None:
+            data['timeline']['parameters']['toc']['keyframes'] = [
+                dict(keyframe, time=keyframe['time'] - segment_start,
+                     endTime=keyframe.get('endTime', keyframe['time']) - segment_start)
+                for keyframe in timeline._data['parameters']['toc']['keyframes']
+                if segment_start <= keyframe['time'] < segment_stop]
+
+        name = _file_name(names[segment_start]) if segment_start in names else ''
+        path = out_dir / (f'{index:03}-{name}.cmproj' if name else f'{index:03}.cmproj')
+        jobs.append((path, data))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_write_segment, project, path, data) for path, data in jobs]
+        return [future.result() for future in futures]
+
+
+def _skeleton(project_data):
+    "Deep copy project data, leaving out the media bin and the medias on the tracks."
+    # Seeding deepcopy's memo makes it use new empty lists in place of these, rather than copying them.
+    memo = {id(track['medias']): [] for track in csml_tracks(project_data['timeline'])}
+    if 'sourceBin' in project_data:
+        memo[id(project_data['sourceBin'])] = []
+    return copy.deepcopy(project_data, memo)
+
+
+def _file_name(name):
+    "Make a marker name safe to use in a file name."
+    return re.sub(r'[^\w.-]+', '-', name).strip('-.')
+
+
+def _write_segment(project, path, data):
+    new_project(path)
+    with (path / 'project.tscproj').open(mode='wt', encoding=project._encoding) as handle:
+        json.dump(data, handle)
+
+    for record in data['sourceBin']:
+        if Path(record['src']).is_absolute():
+            continue
+        source = project.file_path / record['src']
+        dest = path / record['src']
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        try:
+            os.link(source, dest)
+        except OSError:
+            # E.g. the output is on another file system.
+            shutil.copy2(source, dest)
+
+    return path
@@ -0,0 +1,177 @@
+"""Offline previews of visual effects.
+
+Camtasia isn't always available where projects are built, so this module approximates the effect of a
+`ChromaKeyEffect` on still frames. This lets you check tolerance, softness, defringe, compensation and key colour
+settings against real footage before handing a project to Camtasia.
+
+Camtasia doesn't document its keying algorithm, so previews are close but not pixel-identical:
+
+* Pixels are compared with the key colour in the CbCr (chroma) plane, so keying is insensitive to brightness.
+* Pixels within `tolerance` of the key colour are fully transparent. Alpha then ramps up linearly over `softness`.
+* `defringe` removes key-colour spill from partially transparent edge pixels. Negative values are treated as zero.
+* `compensation` removes key-colour spill from all remaining pixels.
+* `inverted` inverts the resulting matte.
+
+This module needs Pillow for image I/O (`pip install camtasia[preview]`).
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+from PIL import Image
+
+# BT.601 RGB to CbCr coefficients.
+_RGB_TO_CBCR = np.array([
+    [-0.168736, 0.5],
+    [-0.331264, -0.418688],
+    [0.5, -0.081312],
+], dtype=np.float32)
+
+# The largest possible distance between two colours in the CbCr plane, used to scale distances to [0, 1].
+_MAX_CHROMA_DISTANCE = np.float32(np.sqrt(2.0))
+
+# The colours of the checkerboard drawn behind transparent areas when no background is given.
+_CHECKER_COLORS = (np.float32(0.6), np.float32(0.8))
+_CHECKER_SIZE = 16
+
+
+def chroma_key(image, effect):
+    """Apply a ChromaKeyEffect to an image.
+
+    Args:
+        image: A float array of shape `(height, width, 3)` with RGB values in [0, 1].
+        effect: The ChromaKeyEffect to apply.
+
+    Returns: A float32 array of shape `(height, width, 4)` of spill-suppressed RGB values and alpha.
+    """
+    rgb = np.asarray(image, dtype=np.float32)[..., :3]
+
+    key = np.array([effect.red, effect.green, effect.blue], dtype=np.float32)
+    key_chroma = key @ _RGB_TO_CBCR
+    chroma = rgb @ _RGB_TO_CBCR
+
+    distance = np.linalg.norm(chroma - key_chroma, axis=-1) / _MAX_CHROMA_DISTANCE
+
+    if effect.softness > 0:
+        alpha = np.clip((distance - effect.tolerance) / effect.softness, 0.0, 1.0)
+    else:
+        alpha = (distance > effect.tolerance).astype(np.float32)
+
+    # Spill is the component of each pixel's chroma in the direction of the key colour's chroma.
+    key_norm = np.linalg.norm(key_chroma)
+    if key_norm > 0:
+        key_direction = key_chroma / key_norm
+        spill = np.maximum(chroma @ key_direction, 0.0)
+
+        edge = 1.0 - alpha
+        removal = np.clip(effect.compensation + max(effect.defringe, 0.0) * edge, 0.0, 1.0) * spill
+
+        # Subtract the spill in chroma space and map the change back to RGB by least squares.
+        chroma_change = removal[..., np.newaxis] * key_direction
+        rgb = np.clip(rgb - chroma_change @ np.linalg.pinv(_RGB_TO_CBCR), 0.0, 1.0)
+
+    if effect.inverted:
+        alpha = 1.0 - alpha
+
+    return np.concatenate((rgb, alpha[..., np.newaxis]), axis=-1).astype(np.float32)
+
+
+def composite(keyed, background=None):
+    """Composite a keyed image over a background.
+
+    Args:
+        keyed: A float array of shape `(height, width, 4)` as returned by `chroma_key()`.
+        background: A float array of shape `(height, width, 3)`, or an `(r, g, b)` tuple of values in [0, 1]. By
+            default a grey checkerboard is used.
+
+    Returns: A float32 array of shape `(height, width, 3)`.
+    """
+    height, width = keyed.shape[:2]
+
+    if background is None:
+        rows = (np.arange(height) // _CHECKER_SIZE)[:, np.newaxis]
+        columns = (np.arange(width) // _CHECKER_SIZE)[np.newaxis, :]
+        checks = np.where((rows + columns) % 2 == 0, *_CHECKER_COLORS)
+        background = np.repeat(checks[..., np.newaxis], 3, axis=-1)
+    else:
+        background = np.broadcast_to(np.asarray(background, dtype=np.float32), (height, width, 3))
+
+    alpha = keyed[..., 3:]
+    return (keyed[..., :3] * alpha + background * (1.0 - alpha)).astype(np.float32)
+
+
+def render_preview(effect, source_path, dest_path, background=None):
+    """Render a preview of an effect applied to an image file.
+
+    Args:
+        effect: The ChromaKeyEffect to apply.
+        source_path: The image to apply the effect to.
+        dest_path: Where to write the composited result. The format is determined by the file extension.
+        background: As for `composite()`.
+
+    Returns: The `dest_path`.
+
+    Raises:
+        OSError: The image can't be read or written.
+    """
+    with Image.open(source_path) as source:
+        image = np.asarray(source.convert('RGB'), dtype=np.float32) / 255
+
+    result = composite(chroma_key(image, effect), background)
+
+    Image.fromarray(np.round(result * 255).astype(np.uint8)).save(dest_path)
+    return dest_path
+
+
+def preview_media(project, media_id, effect, dest_path, background=None):
+    """Render a preview of an effect applied to an image in a project's media bin.
+
+    Args:
+        project: The Project containing the media.
+        media_id: The ID of the image media in the media bin.
+        effect: The ChromaKeyEffect to apply.
+        dest_path: Where to write the composited result.
+        background: As for `composite()`.
+
+    Returns: The `dest_path`.
+
+    Raises:
+        KeyError: There is no media with the specified ID.
+        OSError: The image can't be read or written.
+    """
+    media = project.media_bin[media_id]
+    return render_preview(effect, project.file_path / media.source, dest_path, background)
+
+
+def render_previews(effect, source_dir, dest_dir, pattern='*.png', background=None, max_workers=None):
+    """Render previews of an effect applied to a directory of frames, in parallel.
+
+    Each frame is written to `dest_dir` under the same name as its source.
+
+    Args:
+        effect: The ChromaKeyEffect to apply.
+        source_dir: The directory containing the frames.
+        dest_dir: The directory into which to write previews. It is created if necessary.
+        pattern: A glob pattern selecting the frames in `source_dir`.
+        background: As for `composite()`.
+        max_workers: The maximum number of worker processes. Defaults to the number of processors.
+
+    Returns: A list of the paths of the written previews, in sorted order of the frames.
+    """
+    dest_dir = Path(dest_dir)
+    dest_dir.mkdir(parents=True, exist_ok=True)
+
+    sources = sorted(Path(source_dir).glob(pattern))
+    dests = [dest_dir / source.name for source in sources]
+
+    if not sources:
+        return []
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(
+            render_preview,
+            [effect] * len(sources),
+            sources,
+            dests,
+            [background] * len(sources)))
@@ -8,9 +8,11 @@ import pkg_resources
 import shutil
 import os
 
+from camtasia import compact as _compact
 from camtasia.authoring_client import AuthoringClient
 from camtasia.media_bin import MediaBin
 from camtasia.timeline import Timeline
+from camtasia.validation import ValidationError, Validator
 
 
 class Project:
@@ -19,22 +21,65 @@ class Project:
     Args:
         file_path: Path to the Camtasia project (i.e. a cmproj directory). May be relative or absolute.
         encoding: Encoding of the project file.
+        compact: Whether to load the project data in a compact form, which uses much less memory for large projects.
+            See `camtasia.compact`.
     """
 
-    def __init__(self, file_path: Path, encoding=None):
+    def __init__(self, file_path: Path, encoding=None, compact=False):
         self._file_path = file_path
-        self._data = json.loads(self._project_file.read_text(encoding=encoding))
+        text = self._project_file.read_text(encoding=encoding)
+        if compact:
+            self._data, self._compact_stats = _compact.loads(text)
+        else:
+            self._data, self._compact_stats = json.loads(text), None
         self._encoding = encoding
+        self._timeline = None
+        self._media_bin = None
+        self._validator = None
 
     @property
     def file_path(self) -> Path:
         "The full path to the Camtasia project."
         return self._file_path
 
-    def save(self):
+    def save(self, validate=False):
+        """Save the project.
+
+        Args:
+            validate: Whether to validate the project before saving it. Validation is incremental, so it only re-checks
+                the tracks changed since the project was last validated.
+
+        Raises:
+            ValidationError: `validate` is true and the project has problems. The project is not saved.
+        """
+        if validate:
+            problems = self.validate(incremental=True)
+            if problems:
+                raise ValidationError(problems)
+
         with self._project_file.open(mode='wt', encoding=self._encoding) as handle:
             json.dump(self._data, handle)
 
+    def validate(self, incremental=False):
+        """Check the project for problems which would stop Camtasia from opening it, e.g. overlapping clips.
+
+        See `camtasia.validation.Validator` for the problems found.
+
+        Args:
+            incremental: Whether to skip re-checking the tracks which are unchanged since the project was last
+                validated.
+
+        Returns: A list of `camtasia.validation.Problem`s. It is empty if the project is valid.
+        """
+        if self._validator is None:
+            self._validator = Validator()
+        return self._validator.validate(self._data, incremental=incremental, timeline=self.timeline)
+
+    @property
+    def compact_stats(self):
+        "How much memory compact loading saved, as a `camtasia.compact.CompactStats`, or None if it wasn't used."
+        return self._compact_stats
+
     @property
     def authoring_client(self) -> AuthoringClient:
         "Details about the software used to edit the project."
@@ -47,11 +92,21 @@ class Project:
 
     @property
     def media_bin(self) -> MediaBin:
-        return MediaBin(self._data.setdefault('sourceBin', []), self._file_path)
+        "The project's MediaBin. The same instance is returned each time, so that its Media objects are kept."
+        media_bin_data = self._data.setdefault('sourceBin', [])
+        if self._media_bin is None or self._media_bin._data is not media_bin_data:
+            self._media_bin = MediaBin(media_bin_data, self._file_path)
+        return self._media_bin
 
     @property
     def timeline(self) -> Timeline:
-        return Timeline(self._data['timeline'])
+        "The project's Timeline. The same instance is returned each time, so that its indices are kept."
+        timeline_data = self._data['timeline']
+        if (self._timeline is None
+                or self._timeline._data is not timeline_data
+                or self._timeline.edit_rate != self.edit_rate):
+            self._timeline = Timeline(timeline_data, self.edit_rate)
+        return self._timeline
 
     @property
     def _project_file(self):
@@ -68,21 +123,22 @@ class Project:
         return f'Project(file_path="{self.file_path}")'
 
 
-def load_project(file_path, encoding=None):
+def load_project(file_path, encoding=None, compact=False):
     """Load a Camtasia project at the specific path.
 
     Args:
         file_path: The path (pathlib.Path or str) to the Camtasia project.
         encoding: Encoding of the project file.
+        compact: Whether to load the project data in a compact form. See `camtasia.compact`.
 
     Return: A new Project instance.
     """
     file_path = Path(file_path).resolve()
-    return Project(file_path, encoding=encoding)
+    return Project(file_path, encoding=encoding, compact=compact)
 
 
 @contextmanager
-def use_project(file_path, save_on_exit=True, encoding=None):
+def use_project(file_path, save_on_exit=True, encoding=None, compact=False):
     """Context manager for working with Projects.
 
     This loads the project on enter. If the with-block exits normally and `save_on_exit` is true, then this saves the
@@ -92,10 +148,11 @@ def use_project(file_path, save_on_exit=True, encoding=None):
         file_path: The path (pathlib.Path or str) to the Camtasia project.
         save_on_exit: Whether to save the project on normal exit.
         encoding: Encoding of the project file.
+        compact: Whether to load the project data in a compact form. See `camtasia.compact`.
 
     Yields: A new Project instance.
     """
-    proj = load_project(file_path, encoding=encoding)
+    proj = load_project(file_path, encoding=encoding, compact=compact)
 
     yield proj
 
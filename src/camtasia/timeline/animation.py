@@ -0,0 +1,250 @@
+"""Evaluation and authoring of animated track media parameters.
+
+Track media records carry animatable `parameters` (e.g. 'scale0', 'translation0', 'cursorOpacity'). A parameter is
+either a plain number or a dict like this::
+
+    "scale0": {
+        "type": "double",
+        "defaultValue": 1.0,
+        "interp": "eioe",
+        "keyframes": [
+            {"time": 30, "endTime": 60, "value": 2.0, "duration": 30}
+        ]
+    }
+
+Each keyframe animates the parameter from its previous value (initially `defaultValue`) to the keyframe's `value`,
+starting at `time` and ending at `endTime`. The interpolation is given by the keyframe's `interp`, or failing that the
+parameter's `interp`. Keyframe times are in the same domain as media marker times, i.e. relative to the start of the
+underlying media.
+
+A `Curve` holds a parameter's keyframes as arrays, so that it can be sampled at many frames at once.
+"""
+
+import numpy as np
+
+from camtasia.compact import writable
+
+DEFAULT_INTERP = 'linr'
+
+
+def _ease_in_out(t):
+    return t * t * (3.0 - 2.0 * t)
+
+
+# Easing functions by Camtasia interpolation code. Each maps an array of progress values in [0, 1] to eased progress.
+# Add to this to support other codes.
+INTERPOLATIONS = {
+    'linr': lambda t: t,
+    'eioe': _ease_in_out,
+}
+
+
+class Curve:
+    """The keyframes of a parameter, held as arrays for fast sampling.
+
+    Args:
+        parameter: The parameter's entry in a track media's 'parameters', i.e. either a number or a dict as described
+            in the module documentation.
+        chained: Whether each keyframe animates from the previous keyframe's value. If false, each animates from the
+            default value.
+
+    Raises:
+        ValueError: The parameter uses an unknown interpolation or has non-numeric values.
+    """
+
+    def __init__(self, parameter, chained=True):
+        if not isinstance(parameter, dict):
+            parameter = {'defaultValue': parameter}
+
+        default = parameter.get('defaultValue', 0.0)
+        default_interp = parameter.get('interp', DEFAULT_INTERP)
+        keyframes = sorted(parameter.get('keyframes', ()), key=lambda k: k['time'])
+
+        try:
+            self._default = float(default)
+            self._values = np.array([k['value'] for k in keyframes], dtype=np.float64)
+        except (TypeError, ValueError) as exc:
+            raise ValueError('Only numeric parameters can be evaluated') from exc
+
+        self._starts = np.array([k['time'] for k in keyframes], dtype=np.int64)
+        self._ends = np.array([k.get('endTime', k['time']) for k in keyframes], dtype=np.int64)
+        if chained:
+            self._from_values = np.concatenate(([self._default], self._values[:-1]))
+        else:
+            self._from_values = np.full(len(self._values), self._default)
+
+        interps = [k.get('interp', default_interp) for k in keyframes]
+        unknown = set(interps) - set(INTERPOLATIONS)
+        if unknown:
+            raise ValueError(f'Unknown interpolation: {", ".join(sorted(unknown))}')
+        self._interp_codes = sorted(set(interps))
+        self._interps = np.array([self._interp_codes.index(i) for i in interps], dtype=np.int8)
+
+    @property
+    def default(self):
+        return self._default
+
+    def __len__(self):
+        "The number of keyframes."
+        return len(self._values)
+
+    def sample(self, frames):
+        """Evaluate the curve.
+
+        Args:
+            frames: A number or array-like of frames at which to evaluate the curve.
+
+        Returns: A float64 array of values with the same shape as `frames`.
+        """
+        frames = np.asarray(frames)
+        result = np.full(frames.shape, self._default, dtype=np.float64)
+        if len(self) == 0:
+            return result
+
+        # The most recent keyframe to have started at each frame.
+        index = np.searchsorted(self._starts, frames, side='right') - 1
+        started = index >= 0
+        index = np.maximum(index, 0)
+
+        starts = self._starts[index]
+        durations = self._ends[index] - starts
+        progress = np.where(
+            durations > 0,
+            np.clip((frames - starts) / np.maximum(durations, 1), 0.0, 1.0),
+            1.0)
+
+        eased = np.empty_like(progress)
+        interps = self._interps[index]
+        for code_index, code in enumerate(self._interp_codes):
+            mask = interps == code_index
+            eased[mask] = INTERPOLATIONS[code](progress[mask])
+
+        from_values = self._from_values[index]
+        values = from_values + (self._values[index] - from_values) * eased
+
+        return np.where(started, values, result)
+
+    def __repr__(self):
+        return f'Curve(default={self.default}, keyframes={len(self)})'
+
+
+def sample_media(track_media, name, frames):
+    """Evaluate a parameter of a TrackMedia at timeline frames.
+
+    Args:
+        track_media: The TrackMedia.
+        name: The name of the parameter, e.g. 'scale0'.
+        frames: A number or array-like of timeline frames.
+
+    Returns: A float64 array of values with the same shape as `frames`.
+
+    Raises:
+        KeyError: The TrackMedia has no such parameter.
+        ValueError: The parameter can't be evaluated.
+    """
+    parameter = track_media._data.get('parameters', {})[name]
+    media_frames = np.asarray(frames) - track_media.start + track_media.media_start
+    return Curve(parameter).sample(media_frames)
+
+
+def animation_progress(segments, frames):
+    """Evaluate the progress of an animation track, e.g. the 'visual' entry of a record's 'animationTracks'.
+
+    Each segment is a dict with a 'range' of `[start, end]` frames and an optional 'interp'. Within a segment, progress
+    eases from 0 to 1. Outside any segment it is 0 before the segment's start and 1 after its end.
+
+    Args:
+        segments: The list of animation segments.
+        frames: A number or array-like of frames.
+
+    Returns: A float64 array of progress values, one per frame, for the segment most recently started at that frame.
+    """
+    curve = Curve(
+        {
+            'defaultValue': 0.0,
+            'keyframes': [
+                {'time': s['range'][0], 'endTime': s['range'][1], 'value': 1.0,
+                 'interp': s.get('interp', DEFAULT_INTERP)}
+                for s in segments
+            ],
+        },
+        chained=False)
+    return curve.sample(frames)
+
+
+def set_keyframes(medias, name, keyframes, interp=DEFAULT_INTERP, default=None):
+    """Replace the keyframes of a parameter on many medias in one pass.
+
+    Args:
+        medias: An iterable of TrackMedia.
+        name: The name of the parameter, e.g. 'scale0'.
+        keyframes: Either a sequence of `(time, end_time, value)` tuples, or a callable taking a TrackMedia and
+            returning such a sequence. Times are relative to the start of each media's underlying media.
+        interp: The interpolation code for the parameter.
+        default: The value before the first keyframe. By default the parameter's existing default (or plain value) is
+            kept, falling back to 0.0.
+
+    Returns: The number of medias updated.
+
+    Raises:
+        ValueError: `interp` is not a known interpolation.
+    """
+    if interp not in INTERPOLATIONS:
+        raise ValueError(f'Unknown interpolation: {interp}')
+
+    count = 0
+    for media in medias:
+        media_keyframes = keyframes(media) if callable(keyframes) else keyframes
+        parameters = writable(media._data, 'parameters')
+        parameters[name] = _parameter_record(parameters.get(name), media_keyframes, interp, default)
+        media._changed()
+        count += 1
+    return count
+
+
+def zoom_pan(medias, scale, translation=(0.0, 0.0), time=0, duration=30, interp='eioe'):
+    """Add a zoom-and-pan animation to many medias in one pass.
+
+    Each media animates its scale and translation to the given values over `duration` frames, starting `time` frames
+    after the start of its visible part.
+
+    Args:
+        medias: An iterable of TrackMedia.
+        scale: The scale to zoom to.
+        translation: The `(x, y)` translation to pan to.
+        time: The offset from the start of each media's visible part at which to start the animation.
+        duration: The length of the animation in frames.
+        interp: The interpolation code to use.
+
+    Returns: The number of medias updated.
+    """
+    def keyframes(value):
+        def media_keyframes(media):
+            start = media.media_start + time
+            return [(start, start + duration, value)]
+        return media_keyframes
+
+    count = 0
+    for media in medias:
+        for name, value in (('scale0', scale), ('scale1', scale),
+                            ('translation0', translation[0]), ('translation1', translation[1])):
+            set_keyframes((media,), name, keyframes(value), interp=interp)
+        count += 1
+    return count
+
+
+def _parameter_record(existing, keyframes, interp, default):
+    if isinstance(existing, dict):
+        record = dict(existing)
+    else:
+        record = {'type': 'double', 'defaultValue': 0.0 if existing is None else existing}
+
+    if default is not None:
+        record['defaultValue'] = default
+
+    record['interp'] = interp
+    record['keyframes'] = [
+        {'endTime': end_time, 'time': time, 'value': value, 'duration': end_time - time}
+        for time, end_time, value in keyframes
+    ]
+    return record
@@ -0,0 +1,34 @@
+"""Helpers for sorted, disjoint ranges of frames.
+"""
+
+
+def merge_ranges(ranges):
+    """Merge overlapping and abutting `(start, stop)` ranges.
+
+    Returns: A tuple of disjoint `(start, stop)` ranges in order.
+    """
+    merged = []
+    for start, stop in sorted(ranges):
+        if merged and start <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], stop)
+        else:
+            merged.append([start, stop])
+    return tuple((start, stop) for start, stop in merged)
+
+
+def find_gaps(occupied, min_frames=1):
+    """Find the gaps before, and between, disjoint occupied ranges.
+
+    Args:
+        occupied: Disjoint `(start, stop)` ranges in order, e.g. from `merge_ranges()`.
+        min_frames: The minimum length of the gaps to report.
+
+    Returns: A list of `(start, stop)` gaps in order, starting from frame 0.
+    """
+    gaps = []
+    position = 0
+    for start, stop in occupied:
+        if start - position >= min_frames:
+            gaps.append((position, start))
+        position = max(position, stop)
+    return gaps
@@ -1,7 +1,252 @@
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass
 
+from camtasia.compact import writable
+
 
 @dataclass
 class Marker:
+    __slots__ = ('name', 'time')
+
     name: str
     time: int
+
+
+class Markers:
+    """Base for collections of markers stored as 'toc' keyframes in a record's parameters.
+
+    Markers are indexed by time so that range queries, nearest-marker lookups and duplicate checks take logarithmic
+    time. The index is built lazily and kept current by `add()`, `remove()` and `rename()`. It is rebuilt when the
+    number of keyframes changes behind its back, but if you change keyframe times directly you should call
+    `reindex()`.
+
+    Subclasses provide the record whose parameters hold the 'toc', and the offset from keyframe times to timeline times.
+    """
+
+    __slots__ = ('_keyframes_list', '_index_length', '_times', '_keyframes')
+
+    def __init__(self):
+        self._keyframes_list = None
+        self._index_length = None
+        self._times = []
+        self._keyframes = []
+
+    @property
+    def _record(self):
+        "The dict whose 'parameters' hold the 'toc' parameter."
+        raise NotImplementedError()
+
+    @property
+    def _offset(self):
+        "The offset to add to keyframe times to get timeline times."
+        raise NotImplementedError()
+
+    def _changed(self):
+        "Called after the markers are changed."
+
+    def _toc_keyframes(self, create=False):
+        if create:
+            return writable(writable(self._record, 'parameters'), 'toc').setdefault('keyframes', [])
+        # Keyframes may not exist when e.g. the media has no markers
+        return self._record.get('parameters', {}).get('toc', {}).get('keyframes', [])
+
+    def _index(self):
+        "Get the sorted keyframe times and keyframes, rebuilding them if necessary."
+        keyframes = self._toc_keyframes()
+        if keyframes is not self._keyframes_list or len(keyframes) != self._index_length:
+            self._keyframes = sorted(keyframes, key=lambda keyframe: keyframe['time'])
+            self._times = [keyframe['time'] for keyframe in self._keyframes]
+            self._keyframes_list = keyframes
+            self._index_length = len(keyframes)
+        return self._times, self._keyframes
+
+    def reindex(self):
+        "Rebuild the index from the underlying keyframes."
+        self._keyframes_list = None
+        self._index()
+
+    def _marker(self, keyframe):
+        return Marker(name=keyframe['value'], time=keyframe['time'] + self._offset)
+
+    def __len__(self):
+        return len(self._index()[0])
+
+    def __iter__(self):
+        "Iterate over the Markers in time order."
+        return (self._marker(keyframe) for keyframe in self._index()[1])
+
+    def __contains__(self, offset):
+        "Whether there is a marker at timeline time `offset`."
+        return bool(self._range(offset, offset + 1))
+
+    def _range(self, start, stop):
+        times, _ = self._index()
+        offset = self._offset
+        return range(bisect_left(times, start - offset), bisect_left(times, stop - offset))
+
+    def at(self, offset):
+        "Get a list of the Markers at timeline time `offset`."
+        return self.between(offset, offset + 1)
+
+    def between(self, start, stop):
+        """Get the Markers in a range of timeline times.
+
+        Args:
+            start: The start of the range.
+            stop: The end of the range (exclusive).
+
+        Returns: A list of Markers with `start <= time < stop`, in time order.
+        """
+        _, keyframes = self._index()
+        return [self._marker(keyframes[index]) for index in self._range(start, stop)]
+
+    def nearest(self, offset):
+        """Get the Marker nearest to a timeline time.
+
+        Args:
+            offset: The timeline time.
+
+        Returns: The nearest Marker. If two are equally near, the earlier one.
+
+        Raises:
+            ValueError: There are no markers.
+        """
+        times, keyframes = self._index()
+        if not times:
+            raise ValueError('There are no markers')
+
+        time = offset - self._offset
+        index = bisect_left(times, time)
+        if index == len(times) or (index > 0 and time - times[index - 1] <= times[index] - time):
+            index -= 1
+        return self._marker(keyframes[index])
+
+    def add(self, name, offset, duplicates_okay=False):
+        """Add a Marker.
+
+        Args:
+            name: The name of the marker.
+            offset: The offset of the marker (relative to the start of the timeline).
+            duplicates_okay: Whether to allow more than one marker at `offset`.
+
+        Returns: The new Marker object.
+
+        Raises:
+            ValueError: If a marker at `offset` already exists.
+        """
+        if not duplicates_okay and offset in self:
+            raise ValueError(f'A marker already exists at offset {offset}')
+
+        time = offset - self._offset
+        keyframe = {'value': name,
+                    'time': time,
+                    'endTime': time,
+                    'duration': 0
+                    }
+
+        self._index()
+        keyframes = self._toc_keyframes(create=True)
+        keyframes.append(keyframe)
+
+        if keyframes is self._keyframes_list:
+            index = bisect_right(self._times, time)
+            self._times.insert(index, time)
+            self._keyframes.insert(index, keyframe)
+            self._index_length = len(keyframes)
+
+        self._changed()
+        return self._marker(keyframe)
+
+    def add_many(self, markers, duplicates_okay=False):
+        """Add many Markers at once.
+
+        This checks for duplicates in a single pass over the new markers, and either adds all of them or none.
+
+        Args:
+            markers: An iterable of `(name, offset)` tuples. Offsets are relative to the start of the timeline.
+            duplicates_okay: Whether to allow more than one marker at an offset, either among the new markers or
+                between the new and existing markers.
+
+        Returns: A list of the new Markers, in time order.
+
+        Raises:
+            ValueError: If `duplicates_okay` is false and a marker would share its offset with another.
+        """
+        offset = self._offset
+        new_keyframes = sorted(
+            ({'value': name, 'time': time - offset, 'endTime': time - offset, 'duration': 0}
+             for name, time in markers),
+            key=lambda keyframe: keyframe['time'])
+        new_times = [keyframe['time'] for keyframe in new_keyframes]
+
+        times, keyframes = self._index()
+        if not duplicates_okay:
+            for index, time in enumerate(new_times):
+                duplicate_new = index > 0 and new_times[index - 1] == time
+                if duplicate_new or bisect_right(times, time) != bisect_left(times, time):
+                    raise ValueError(f'A marker already exists at offset {time + offset}')
+
+        toc_keyframes = self._toc_keyframes(create=True)
+        toc_keyframes.extend(new_keyframes)
+
+        merged = sorted(keyframes + new_keyframes, key=lambda keyframe: keyframe['time'])
+        self._keyframes = merged
+        self._times = [keyframe['time'] for keyframe in merged]
+        self._keyframes_list = toc_keyframes
+        self._index_length = len(toc_keyframes)
+
+        self._changed()
+        return [self._marker(keyframe) for keyframe in new_keyframes]
+
+    def _matching(self, offset, name):
+        _, keyframes = self._index()
+        indices = [index for index in self._range(offset, offset + 1)
+                   if name is None or keyframes[index]['value'] == name]
+        if not indices:
+            raise KeyError(f'No marker at offset {offset}' + ('' if name is None else f' named {name}'))
+        return indices
+
+    def remove(self, offset, name=None):
+        """Remove the markers at a timeline time.
+
+        Args:
+            offset: The timeline time of the markers.
+            name: If given, only markers with this name are removed.
+
+        Returns: The number of markers removed.
+
+        Raises:
+            KeyError: There is no matching marker.
+        """
+        indices = self._matching(offset, name)
+        doomed = {id(self._keyframes[index]) for index in indices}
+
+        keyframes = self._toc_keyframes()
+        keyframes[:] = [keyframe for keyframe in keyframes if id(keyframe) not in doomed]
+
+        for index in reversed(indices):
+            del self._times[index]
+            del self._keyframes[index]
+        self._index_length = len(keyframes)
+
+        self._changed()
+        return len(indices)
+
+    def rename(self, offset, new_name, name=None):
+        """Rename the markers at a timeline time.
+
+        Args:
+            offset: The timeline time of the markers.
+            new_name: The new name of the markers.
+            name: If given, only markers with this name are renamed.
+
+        Returns: The number of markers renamed.
+
+        Raises:
+            KeyError: There is no matching marker.
+        """
+        indices = self._matching(offset, name)
+        for index in indices:
+            self._keyframes[index]['value'] = new_name
+        self._changed()
+        return len(indices)
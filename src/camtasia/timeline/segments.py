@@ -0,0 +1,114 @@
+"""Flattening of the timeline into the segments which are actually seen and heard.
+"""
+
+from collections import namedtuple
+import heapq
+
+from .traversal import csml_tracks
+
+# Track media types which have no picture.
+AUDIO_ONLY_TYPES = frozenset(['AMFile'])
+
+# Track media types which have no sound.
+SILENT_TYPES = frozenset(['IMFile', 'Callout'])
+
+Segment = namedtuple('Segment', ['start', 'stop', 'visible', 'audible'])
+Segment.__doc__ = """A stretch of the timeline over which the same medias are seen and heard.
+
+Attributes:
+    start: The first frame of the segment.
+    stop: The frame after the last frame of the segment.
+    visible: The topmost visible TrackMedia, or None if nothing is visible.
+    audible: A tuple of the audible TrackMedia, in track order.
+"""
+
+
+def flatten(timeline, start=None, stop=None):
+    """Divide a timeline into segments over which the same medias are seen and heard.
+
+    Medias on higher tracks are drawn over those on lower tracks. Medias on tracks with hidden video are never visible,
+    and those on tracks with muted audio are never audible. Annotations and images are silent, and audio has no picture.
+
+    This makes one sweep over the sorted start and stop frames of the medias on all tracks, so it takes O(n log n) time
+    for n medias, regardless of the length of the timeline.
+
+    Args:
+        timeline: The Timeline.
+        start: The frame at which to start. By default this is the start of the timeline.
+        stop: The frame at which to stop. By default this is the end of the last media.
+
+    Returns: A list of Segments in time order. Stretches where nothing is seen or heard are omitted, and neighbouring
+        segments always differ in what is seen or heard.
+    """
+    events = []
+    for position, (track, track_data) in enumerate(zip(timeline.tracks, csml_tracks(timeline._data))):
+        can_see = not track.video_hidden
+        can_hear = not track.audio_muted
+        for record in track_data['medias']:
+            media_type = record.get('_type')
+            visual = can_see and media_type not in AUDIO_ONLY_TYPES
+            audible = can_hear and media_type not in SILENT_TYPES
+            if not (visual or audible):
+                continue
+
+            media_start = record['start']
+            media_stop = media_start + record['duration']
+            if start is not None:
+                media_start = max(media_start, start)
+            if stop is not None:
+                media_stop = min(media_stop, stop)
+            if media_start >= media_stop:
+                continue
+
+            clip = (record, visual, audible)
+            events.append((media_start, 1, position, id(record), clip))
+            events.append((media_stop, 0, position, id(record), clip))
+
+    # At equal times, stops (0) sort before starts (1), so abutting medias don't overlap.
+    events.sort(key=lambda event: event[:4])
+
+    track_media = timeline._track_media
+    segments = []
+    visible_heap = []
+    active_visible = set()
+    audible = {}
+
+    def current():
+        # Medias which have stopped are removed from the heap lazily, once they reach the top.
+        while visible_heap and (-visible_heap[0][0], visible_heap[0][1]) not in active_visible:
+            heapq.heappop(visible_heap)
+        visible = track_media(visible_heap[0][2]) if visible_heap else None
+        return visible, tuple(track_media(audible[key]) for key in sorted(audible))
+
+    index = 0
+    while index < len(events):
+        time = events[index][0]
+        while index < len(events) and events[index][0] == time:
+            _, is_start, position, record_id, (record, visual, is_audible) = events[index]
+            if visual:
+                if is_start:
+                    active_visible.add((position, record_id))
+                    heapq.heappush(visible_heap, (-position, record_id, record))
+                else:
+                    active_visible.discard((position, record_id))
+            if is_audible:
+                if is_start:
+                    audible[(position, record_id)] = record
+                else:
+                    del audible[(position, record_id)]
+            index += 1
+
+        if segments and segments[-1].stop is None:
+            segments[-1] = segments[-1]._replace(stop=time)
+
+        visible, audible_medias = current()
+        if visible is None and not audible_medias:
+            continue
+
+        if (segments and segments[-1].stop == time
+                and segments[-1].visible is visible and segments[-1].audible == audible_medias):
+            segments[-1] = segments[-1]._replace(stop=None)
+        else:
+            segments.append(Segment(time, None, visible, audible_medias))
+
+    return segments
@@ -1,7 +1,14 @@
-from typing import Iterable
+from bisect import bisect_right
+from itertools import accumulate
 
-from .marker import Marker
+from camtasia.wrapper_cache import WrapperCache
+
+from .intervals import find_gaps, merge_ranges
+from .marker import Markers
+from .segments import flatten
 from .track import Track
+from .track_media import TrackMedia
+from .traversal import MediaIndex, csml_tracks, walk
 
 
 class Timeline:
@@ -9,23 +16,247 @@ class Timeline:
 
     Args:
         timeline_data: The 'timeline' sub-dict of the full (i.e. tscproj file) project dict.
+        edit_rate: The project's editing framerate, in which timeline times are measured.
     """
 
-    def __init__(self, timeline_data):
+    def __init__(self, timeline_data, edit_rate=30):
         self._data = timeline_data
+        self._edit_rate = edit_rate
 
         self._tracks = _Tracks(self._data, self)
+        self._markers = _TimelineMarkers(self._data, self)
+        self._media_index = MediaIndex(self._data)
+        self._media_wrappers = WrapperCache()
+
+        self._version = 0
+        self._memo = {}
+        self._memo_version = 0
+
+        # The version at which all tracks last changed, and the versions at which single tracks have changed since.
+        self._tracks_changed_at = 0
+        self._track_changed_at = {}
+
+    @property
+    def edit_rate(self):
+        "The editing framerate."
+        return self._edit_rate
 
     @property
     def tracks(self):
         return self._tracks
 
     @property
-    def markers(self) -> Iterable[Marker]:
+    def version(self):
+        """A counter which increases whenever the timeline is changed through the API.
+
+        Derived values such as `end_frame` are computed once per version.
+        """
+        return self._version
+
+    def mark_changed(self, structure=True, tracks=None):
+        """Record that the timeline has changed.
+
+        The API calls this itself. Call it if you change the underlying project data directly, so that derived values
+        and indices are recomputed.
+
+        Args:
+            structure: Whether track media records may have been added, removed or had their IDs changed, as opposed
+                to e.g. only their effects or markers being edited.
+            tracks: The csml track records which changed. By default all tracks may have changed.
+        """
+        self._version += 1
+        if structure:
+            self._media_index.invalidate()
+        if tracks is None:
+            self._tracks_changed_at = self._version
+            self._track_changed_at.clear()
+        else:
+            for track in tracks:
+                self._track_changed_at[id(track)] = (track, self._version)
+
+    def _media_changed(self, record, structure=False):
+        "Record a change to a track media record, marking only its track as changed if it can be found."
+        try:
+            path, _ = self._media_index[record['id']]
+            tracks = (csml_tracks(self._data)[path[0]],)
+        except (KeyError, IndexError):
+            tracks = None
+        self.mark_changed(structure=structure, tracks=tracks)
+
+    def _track_version(self, track_data):
+        "The version at which a csml track record last changed."
+        changed = self._track_changed_at.get(id(track_data))
+        if changed is not None and changed[0] is track_data:
+            return max(changed[1], self._tracks_changed_at)
+        return self._tracks_changed_at
+
+    def _memoized(self, name, compute):
+        "Get a derived value, computing it only if it hasn't been computed since the last change."
+        if self._memo_version != self._version:
+            self._memo.clear()
+            self._memo_version = self._version
+        try:
+            return self._memo[name]
+        except KeyError:
+            value = self._memo[name] = compute()
+            return value
+
+    @property
+    def end_frame(self):
+        "The frame at which the last media on the timeline ends, or 0 if there is no media."
+        return self._memoized('end_frame', lambda: max(
+            (media['start'] + media['duration'] for track in csml_tracks(self._data) for media in track['medias']),
+            default=0))
+
+    @property
+    def used_media_ids(self):
+        "A frozenset of the IDs of the media bin media used anywhere on the timeline, including in nested media."
+        return self._memoized('used_media_ids', lambda: frozenset(
+            record['src'] for _, record in walk(csml_tracks(self._data)) if 'src' in record))
+
+    @property
+    def clip_counts(self):
+        "A dict mapping each track's index to the number of medias directly on it."
+        return self._memoized('clip_counts', lambda: {
+            track['trackIndex']: len(track['medias']) for track in csml_tracks(self._data)})
+
+    @property
+    def occupancy(self):
+        """A dict mapping each track's index to the stretches of the timeline occupied by its medias.
+
+        The stretches are a tuple of `(start, stop)` frame ranges in order. Abutting medias form a single stretch.
+        """
+        return self._memoized('occupancy', lambda: {
+            track['trackIndex']: merge_ranges((media['start'], media['start'] + media['duration'])
+                                              for media in track['medias'])
+            for track in csml_tracks(self._data)})
+
+    def gaps(self, min_frames=1):
+        """Find the stretches of the timeline before the end frame where there is no media on any track.
+
+        Args:
+            min_frames: The minimum length of the gaps to report.
+
+        Returns: A list of `(start, stop)` frame ranges in order.
+        """
+        occupied = merge_ranges(stretch for stretches in self.occupancy.values() for stretch in stretches)
+        return find_gaps(occupied, min_frames)
+
+    def compact(self, min_frames=1):
+        """Close the gaps in the timeline, moving media and timeline markers earlier.
+
+        Only stretches with no media on any track are closed, so media on different tracks stay in sync with each
+        other. Timeline markers in a closed gap move to where the gap was. Media markers move with their media.
+
+        Args:
+            min_frames: The minimum length of the gaps to close.
+
+        Returns: The total number of frames removed.
+        """
+        gaps = self.gaps(min_frames)
+        if not gaps:
+            return 0
+
+        gap_starts = [start for start, _ in gaps]
+        removed_after = list(accumulate(stop - start for start, stop in gaps))
+
+        def shift(time):
+            index = bisect_right(gap_starts, time) - 1
+            if index < 0:
+                return time
+            gap_start, gap_stop = gaps[index]
+            if time < gap_stop:
+                return gap_start - (removed_after[index - 1] if index > 0 else 0)
+            return time - removed_after[index]
+
+        for track in csml_tracks(self._data):
+            for media in track['medias']:
+                media['start'] = shift(media['start'])
+
+        for keyframe in self._markers._toc_keyframes():
+            time = keyframe['time']
+            end_time = keyframe.get('endTime', time + keyframe.get('duration', 0))
+            keyframe['time'] = shift(time)
+            keyframe['endTime'] = shift(end_time)
+            keyframe['duration'] = keyframe['endTime'] - keyframe['time']
+        self._markers.reindex()
+
+        self.mark_changed(structure=False)
+        return removed_after[-1]
+
+    def media_by_id(self, media_id):
+        """Get a TrackMedia by ID, wherever it is on the timeline.
+
+        This finds media on any track, including media nested in other media. Lookups take constant time.
+
+        Args:
+            media_id: The ID of the media to get.
+
+        Returns: A TrackMedia instance.
+
+        Raises:
+            KeyError: There is no TrackMedia with the given ID.
+        """
+        _, record = self._media_index[media_id]
+        return self._track_media(record)
+
+    def walk(self):
+        """Iterate over all track media on the timeline, including media nested in other media.
+
+        Returns: An iterable of `(path, TrackMedia)` tuples, as described in `traversal.walk()`.
+        """
+        for path, record in walk(csml_tracks(self._data)):
+            yield path, self._track_media(record)
+
+    def _track_media(self, record):
+        "Get the (cached) TrackMedia for a track media record."
+        return self._media_wrappers.get(record, self._new_track_media)
+
+    def _new_track_media(self, record):
+        return TrackMedia(record, self)
+
+    def flatten(self, start=None, stop=None):
+        """Divide the timeline into segments over which the same medias are seen and heard.
+
+        See `segments.flatten()` for details. The result for the whole timeline is computed once per version.
+
+        Args:
+            start: The frame at which to start. By default this is the start of the timeline.
+            stop: The frame at which to stop. By default this is the end of the last media.
+
+        Returns: A list of Segments in time order.
+        """
+        if start is None and stop is None:
+            return list(self._memoized('flatten', lambda: tuple(flatten(self))))
+        return flatten(self, start, stop)
+
+    @property
+    def markers(self):
         """Markers on the timeline (i.e. not media-specific markers)
         """
-        for frame in self._data.get('parameters', {}).get('toc', {}).get('keyframes', ()):
-            yield Marker(name=frame['value'], time=frame['time'])
+        return self._markers
+
+
+class _TimelineMarkers(Markers):
+    "Collection of markers on the timeline."
+
+    __slots__ = ('_data', '_timeline')
+
+    def __init__(self, data, timeline):
+        super().__init__()
+        self._data = data
+        self._timeline = timeline
+
+    def _changed(self):
+        self._timeline.mark_changed(structure=False, tracks=())
+
+    @property
+    def _record(self):
+        return self._data
+
+    @property
+    def _offset(self):
+        return 0
 
 
 class _Tracks:
@@ -35,6 +266,7 @@ class _Tracks:
     def __init__(self, data, timeline):
         self._data = data
         self._timeline = timeline
+        self._wrappers = WrapperCache()
 
     def __len__(self):
         return len(self._track_list)
@@ -43,7 +275,16 @@ class _Tracks:
         for idx, attrs in enumerate(self._data['trackAttributes']):
             # As far as I can tell, there's only ever one scene. Hence the 0.
             data = self._track_list[idx]
-            yield Track(attrs, data, self._timeline)
+            track = self._wrappers.get(data, self._new_track)
+            if track._attributes is not attrs:
+                self._wrappers.forget(data)
+                track = self._wrappers.get(data, self._new_track)
+            yield track
+
+    def _new_track(self, data):
+        "Create the Track for a track record, finding its attributes by the record's position."
+        idx = next(idx for idx, record in enumerate(self._track_list) if record is data)
+        return Track(self._data['trackAttributes'][idx], data, self._timeline)
 
     def __getitem__(self, track_index):
         for track in self:
@@ -56,15 +297,15 @@ class _Tracks:
         for idx, track in enumerate(self):
             if track.index == track_index:
                 self._data['trackAttributes'].pop(idx)
-                self._track_list.pop(
-                    idx)
+                self._wrappers.forget(self._track_list.pop(idx))
+                self._timeline.mark_changed()
                 return
 
         raise KeyError('No track with index {}'.format(track_index))
 
     @property
     def _track_list(self):
-        return self._data['sceneTrack']['scenes'][0]['csml']['tracks']
+        return csml_tracks(self._data)
 
     def insert_track(self, index, name):
         record = {
@@ -92,5 +333,7 @@ class _Tracks:
         # update the track indices since we may have messed them up.
         for index, record in enumerate(self._track_list):
             record['trackIndex'] = index
+        self._timeline.mark_changed()
 
         return self[index]
+
@@ -1,7 +1,12 @@
 from collections import ChainMap
-
-from camtasia.effects import EffectSchema
-from .track_media import TrackMedia
+import copy
+from fractions import Fraction
+from itertools import islice
+
+from camtasia.effects import dump_effect
+from .track_media import EffectTemplate, TrackMedia
+from .intervals import find_gaps
+from .traversal import csml_tracks, walk
 from camtasia.media_bin import MediaType
 
 
@@ -14,9 +19,12 @@ class Track:
         timeline: The Timeline instance containing this Track.
     """
 
+    __slots__ = ('_attributes', '_data', '_timeline', '_medias')
+
     def __init__(self, attributes, data, timeline):
         self._attributes = attributes
         self._data = data
+        self._timeline = timeline
         self._medias = _Medias(data, timeline)
 
     @property
@@ -39,6 +47,16 @@ class Track:
     def medias(self):
         return self._medias
 
+    def gaps(self, min_frames=1):
+        """Find the stretches of the timeline before the end of the track's last media where it has no media.
+
+        Args:
+            min_frames: The minimum length of the gaps to report.
+
+        Returns: A list of `(start, stop)` frame ranges in order.
+        """
+        return find_gaps(self._timeline.occupancy[self.index], min_frames)
+
     def __repr__(self):
         return f'Track(name="{self.name}")'
 
@@ -55,31 +73,126 @@ class _Medias:
         return len(self._data['medias'])
 
     def __iter__(self):
+        track_media = self._timeline._track_media
         for media_data in self._data['medias']:
-            yield TrackMedia(media_data)
+            yield track_media(media_data)
 
     def __getitem__(self, media_id):
         """Get a TrackMedia by ID.
 
+        Only media directly on the track is found, as by iteration. Use `Timeline.media_by_id()` to find media nested
+        in other media (e.g. the pieces of stitched media). Lookups take constant time.
+
         Args:
             media_id: The ID of the media to get.
 
         Returns: A TrackMedia instance.
 
         Raises:
-            KeyError: There is no TrackMedia with the given ID.
+            KeyError: There is no TrackMedia with the given ID on this track.
         """
-        for media in self:
-            if media.id == media_id:
-                return media
-
-        raise KeyError(f'No TrackMedia with id={media_id}')
+        path, record = self._timeline._media_index[media_id]
+        # Paths of media directly on a track are `(track position, 'medias', media position)`.
+        if len(path) != 3 or csml_tracks(self._timeline._data)[path[0]] is not self._data:
+            raise KeyError(f'No TrackMedia with id={media_id}')
+        return self._timeline._track_media(record)
 
     def __delitem__(self, media_id):
         if not any(m.id == media_id for m in self):
             raise KeyError(f'No TrackMedia with id={media_id}')
 
-        self._data['medias'] = [m for m in self if m.id != media_id]
+        for record in self._data['medias']:
+            if record['id'] == media_id:
+                self._timeline._media_wrappers.forget(record)
+        self._data['medias'] = [m for m in self._data['medias'] if m['id'] != media_id]
+        self._timeline.mark_changed(tracks=(self._data,))
+
+    def cut(self, media_id, ranges):
+        """Remove stretches of a TrackMedia from the timeline.
+
+        The TrackMedia is replaced by the pieces which remain once `ranges` are removed. The pieces stay where they are
+        on the timeline, i.e. the gaps left by the cuts are not closed. The first piece keeps the ID of the original
+        TrackMedia. Media markers are kept with the piece they are visible in.
+
+        Args:
+            media_id: The ID of the TrackMedia to cut.
+            ranges: An iterable of `(start, stop)` tuples of timeline frames to remove.
+
+        Returns: A list of the remaining TrackMedia pieces.
+
+        Raises:
+            KeyError: There is no TrackMedia with the given ID.
+        """
+        medias = self._data['medias']
+        for index, record in enumerate(medias):
+            if record['id'] == media_id:
+                break
+        else:
+            raise KeyError(f'No TrackMedia with id={media_id}')
+
+        start = record['start']
+        stop = start + record['duration']
+
+        pieces = []
+        position = start
+        for cut_start, cut_stop in sorted(ranges):
+            cut_start = max(cut_start, position)
+            cut_stop = min(cut_stop, stop)
+            if cut_start >= cut_stop:
+                continue
+            if position < cut_start:
+                pieces.append((position, cut_start))
+            position = cut_stop
+        if position < stop:
+            pieces.append((position, stop))
+
+        # Every piece but the first needs new IDs, for itself and for any records nested in it.
+        ids_per_piece = sum(1 for _, nested in walk([{'medias': [record]}]) if 'id' in nested)
+        next_id = self._timeline._media_index.allocate(max(len(pieces) - 1, 0) * ids_per_piece)
+        records = []
+        for piece_index, (piece_start, piece_stop) in enumerate(pieces):
+            if piece_index == 0:
+                piece_id, nested_ids = media_id, None
+            else:
+                piece_id = next_id
+                nested_ids = iter(range(next_id + 1, next_id + ids_per_piece))
+                next_id += ids_per_piece
+
+            records.append(_piece_record(
+                record, piece_id, piece_start, piece_stop,
+                keep_markers_before=piece_index == 0,
+                keep_markers_after=piece_index == len(pieces) - 1,
+                nested_ids=nested_ids))
+
+        medias[index:index + 1] = records
+        self._timeline.mark_changed(tracks=(self._data,))
+        self._timeline._media_wrappers.forget(record)
+
+        return [self._timeline._track_media(r) for r in records]
+
+    def apply_effect(self, effect, where=None, replace=False):
+        """Apply an effect to many medias on the track.
+
+        The effect is serialized only once, however many medias it is applied to.
+
+        Args:
+            effect: The Effect (or EffectTemplate) to apply.
+            where: An optional predicate taking a TrackMedia. The effect is applied only to medias for which this
+                returns true. By default the effect is applied to all medias.
+            replace: If true, an existing effect with the same name is replaced rather than a new one added.
+
+        Returns: The number of medias the effect was applied to.
+        """
+        template = effect if isinstance(effect, EffectTemplate) else EffectTemplate(effect)
+
+        count = 0
+        for media_data in self._data['medias']:
+            if where is None or where(self._timeline._track_media(media_data)):
+                template.apply(media_data, replace=replace)
+                count += 1
+        if count:
+            self._timeline.mark_changed(structure=False, tracks=(self._data,))
+        return count
 
     def add_media(self, bin_media, start, duration=None, *, effects=None):
         """Add media from the bin to the track.
@@ -119,32 +232,66 @@ class _Medias:
             ValueError: The annotation can't be inserted because it overlaps existing media on the track.
         """
         record = self._annotation_record(
-            annotation, start, duration, translation)
+            self._next_media_id(), annotation, start, duration, translation)
         return self._insert_media(record)
 
+    def add_annotations(self, annotations):
+        """Add many annotations to the track at once.
+
+        This is much faster than repeated calls to `add_annotation()`, since IDs are allocated and overlaps are checked
+        once for the whole batch. Either all of the annotations are added or, if any overlap, none are.
+
+        Args:
+            annotations: An iterable of `(annotation, start, duration, translation)` tuples, with arguments as for
+                `add_annotation()`. `duration` and `translation` may be omitted.
+
+        Returns: A list of the new TrackMedia, in the order of `annotations`.
+
+        Raises:
+            ValueError: An annotation overlaps existing media on the track or another of the annotations.
+        """
+        annotations = list(annotations)
+        next_id = self._timeline._media_index.allocate(len(annotations))
+
+        records = []
+        for media_id, (annotation, start, *rest) in enumerate(annotations, start=next_id):
+            duration = rest[0] if len(rest) > 0 else None
+            translation = rest[1] if len(rest) > 1 else (0, 0)
+            records.append(self._annotation_record(media_id, annotation, start, duration, translation))
+
+        intervals = sorted(
+            [(m['start'], m['start'] + m['duration'], False) for m in self._data['medias']] +
+            [(r['start'], r['start'] + r['duration'], True) for r in records])
+
+        # Sorted by start, any overlap shows up as an overlap between neighbours.
+        for (_, prev_stop, prev_new), (next_start, _, next_new) in zip(intervals, intervals[1:]):
+            if next_start < prev_stop and (prev_new or next_new):
+                raise ValueError(f'Track media overlaps existing media at frame {next_start}')
+
+        self._data['medias'].extend(records)
+        self._timeline.mark_changed(tracks=(self._data,))
+        return [self._timeline._track_media(record) for record in records]
+
     def _insert_media(self, record):
-        new_media = TrackMedia(record)
+        new_media = TrackMedia(record, self._timeline)
 
         if any(_overlaps(new_media, m) for m in self):
             raise ValueError(
                 f'Track media overlaps existing media: {new_media}')
 
         self._data['medias'].append(record)
+        self._timeline.mark_changed(tracks=(self._data,))
         return self[record['id']]
 
     def _next_media_id(self):
-        max_media_id = max((media.id
-                            for track in self._timeline.tracks
-                            for media in track.medias),
-                           default=0)
-
-        return max_media_id + 1
+        "Allocate an ID for a new record. IDs are unique across all tracks and all levels of nesting."
+        return self._timeline._media_index.allocate()
 
-    def _annotation_record(self, annotation, start, duration, translation):
+    def _annotation_record(self, media_id, annotation, start, duration, translation):
         duration = 150 if duration is None else duration
 
         return {
-            "id": self._next_media_id(),
+            "id": media_id,
             "_type": "Callout",
             "def": annotation,
             "attributes": {
@@ -174,16 +321,15 @@ class _Medias:
         }
 
     def _video_record(self, bin_media, start, duration, effects):
-        duration = bin_media.range[1].to_frame() if duration is None else duration
+        media_start, media_stop = bin_media.frame_range(self._timeline.edit_rate)
+        duration = media_stop if duration is None else duration
 
-        if duration > bin_media.range[1].to_frame():
+        if duration > media_stop:
             return self._stiched_video_record(bin_media, start, duration)
 
         if effects is None:
             effects = []
 
-        effect_schema = EffectSchema()
-
         return {
             "id": self._next_media_id(),
             "_type": "ScreenVMFile",
@@ -215,11 +361,11 @@ class _Medias:
                 }
             },
             "effects": [
-                effect_schema.dump(effect) for effect in effects
+                dump_effect(effect) for effect in effects
             ],
             "start": start,
             "duration": duration,
-            "mediaStart": bin_media.range[0].to_frame(),
+            "mediaStart": media_start,
             "mediaDuration": duration,
             "scalar": 1,
             "metadata": dict(ChainMap(
@@ -236,11 +382,10 @@ class _Medias:
         }
 
     def _image_record(self, bin_media, start, duration, effects=None):
+        media_start, media_stop = bin_media.frame_range(self._timeline.edit_rate)
         if effects is None:
             effects = []
 
-        effect_schema = EffectSchema()
-
         return {
             "id": self._next_media_id(),
             "_type": "IMFile",
@@ -263,12 +408,12 @@ class _Medias:
                 }
             },
             "effects": [
-                effect_schema.dump(effect) for effect in effects
+                dump_effect(effect) for effect in effects
             ],
             "start": start,
             "duration": 150 if duration is None else duration,
-            "mediaStart": bin_media.range[0].to_frame(),
-            "mediaDuration": bin_media.range[1].to_frame(),
+            "mediaStart": media_start,
+            "mediaDuration": media_stop,
             "scalar": 1,
             "metadata": dict(ChainMap(
                 {
@@ -284,16 +429,15 @@ class _Medias:
         }
 
     def _audio_record(self, bin_media, start, duration, effects):
-        duration = bin_media.range[1].to_frame() if duration is None else duration
+        media_start, media_stop = bin_media.frame_range(self._timeline.edit_rate)
+        duration = media_stop if duration is None else duration
 
-        if duration > bin_media.range[1].to_frame():
+        if duration > media_stop:
             return self._stiched_video_record(bin_media, start, duration)
 
         if effects is None:
             effects = []
 
-        effect_schema = EffectSchema()
-
         return {
             "id": self._next_media_id(),
             "_type": "AMFile",
@@ -310,7 +454,7 @@ class _Medias:
             ],
             "start": start,
             "duration": duration,
-            "mediaStart": bin_media.range[0].to_frame(),
+            "mediaStart": media_start,
             "mediaDuration": duration,
             "scalar": 1,
             "metadata": dict(ChainMap(
@@ -327,7 +471,9 @@ class _Medias:
     def _stiched_video_record(self, bin_media, start, duration):
         "Video which is extended past its end with still."
 
-        assert duration > bin_media.range[1].to_frame(), "Stitching/extending video unnecessarily."
+        _, media_stop = bin_media.frame_range(self._timeline.edit_rate)
+
+        assert duration > media_stop, "Stitching/extending video unnecessarily."
 
         return {
             "id": self._next_media_id(),
@@ -355,9 +501,9 @@ class _Medias:
 
                     ],
                     "start": 0,
-                    "duration": bin_media.range[1].to_frame(),
+                    "duration": media_stop,
                     "mediaStart": 0,
-                    "mediaDuration": bin_media.range[1].to_frame(),
+                    "mediaDuration": media_stop,
                     "scalar": 1,
                     "metadata": {
                         "clipSpeedAttribute": False,
@@ -380,10 +526,10 @@ class _Medias:
                     "effects": [
 
                     ],
-                    "start": bin_media.range[1].to_frame(),
+                    "start": media_stop,
                     "duration": 108001,  # This appears to be a magic constant of some sort.
 
-                    "mediaStart": bin_media.range[1].to_frame() - 1,
+                    "mediaStart": media_stop - 1,
                     "mediaDuration": 1,
                     "scalar": 1,
                     "animationTracks": {
@@ -410,6 +556,40 @@ class _Medias:
         }
 
 
+def _piece_record(record, piece_id, start, stop, keep_markers_before, keep_markers_after, nested_ids=None):
+    """Make a record for the part of a track media record which is visible between timeline frames `start` and `stop`.
+
+    If `nested_ids` is given, records nested in the piece (e.g. the pieces of stitched media) are given IDs from it, in
+    document order. Otherwise they keep their IDs.
+    """
+    piece = copy.deepcopy(record)
+
+    # The scalar is the number of timeline frames per media frame, e.g. '1/2' for media played at double speed.
+    scalar = Fraction(str(record.get('scalar', 1)))
+    media_start = record['mediaStart'] + round((start - record['start']) / scalar)
+    media_duration = round((stop - start) / scalar)
+    piece['id'] = piece_id
+    piece['start'] = start
+    piece['duration'] = stop - start
+    piece['mediaStart'] = media_start
+    piece['mediaDuration'] = media_duration
+
+    if nested_ids is not None:
+        for _, nested in islice(walk([{'medias': [piece]}]), 1, None):
+            if 'id' in nested:
+                nested['id'] = next(nested_ids)
+
+    toc = piece.get('parameters', {}).get('toc', {})
+    if 'keyframes' in toc:
+        toc['keyframes'] = [
+            keyframe for keyframe in toc['keyframes']
+            if (keep_markers_before or keyframe['time'] >= media_start)
+            and (keep_markers_after or keyframe['time'] < media_start + media_duration)
+        ]
+
+    return piece
+
+
 def _overlaps(media_a, media_b):
     "Determines if two TrackMedia overlap."
     a1 = media_a.start
@@ -1,5 +1,6 @@
-from camtasia.effects import EffectSchema
-from .marker import Marker
+from camtasia.compact import writable
+from camtasia.effects import dump_effect, load_effect
+from .marker import Markers
 
 
 class TrackMedia:
@@ -29,9 +30,12 @@ class TrackMedia:
         start + (marker_time - media_start)
     """
 
-    def __init__(self, media_data):
+    __slots__ = ('_data', '_timeline', '_markers')
+
+    def __init__(self, media_data, timeline=None):
         self._data = media_data
-        self._markers = _Markers(self)
+        self._timeline = timeline
+        self._markers = None
 
     @property
     def id(self):
@@ -40,6 +44,8 @@ class TrackMedia:
 
     @property
     def markers(self):
+        if self._markers is None:
+            self._markers = _Markers(self)
         return self._markers
 
     @property
@@ -71,7 +77,12 @@ class TrackMedia:
 
     @property
     def effects(self):
-        return TrackMediaEffects(self._data)
+        return TrackMediaEffects(self._data, self._timeline)
+
+    def _changed(self):
+        "Record a change to the media's contents on its timeline."
+        if self._timeline is not None:
+            self._timeline._media_changed(self._data)
 
 
 class TrackMediaEffects():
@@ -80,92 +91,118 @@ class TrackMediaEffects():
 
     # Effects objects are immutable, but they can be added, removed, and replaced
 
-    def __init__(self, track_media_data):
+    def __init__(self, track_media_data, timeline=None):
         self._track_media_data = track_media_data
         self._effects = self._track_media_data["effects"]
-        self._metadata = self._track_media_data["metadata"]
+        self._timeline = timeline
+
+    @property
+    def _metadata(self):
+        return writable(self._track_media_data, 'metadata')
 
     def __getitem__(self, index):
-        effect_data = self._effects[index]
-        effect_schema = EffectSchema()
-        effect = effect_schema.load(effect_data)
-        return effect
+        return load_effect(self._effects[index])
 
     def __delitem__(self, index):
         effect = self[index]
         for key in effect.metadata:
             del self._metadata[key]
         del self._effects[index]
+        self._changed()
 
     def __setitem__(self, index, effect):
-        effect_schema = EffectSchema()
-        effect_data = effect_schema.dump(effect)
+        effect_data = dump_effect(effect)
         self._effects.insert(index, effect_data)
         for key in effect.metadata:
             del self._metadata[key]
         self._metadata.update(effect.metadata)
         del self._effects[index + 1]
+        self._changed()
 
     def __len__(self):
         return len(self._effects)
 
     def add_effect(self, effect):
-        effect_schema = EffectSchema()
-        effect_data = effect_schema.dump(effect)
+        effect_data = dump_effect(effect)
         self._effects.append(effect_data)
         self._metadata.update(effect.metadata)
+        self._changed()
 
+    def _changed(self):
+        if self._timeline is not None:
+            self._timeline._media_changed(self._track_media_data)
 
-class _Markers:
-    "Collection of markers in a TrackMedia."
-
-    def __init__(self, track_media: TrackMedia):
-        self._track_media = track_media
 
-    def __iter__(self):
-        "Iterate over Markers in a TrackMedia."
-        # Keyframes may not exist when e.g. the media has no markers
-        keyframes = self._track_media._data.get(
-            'parameters', {}).get('toc', {}).get('keyframes', ())
+class EffectTemplate:
+    """An effect serialized once, ready to be applied cheaply to many track media records.
 
-        for m in keyframes:
-            marker_offset = m['time']
+    Serializing an effect and rendering its metadata is comparatively expensive. When the same effect is applied to
+    many medias, create an EffectTemplate and apply that instead.
 
-            yield Marker(name=m['value'],
-                         time=self._track_media.start + (marker_offset - self._track_media.media_start))
+    Args:
+        effect: The Effect to apply.
+    """
 
-    def add(self, name, offset, duplicates_okay=False):
-        """Add a Marker to a TrackMedia.
+    def __init__(self, effect):
+        self._name = effect.name
+        self._effect_data = dump_effect(effect)
+        self._metadata = effect.metadata
 
-        Note that `offset` is interpreted as relative to the start of the timeline, not the
-        track media. This is symmetrical with how you interpret `Marker` objects in general. So if
-        you want to add a marker relative to the start of the `TrackMedia`, you need to add its
-        `start` value. For example, here's how to add a marker to the start of a `TrackMedia`:
+    @property
+    def name(self):
+        return self._name
 
-        >>> track = ...
-        >>> media = next(iter(track.medias))
-        >>> media.markers.add('marker-name', media.start)
+    def apply(self, media_data, replace=False):
+        """Apply the effect to a track media record.
 
         Args:
-            name: The name of the marker.
-            offset: The offset of the marker (relative to the start of the timeline).
+            media_data: The track media record.
+            replace: If true, an existing effect with the same name is replaced rather than a new one added.
+        """
+        effects = media_data.setdefault('effects', [])
+        effect_data = _copy_effect_data(self._effect_data)
 
-        Returns: The new Marker object.
+        for index, existing in enumerate(effects if replace else ()):
+            if existing.get('effectName') == self._name:
+                effects[index] = effect_data
+                break
+        else:
+            effects.append(effect_data)
+
+        writable(media_data, 'metadata').update(self._metadata)
 
-        Raises:
-            ValueError: If a marker at `offset` already exists.
-        """
 
-        if any(m.time == offset for m in self):
-            raise ValueError(f'A marker already exists at offset {offset}')
+def _copy_effect_data(effect_data):
+    "Copy serialized effect data. Effect data is at most two levels deep, so this is much cheaper than a deep copy."
+    return {key: dict(value) if isinstance(value, dict) else value
+            for key, value in effect_data.items()}
 
-        marker_offset = offset + self._track_media.media_start - self._track_media.start
 
-        keyframes = self._track_media._data.setdefault(
-            'parameters', {}).setdefault('toc', {}).setdefault('keyframes', [])
-        keyframes.append(
-            {'value': name,
-             'time': marker_offset,
-             'endTime': marker_offset,
-             'duration': 0
-             })
+class _Markers(Markers):
+    """Collection of markers in a TrackMedia.
+
+    Note that marker times are interpreted as relative to the start of the timeline, not the track media. So if you want
+    to add a marker relative to the start of the `TrackMedia`, you need to add its `start` value. For example, here's
+    how to add a marker to the start of a `TrackMedia`:
+
+    >>> track = ...
+    >>> media = next(iter(track.medias))
+    >>> media.markers.add('marker-name', media.start)
+    """
+
+    __slots__ = ('_track_media',)
+
+    def __init__(self, track_media: TrackMedia):
+        super().__init__()
+        self._track_media = track_media
+
+    def _changed(self):
+        self._track_media._changed()
+
+    @property
+    def _record(self):
+        return self._track_media._data
+
+    @property
+    def _offset(self):
+        return self._track_media.start - self._track_media.media_start
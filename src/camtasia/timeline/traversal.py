@@ -0,0 +1,112 @@
+"""Traversal of the nested track media records on a timeline.
+
+Track media can nest: a StitchedMedia record holds its pieces in 'medias', and a Group holds whole tracks of media in
+'tracks'. The functions here visit every record at every depth, without recursion, so arbitrarily deep nesting is fine.
+
+Records are identified by paths of keys and indices from the timeline's list of csml tracks, e.g. the path
+`(1, 'medias', 3, 'medias', 0)` is the first piece of the fourth media on the second track.
+"""
+
+
+def csml_tracks(timeline_data):
+    "Get the list of csml track records from a timeline record."
+    return timeline_data['sceneTrack']['scenes'][0]['csml']['tracks']
+
+
+def walk(tracks):
+    """Iterate over all track media records, at every depth.
+
+    Records are visited depth-first, in document order: each record comes before the records nested in it.
+
+    Args:
+        tracks: A list of csml track records, e.g. from `csml_tracks()`.
+
+    Returns: An iterable of `(path, record)` tuples.
+    """
+    stack = [((track_index, 'medias', media_index), media)
+             for track_index, track in reversed(list(enumerate(tracks)))
+             for media_index, media in reversed(list(enumerate(track.get('medias', ()))))]
+
+    while stack:
+        path, record = stack.pop()
+        yield path, record
+
+        children = [(path + ('medias', index), media) for index, media in enumerate(record.get('medias', ()))]
+        for track_index, track in enumerate(record.get('tracks', ())):
+            children.extend((path + ('tracks', track_index, 'medias', index), media)
+                            for index, media in enumerate(track.get('medias', ())))
+        stack.extend(reversed(children))
+
+
+class MediaIndex:
+    """An index of all track media records on a timeline by ID.
+
+    The index is built on first use and rebuilt after `invalidate()`, which the track APIs call whenever they add or
+    remove records. If you add or remove records directly, call `invalidate()` yourself.
+
+    Args:
+        timeline_data: The timeline record.
+    """
+
+    def __init__(self, timeline_data):
+        self._timeline_data = timeline_data
+        self._entries = None
+        self._next_id = None
+
+    def invalidate(self):
+        "Discard the index, so that it is rebuilt on next use."
+        self._entries = None
+
+    def _index(self):
+        if self._entries is None:
+            self._entries = {record['id']: (path, record) for path, record in walk(csml_tracks(self._timeline_data))
+                             if 'id' in record}
+            # The timeline record has an ID too, which shares the space of media IDs. Never go back below IDs already
+            # allocated, in case their records have not been inserted yet.
+            self._next_id = max(max(self._entries, default=0) + 1,
+                                self._timeline_data.get('id', 0) + 1,
+                                self._next_id or 0)
+        return self._entries
+
+    def __len__(self):
+        return len(self._index())
+
+    def __contains__(self, media_id):
+        return media_id in self._index()
+
+    def __getitem__(self, media_id):
+        """Get the path and record of the media with an ID.
+
+        Args:
+            media_id: The ID of the track media.
+
+        Returns: A `(path, record)` tuple.
+
+        Raises:
+            KeyError: There is no track media with the given ID.
+        """
+        entries = self._index()
+        entry = entries.get(media_id)
+        if entry is not None and entry[1].get('id') != media_id:
+            # The record's ID has been changed behind our back.
+            self.invalidate()
+            entry = self._index().get(media_id)
+        if entry is None:
+            raise KeyError(f'No TrackMedia with id={media_id}')
+        return entry
+
+    def allocate(self, count=1):
+        """Reserve new, unused IDs.
+
+        IDs are never handed out twice by the same index, even if the records they were allocated for are never
+        inserted.
+
+        Args:
+            count: The number of IDs to reserve.
+
+        Returns: The first reserved ID. The others follow it consecutively.
+        """
+        self._index()
+        first_id = self._next_id
+        self._next_id += count
+        return first_id
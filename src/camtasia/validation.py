@@ -0,0 +1,248 @@
+"""Validation of project data.
+
+Camtasia refuses to open projects with certain structural problems, e.g. two clips with the same ID, overlapping clips
+on a track, or a clip referring to media which isn't in the media bin. A `Validator` finds these problems before
+Camtasia does.
+"""
+
+from collections import Counter, namedtuple
+from dataclasses import dataclass
+from numbers import Number
+
+from camtasia.timeline.traversal import csml_tracks, walk
+
+_MISSING = object()
+
+# Track media types which refer to media in the media bin.
+_BIN_MEDIA_TYPES = frozenset(['VMFile', 'ScreenVMFile', 'IMFile', 'AMFile'])
+
+# Fields of track media records which every record must have.
+_REQUIRED_FIELDS = ('id', '_type', 'start', 'duration')
+
+
+@dataclass
+class Problem:
+    """A problem found in a project.
+
+    Attributes:
+        rule: The name of the rule which found the problem, e.g. 'overlap'.
+        subject: What the problem is with, e.g. 'clip 12'.
+        description: What the problem is.
+    """
+    rule: str
+    subject: str
+    description: str
+
+    def __str__(self):
+        return f'{self.subject}: {self.description} ({self.rule})'
+
+
+class ValidationError(ValueError):
+    """A project has problems.
+
+    Attributes:
+        problems: The list of Problems.
+    """
+
+    def __init__(self, problems):
+        super().__init__('; '.join(str(problem) for problem in problems))
+        self.problems = problems
+
+
+_RecordRule = namedtuple('_RecordRule', ['name', 'check', 'types', 'fields'])
+
+_RECORD_RULES = []
+
+
+def _record_rule(name, fields, types=None):
+    """Register a check of single track media records.
+
+    The check takes a record and returns a description of its problem, or None. It must only read `fields` of the
+    record, since records whose fields are unchanged are not checked again by incremental validation.
+
+    Args:
+        name: The name of the rule.
+        fields: The fields of the record which the check reads.
+        types: The record types (i.e. '_type' fields) to which the check applies. By default it applies to all.
+    """
+    def register(check):
+        _RECORD_RULES.append(_RecordRule(name, check, types, tuple(fields)))
+        return check
+    return register
+
+
+@_record_rule('missing-field', fields=_REQUIRED_FIELDS)
+def _check_required_fields(record):
+    missing = [field for field in _REQUIRED_FIELDS if field not in record]
+    if missing:
+        return f"missing {', '.join(missing)}"
+    return None
+
+
+@_record_rule('missing-field', fields=('src',), types=_BIN_MEDIA_TYPES)
+def _check_source_field(record):
+    return None if 'src' in record else 'missing src'
+
+
+@_record_rule('bad-duration', fields=('duration',))
+def _check_duration(record):
+    duration = record.get('duration', 1)
+    if not isinstance(duration, Number) or duration <= 0:
+        return f'duration {duration!r} is not a positive number'
+    return None
+
+
+@_record_rule('bad-time', fields=('start', 'mediaStart'))
+def _check_times(record):
+    for field in ('start', 'mediaStart'):
+        value = record.get(field, 0)
+        if not isinstance(value, Number) or value < 0:
+            return f'{field} {value!r} is not a non-negative number'
+    return None
+
+
+# The results of checking one track: the track record and its position, the timeline version of the track (if known)
+# and its fingerprint when checked, its problems, the IDs of its records, and `(bin ID, subject)` tuples for its records
+# which refer to the media bin.
+_TrackResult = namedtuple('_TrackResult', ['track', 'position', 'version', 'key', 'problems', 'ids', 'sources'])
+
+
+class Validator:
+    """Checks project data for problems which would stop Camtasia from opening it.
+
+    The rules are compiled once, when the validator is created: record checks are grouped by the record types they
+    apply to, and the fields which they read are gathered into a fingerprint. A project is checked in one traversal of
+    its track media.
+
+    The validator remembers its results for each track. In incremental mode, tracks which are unchanged since the
+    previous validation are not checked again, which makes validation cheap enough to run whenever a project is saved.
+    A track is unchanged if the fingerprints of its records (the fields which the checks read) are the same as at the
+    previous validation, and, given the project's Timeline, no change to it has been recorded with
+    `Timeline.mark_changed()`. Direct changes to the project data are found without being recorded. Checks across
+    tracks, e.g. for duplicate IDs, always run, but use the remembered results.
+
+    The problems found are:
+
+    * 'track-count': The timeline has different numbers of track attributes and tracks.
+    * 'track-index': A track's index does not match its position.
+    * 'duplicate-media-id': Two media bin entries have the same ID.
+    * 'duplicate-id': Two track media records (at any depth), or a record and the timeline, have the same ID.
+    * 'missing-media': A track media refers to media which is not in the media bin.
+    * 'overlap': Two clips on a track overlap.
+    * 'missing-field', 'bad-duration', 'bad-time': A track media record lacks required fields or has invalid times.
+    """
+
+    def __init__(self):
+        self._rules = tuple(_RECORD_RULES)
+        self._fields = tuple(sorted({field for rule in self._rules for field in rule.fields} | {'src'}))
+        self._rules_by_type = {}
+        self._tracks = []
+        self._timeline = None
+
+    def _rules_for(self, record_type):
+        rules = self._rules_by_type.get(record_type)
+        if rules is None:
+            rules = self._rules_by_type[record_type] = tuple(
+                rule for rule in self._rules if rule.types is None or record_type in rule.types)
+        return rules
+
+    def validate(self, project_data, incremental=False, timeline=None):
+        """Check project data.
+
+        Args:
+            project_data: The project dict.
+            incremental: Whether to skip checking tracks which are unchanged since the previous validation.
+            timeline: The Timeline of the project, if there is one. Tracks whose changes it has recorded are always
+                checked again.
+
+        Returns: A list of Problems. It is empty if the project is valid.
+        """
+        problems = []
+        timeline_data = project_data['timeline']
+        tracks = csml_tracks(timeline_data)
+
+        attribute_count = len(timeline_data.get('trackAttributes', []))
+        if attribute_count != len(tracks):
+            problems.append(Problem('track-count', 'timeline',
+                                    f'{attribute_count} track attributes but {len(tracks)} tracks'))
+
+        bin_ids = Counter(record.get('id') for record in project_data.get('sourceBin', []))
+        for media_id, count in bin_ids.items():
+            if count > 1:
+                problems.append(Problem('duplicate-media-id', f'media {media_id}',
+                                        f'{count} media bin entries have this ID'))
+
+        previous = self._tracks if incremental and timeline is self._timeline else []
+        self._timeline = timeline
+        self._tracks = [self._check_track(position, track, previous[position] if position < len(previous) else None)
+                        for position, track in enumerate(tracks)]
+
+        ids = Counter()
+        if 'id' in timeline_data:
+            ids[timeline_data['id']] += 1
+        for result in self._tracks:
+            problems.extend(result.problems)
+            ids.update(result.ids)
+
+        for media_id, count in ids.items():
+            if count > 1:
+                problems.append(Problem('duplicate-id', f'clip {media_id}', f'{count} records have this ID'))
+
+        for result in self._tracks:
+            for media_id, subject in result.sources:
+                if media_id not in bin_ids:
+                    problems.append(Problem('missing-media', subject,
+                                            f'refers to media {media_id}, which is not in the media bin'))
+
+        return problems
+
+    def _check_track(self, position, track, previous):
+        "Check a track, reusing the previous result for its position if it is unchanged."
+        if previous is not None and (previous.track is not track or previous.position != position):
+            previous = None
+
+        fields = self._fields
+        records = list(walk([track]))
+        version = self._timeline._track_version(track) if self._timeline is not None else None
+        key = (track.get('trackIndex'),
+               tuple((len(path), tuple(record.get(field, _MISSING) for field in fields)) for path, record in records))
+        # A change recorded by the timeline always means checking again. Without one, the project data may still have
+        # been changed directly, so the fingerprints are compared too.
+        if previous is not None and previous.version == version and previous.key == key:
+            return previous
+
+        problems = []
+        ids = []
+        sources = []
+
+        if track.get('trackIndex') != position:
+            problems.append(Problem('track-index', f'track {position}',
+                                    f"has index {track.get('trackIndex')} at position {position}"))
+
+        for path, record in records:
+            subject = f"clip {record['id']}" if 'id' in record else f'track {position} record at {path[1:]}'
+            record_type = record.get('_type')
+            for rule in self._rules_for(record_type):
+                description = rule.check(record)
+                if description is not None:
+                    problems.append(Problem(rule.name, subject, description))
+
+            if 'id' in record:
+                ids.append(record['id'])
+            if record_type in _BIN_MEDIA_TYPES and 'src' in record:
+                sources.append((record['src'], subject))
+
+        clips = sorted((record for path, record in records
+                        if len(path) == 3 and isinstance(record.get('start'), Number)
+                        and isinstance(record.get('duration'), Number)),
+                       key=lambda record: record['start'])
+        # The clip which ends last among those so far.
+        last = None
+        for clip in clips:
+            if last is not None and clip['start'] < last['start'] + last['duration']:
+                problems.append(Problem('overlap', f"clip {clip.get('id')}",
+                                        f"overlaps clip {last.get('id')} on track {position}"))
+            if last is None or clip['start'] + clip['duration'] > last['start'] + last['duration']:
+                last = clip
+
+        return _TrackResult(track, position, version, key, problems, ids, sources)
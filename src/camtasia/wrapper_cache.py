@@ -0,0 +1,46 @@
+"""Caching of the wrapper objects around raw project records.
+"""
+
+
+class WrapperCache:
+    """The wrapper objects (e.g. TrackMedia) for raw project records, keyed by record identity.
+
+    Keeping wrappers means that the same record always gets the same wrapper, and that repeated traversals of a project
+    don't allocate new wrappers each time. Wrappers must keep their record in a `_data` attribute. That reference keeps
+    the record alive, so its `id()` can't be reused by another record while the wrapper is cached.
+
+    Call `forget()` when a record is removed from the project, so that its wrapper can be freed.
+    """
+
+    __slots__ = ('_wrappers',)
+
+    def __init__(self):
+        self._wrappers = {}
+
+    def get(self, record, factory):
+        """Get the wrapper for a record, creating it if necessary.
+
+        Args:
+            record: The raw record.
+            factory: A callable taking `record` and returning a new wrapper for it.
+
+        Returns: The wrapper.
+        """
+        wrapper = self._wrappers.get(id(record))
+        if wrapper is None or wrapper._data is not record:
+            wrapper = factory(record)
+            self._wrappers[id(record)] = wrapper
+        return wrapper
+
+    def forget(self, record):
+        "Discard the wrapper for a record, if there is one."
+        wrapper = self._wrappers.get(id(record))
+        if wrapper is not None and wrapper._data is record:
+            del self._wrappers[id(record)]
+
+    def clear(self):
+        "Discard all wrappers."
+        self._wrappers.clear()
+
+    def __len__(self):
+        return len(self._wrappers)
@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from camtasia.timeline.animation import Curve, animation_progress, sample_media, set_keyframes, zoom_pan
+
+
+def test_plain_value_is_constant():
+    assert (Curve(0.5).sample([0, 10, 100]) == 0.5).all()
+
+
+def test_default_value_without_keyframes():
+    curve = Curve({"type": "double", "defaultValue": 0.25, "interp": "eioe"})
+    assert (curve.sample(np.arange(5)) == 0.25).all()
+
+
+def test_linear_keyframes():
+    curve = Curve({
+        "defaultValue": 1.0,
+        "interp": "linr",
+        "keyframes": [
+            {"time": 10, "endTime": 20, "value": 2.0, "duration": 10},
+            {"time": 30, "endTime": 40, "value": 0.0, "duration": 10},
+        ]
+    })
+    assert list(curve.sample([0, 10, 15, 20, 25, 35, 50])) == [1.0, 1.0, 1.5, 2.0, 2.0, 1.0, 0.0]
+
+
+def test_ease_in_out_is_symmetric_and_slow_at_ends():
+    curve = Curve({"defaultValue": 0.0, "interp": "eioe",
+                   "keyframes": [{"time": 0, "endTime": 100, "value": 1.0, "duration": 100}]})
+    values = curve.sample([10, 50, 90])
+    assert values[0] < 0.1
+    assert values[1] == 0.5
+    assert values[2] == pytest.approx(1.0 - values[0])
+
+
+def test_keyframe_interp_overrides_parameter_interp():
+    curve = Curve({"defaultValue": 0.0, "interp": "eioe",
+                   "keyframes": [{"time": 0, "endTime": 100, "value": 1.0, "duration": 100, "interp": "linr"}]})
+    assert curve.sample(10) == pytest.approx(0.1)
+
+
+def test_unknown_interp_raises_ValueError():
+    with pytest.raises(ValueError):
+        Curve({"defaultValue": 0.0, "interp": "what",
+               "keyframes": [{"time": 0, "endTime": 1, "value": 1.0, "duration": 1}]})
+
+
+def test_animation_progress():
+    segments = [{"range": [0, 10], "interp": "linr"}, {"range": [20, 30], "interp": "linr"}]
+    assert list(animation_progress(segments, [5, 15, 25])) == [0.5, 1.0, 0.5]
+
+
+def test_bulk_keyframes_and_zoom_pan(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks.insert_track(2, 'test-track')
+    for start in range(0, 1000, 200):
+        track.medias.add_media(bin_media, start, duration=100)
+
+    assert zoom_pan(track.medias, scale=2.0, translation=(100.0, -50.0), duration=10, interp='linr') == 5
+
+    for media in track.medias:
+        frames = media.start + np.array([0, 5, 10])
+        assert list(sample_media(media, 'scale0', frames)) == [1.0, 1.5, 2.0]
+        assert list(sample_media(media, 'translation1', frames)) == [0.0, -25.0, -50.0]
+
+    set_keyframes(track.medias, 'cursorOpacity', [(0, 10, 0.0)])
+    media = next(iter(track.medias))
+    assert media._data['parameters']['cursorOpacity']['keyframes'] == [
+        {'endTime': 10, 'time': 0, 'value': 0.0, 'duration': 10}]
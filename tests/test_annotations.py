@@ -0,0 +1,56 @@
+import pytest
+
+from camtasia.annotations import CalloutTemplate, callouts, shapes
+
+
+def test_template_instance_matches_builder():
+    template = CalloutTemplate(callouts.square('', 'Arial', 'Regular'))
+    assert template(text='hello', width=500) == callouts.square('hello', 'Arial', 'Regular', width=500)
+
+
+def test_template_instances_are_independent():
+    template = CalloutTemplate(callouts.text('', 'Arial', 'Regular'))
+    first = template(text='one')
+    second = template(text='two')
+    first['font']['size'] = 12.0
+    first['textAttributes']['keyframes'][0]['time'] = 10
+    assert second['font']['size'] == 96.0
+    assert second['textAttributes']['keyframes'][0]['time'] == 0
+    assert template()['text'] == ''
+
+
+def test_text_on_shape_template_raises_ValueError():
+    template = CalloutTemplate(shapes.rectangle())
+    assert template(height=10)['height'] == 10.0
+    with pytest.raises(ValueError):
+        template(text='nope')
+
+
+def test_add_annotations(project):
+    track = project.timeline.tracks.insert_track(2, 'captions')
+    template = CalloutTemplate(callouts.text('', 'Arial', 'Regular'))
+    medias = track.medias.add_annotations(
+        (template(text=str(i)), i * 100, 100, (0, -300)) for i in range(50))
+
+    assert len(track.medias) == 50
+    assert [m.start for m in medias] == [i * 100 for i in range(50)]
+    assert len({m.id for m in medias}) == 50
+
+
+def test_add_annotations_rejects_overlaps(project):
+    track = project.timeline.tracks.insert_track(2, 'captions')
+    track.medias.add_annotation(callouts.text('first', 'Arial', 'Regular'), 0, 100)
+
+    with pytest.raises(ValueError):
+        track.medias.add_annotations([
+            (callouts.text('second', 'Arial', 'Regular'), 200),
+            (callouts.text('third', 'Arial', 'Regular'), 50),
+        ])
+    assert len(track.medias) == 1
+
+    with pytest.raises(ValueError):
+        track.medias.add_annotations([
+            (callouts.text('second', 'Arial', 'Regular'), 200, 100),
+            (callouts.text('third', 'Arial', 'Regular'), 250, 100),
+        ])
+    assert len(track.medias) == 1
@@ -0,0 +1,72 @@
+import copy
+import json
+
+import pytest
+
+from camtasia.compact import SharedDict, loads, writable
+from camtasia.effects import ChromaKeyEffect
+from camtasia.project import load_project
+from camtasia.timeline.animation import set_keyframes
+
+
+@pytest.fixture
+def many_clips(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    for start in range(0, 200, 10):
+        track.medias.add_media(bin_media, start, duration=10)
+    project.save()
+    return project.file_path
+
+
+def test_compact_data_matches_plain_data(simple_video_path):
+    text = (simple_video_path / 'project.tscproj').read_text()
+    data, stats = loads(text)
+
+    assert data == json.loads(text)
+    assert json.dumps(data) == json.dumps(json.loads(text))
+    assert stats.dicts_shared > 0
+    assert stats.bytes_saved > 0
+
+
+def test_repeated_subtrees_are_shared(many_clips):
+    project = load_project(many_clips, compact=True)
+    first, second = list(project.timeline.tracks[0].medias)[:2]
+
+    assert first._data['parameters']['scale0'] is second._data['parameters']['scale0']
+    assert first._data['_type'] is second._data['_type']
+    assert project.compact_stats.dicts_shared >= 19
+    assert load_project(many_clips).compact_stats is None
+
+
+def test_shared_dicts_are_copied_on_write():
+    shared = SharedDict(a=1)
+    container = {'shared': shared, 'other': shared}
+
+    with pytest.raises(TypeError):
+        shared['a'] = 2
+    assert copy.deepcopy(container)['shared'] is shared
+
+    private = writable(container, 'shared')
+    private['a'] = 2
+    assert container == {'shared': {'a': 2}, 'other': {'a': 1}}
+    assert writable(container, 'new') == {}
+    assert 'new' in container
+
+
+def test_editing_compact_project(many_clips):
+    project = load_project(many_clips, compact=True)
+    first, second = list(project.timeline.tracks[0].medias)[:2]
+
+    first.markers.add('marker', 5)
+    first.effects.add_effect(ChromaKeyEffect())
+    set_keyframes([first], 'scale0', [(0, 10, 2.0)])
+    project.save()
+
+    reloaded = load_project(many_clips)
+    first, second = list(reloaded.timeline.tracks[0].medias)[:2]
+    assert [marker.name for marker in first.markers] == ['marker']
+    assert len(first.effects) == 1
+    assert 'keyframes' in first._data['parameters']['scale0']
+    assert len(second.effects) == 0
+    assert 'keyframes' not in second._data['parameters']['scale0']
@@ -0,0 +1,63 @@
+import copy
+
+from camtasia import diff
+from camtasia.effects import ChromaKeyEffect
+
+
+def _kinds(changes):
+    return sorted((change.kind, change.subject) for change in changes)
+
+
+def test_identical_projects_have_no_changes(simple_video):
+    assert diff(simple_video, simple_video) == []
+
+
+def test_clip_changes(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    moved = track.medias.add_media(bin_media, 0, duration=10)
+    trimmed = track.medias.add_media(bin_media, 20, duration=10)
+    removed = track.medias.add_media(bin_media, 40, duration=10)
+
+    before = copy.deepcopy(project)
+
+    moved._data['start'] = 5
+    trimmed._data['duration'] = 5
+    trimmed.effects.add_effect(ChromaKeyEffect())
+    del track.medias[removed.id]
+    added = project.timeline.tracks[1].medias.add_media(bin_media, 0, duration=10)
+    moved.markers.add('note', 7)
+
+    assert _kinds(diff(before, project)) == [
+        ('clip-added', f'clip {added.id}'),
+        ('clip-effects-changed', f'clip {trimmed.id}'),
+        ('clip-moved', f'clip {moved.id}'),
+        ('clip-removed', f'clip {removed.id}'),
+        ('clip-trimmed', f'clip {trimmed.id}'),
+        ('marker-added', f'clip {moved.id} marker at 2'),
+    ]
+
+
+def test_media_bin_and_track_changes(project, media_root):
+    before = copy.deepcopy(project)
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    project.timeline.tracks.insert_track(2, 'new-track')
+    project.timeline.markers.add('chapter', 30)
+    project._data['width'] = 640.0
+
+    changes = diff(before, project)
+    assert _kinds(changes) == [
+        ('marker-added', 'timeline marker at 30'),
+        ('media-added', f'media {bin_media.id} ({bin_media.source})'),
+        ('project-changed', 'width'),
+        ('track-added', 'track 2'),
+    ]
+
+
+def test_renamed_marker(project):
+    project.timeline.markers.add('old', 30)
+    before = copy.deepcopy(project)
+    project.timeline.markers.rename(30, 'new')
+
+    (change,) = diff(before, project)
+    assert (change.kind, change.old, change.new) == ('marker-renamed', 'old', 'new')
@@ -1,6 +1,6 @@
 from pprint import pprint
 
-from camtasia.effects import ChromaKeyEffect, EffectSchema
+from camtasia.effects import ChromaKeyEffect, EffectSchema, dump_effect, load_effect
 from camtasia.color import RGBA
 
 
@@ -107,4 +107,19 @@ def test_default_chromakey_effect_metadata():
     assert actual == expected
 
 
+def test_fast_dump_matches_schema_dump():
+    effect = ChromaKeyEffect(defringe=-0.3, inverted=True, softness=0.2, tolerance=0.05, hue="#FF7F3F1F")
+    assert dump_effect(effect) == EffectSchema().dump(effect)
+    assert dump_effect(effect, validate=True) == EffectSchema().dump(effect)
 
+
+def test_fast_load_matches_schema_load():
+    effect = ChromaKeyEffect(defringe=0.3, inverted=True, softness=0.2, tolerance=0.05, compensation=0.5)
+    serialized = EffectSchema().dump(effect)
+    assert load_effect(serialized) == EffectSchema().load(serialized)
+    assert load_effect(serialized, validate=True) == effect
+
+
+def test_roundtrip_through_fast_path():
+    effect = ChromaKeyEffect(hue=RGBA(128, 0, 0, 255))
+    assert load_effect(dump_effect(effect)) == effect
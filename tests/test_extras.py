@@ -0,0 +1,33 @@
+from itertools import islice
+
+from camtasia.extras import markers_by_time, media_markers
+
+
+def test_markers_by_time_includes_all_markers_in_order(simple_video):
+    items = list(markers_by_time(simple_video))
+    times = [marker.time for marker, _, _ in items]
+    assert times == sorted(times)
+    assert len(items) == len(list(media_markers(simple_video))) + len(simple_video.timeline.markers)
+
+
+def test_markers_by_time_without_timeline_markers(simple_video):
+    items = list(markers_by_time(simple_video, timeline_markers=False))
+    assert sorted(items, key=lambda item: item[0].time) == items
+    assert all(media is not None for _, media, _ in items)
+
+
+def test_markers_by_time_window(simple_video):
+    items = list(markers_by_time(simple_video, start=100, stop=300))
+    assert all(100 <= marker.time < 300 for marker, _, _ in items)
+    assert 'marker-1' in [marker.name for marker, _, _ in items]
+
+
+def test_markers_by_time_interleaves_media_and_timeline_markers(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    first, second = project.timeline.tracks
+    first.medias.add_media(bin_media, 0, duration=100).markers.add_many([('a', 10), ('c', 30)])
+    second.medias.add_media(bin_media, 0, duration=100).markers.add_many([('b', 20), ('e', 50)])
+    project.timeline.markers.add('d', 40)
+
+    names = [marker.name for marker, _, _ in islice(markers_by_time(project), 4)]
+    assert names == ['a', 'b', 'c', 'd']
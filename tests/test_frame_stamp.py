@@ -1,4 +1,11 @@
-from camtasia.frame_stamp import FrameStamp
+from datetime import timedelta
+from fractions import Fraction
+import math
+
+import numpy as np
+import pytest
+
+from camtasia.frame_stamp import FrameStamp, Timebase
 import hypothesis.strategies as ST
 from hypothesis import given
 
@@ -20,3 +27,43 @@ def test_sub_frames_are_less_than_frame_rate(fstamp):
 def test_frame_times_add_up_to_frame_number(fstamp):
     tdelta, subframes = fstamp.frame_time
     assert tdelta.total_seconds() * fstamp.frame_rate + subframes == fstamp.frame_number
+
+
+@given(frame_stamps(), frame_stamps())
+def test_ordering_matches_exact_time(lhs, rhs):
+    assert (lhs < rhs) == (Fraction(lhs.frame_number, lhs.frame_rate) < Fraction(rhs.frame_number, rhs.frame_rate))
+
+
+@given(ST.integers(min_value=0, max_value=10 ** 9),
+       ST.integers(min_value=1, max_value=10 ** 6),
+       ST.integers(min_value=1, max_value=10 ** 6))
+def test_timebase_rounds_exactly(ticks, from_rate, to_rate):
+    timebase = Timebase(from_rate, to_rate)
+    exact = Fraction(ticks * to_rate, from_rate)
+    assert timebase.convert(ticks, rounding='floor') == math.floor(exact)
+    assert timebase.convert(ticks, rounding='ceil') == math.ceil(exact)
+    assert abs(timebase.convert(ticks) - exact) <= Fraction(1, 2)
+
+
+def test_timebase_batch_conversion_matches_scalar():
+    timebase = Timebase.between(44100, 30)
+    samples = np.arange(0, 10 ** 7, 12345)
+    for rounding in ('nearest', 'floor', 'ceil'):
+        expected = [timebase.convert(int(s), rounding=rounding) for s in samples]
+        assert timebase.convert_array(samples, rounding=rounding).tolist() == expected
+
+
+def test_timebase_batch_conversion_rejects_fractional_ticks():
+    timebase = Timebase.between(30, 60)
+    assert timebase.convert_array([1.0, 2.0]).tolist() == [2, 4]
+    with pytest.raises(ValueError):
+        timebase.convert_array([1, 2.5])
+
+
+def test_timebase_instances_are_cached():
+    assert Timebase.between(1000, 30) is Timebase.between(1000, 30)
+    assert Timebase.between(1000, 30).inverse is Timebase.between(30, 1000)
+
+
+def test_time_is_exact_to_the_microsecond():
+    assert FrameStamp(frame_number=1, frame_rate=3).time == timedelta(microseconds=333333)
@@ -0,0 +1,59 @@
+import struct
+
+import pytest
+from pymediainfo import MediaInfo
+
+from camtasia.media_bin.header_probe import probe_header
+
+
+@pytest.fixture(params=['example.wav', 'llama.jpg', 'monkey.jpg', 'test.png'])
+def media_path(request, media_root):
+    return media_root / request.param
+
+
+def test_probe_matches_media_info(media_path):
+    expected = MediaInfo.parse(media_path).tracks[1].to_data()
+    actual = probe_header(media_path)
+
+    for key, value in actual.items():
+        if key in expected:
+            assert str(value) == str(expected[key]), key
+
+
+def test_probe_wav(media_root):
+    track = probe_header(media_root / 'example.wav')
+    assert track == {
+        'kind_of_stream': 'Audio',
+        'sampling_rate': 44100,
+        'channel_s': 2,
+        'bit_depth': 16,
+        'samples_count': 357210,
+        'duration': 8100,
+    }
+
+
+def test_probe_gif(temp_path):
+    path = temp_path / 'test.gif'
+    path.write_bytes(b'GIF89a' + struct.pack('<HHBBB', 320, 200, 0xF7, 0, 0) + b'\x3b')
+    assert probe_header(path) == {'kind_of_stream': 'Image', 'width': 320, 'height': 200, 'bit_depth': 8}
+
+
+def test_probe_bmp(temp_path):
+    path = temp_path / 'test.bmp'
+    path.write_bytes(b'BM' + bytes(12) + struct.pack('<IiiHH', 40, 64, -32, 1, 24) + bytes(24))
+    assert probe_header(path) == {'kind_of_stream': 'Image', 'width': 64, 'height': 32, 'bit_depth': 8}
+
+
+def test_truncated_jpeg_is_not_probed(temp_path):
+    path = temp_path / 'truncated.jpg'
+    path.write_bytes(b'\xff\xd8\xff\xff\xff')
+    assert probe_header(path) is None
+
+
+def test_unknown_format_is_not_probed(media_root):
+    assert probe_header(media_root / 'York_1sec(48K).mp4') is None
+
+
+def test_missing_file_raises_FileNotFoundError(temp_path):
+    with pytest.raises(FileNotFoundError):
+        probe_header(temp_path / 'missing.png')
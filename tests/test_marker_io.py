@@ -0,0 +1,35 @@
+import io
+
+import pytest
+
+from camtasia import marker_io
+from camtasia.timeline.marker import Marker
+
+
+@pytest.mark.parametrize('fmt', marker_io.FORMATS)
+def test_round_trip(fmt):
+    markers = [Marker(name='intro', time=0), Marker(name='a, "quoted" name', time=45), Marker(name='end', time=3601)]
+    handle = io.StringIO(newline='')
+    assert marker_io.write_markers(handle, markers, fmt, 30) == 3
+    handle.seek(0)
+    assert list(marker_io.read_markers(handle, fmt, 30)) == [(m.name, m.time) for m in markers]
+
+
+def test_read_csv_converts_seconds_to_frames():
+    handle = io.StringIO('name,time\nfirst,1.5\nsecond,0.02\n')
+    assert list(marker_io.read_markers(handle, 'csv', 60)) == [('first', 90), ('second', 1)]
+
+
+def test_read_chapters_accepts_short_timestamps():
+    handle = io.StringIO('0:00 Intro\n1:02:03.5 Later chapter\n')
+    assert list(marker_io.read_markers(handle, 'chapters', 30)) == [('Intro', 0), ('Later chapter', 111690 + 15)]
+
+
+def test_malformed_chapter_line():
+    with pytest.raises(ValueError):
+        list(marker_io.read_markers(io.StringIO('Intro\n'), 'chapters', 30))
+
+
+def test_unknown_format():
+    with pytest.raises(ValueError):
+        list(marker_io.read_markers(io.StringIO(''), 'xml', 30))
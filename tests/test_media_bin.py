@@ -75,3 +75,14 @@ def test_canned_media_test(simple_video):
     assert media[1].rect == (0, 0, 970, 334)
     assert media[1].last_modification == dt.datetime(
         year=2019, month=7, day=8, hour=6, minute=52, second=5)
+
+
+def test_frame_range_uses_edit_rate(project, media_root):
+    media = project.media_bin.import_media(media_root / 'example.wav')
+    assert media.edit_rate == 44100
+    assert media.frame_range(30) == (0, 357210 * 30 // 44100)
+
+
+def test_canned_frame_range(simple_video):
+    media = list(simple_video.media_bin)
+    assert media[0].frame_range(simple_video.edit_rate) == (0, 1032)
@@ -0,0 +1,114 @@
+import copy
+
+import pytest
+
+from camtasia import merge
+from camtasia.effects import ChromaKeyEffect
+
+
+@pytest.fixture
+def versions(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    track.medias.add_media(bin_media, 0, duration=10)
+    track.medias.add_media(bin_media, 20, duration=10)
+    return project, copy.deepcopy(project), copy.deepcopy(project)
+
+
+def _clips(project, track_index=0):
+    return {media.id: (media.start, media.duration) for media in project.timeline.tracks[track_index].medias}
+
+
+def test_unchanged_theirs_leaves_ours_alone(versions):
+    base, ours, theirs = versions
+    list(ours.timeline.tracks[0].medias)[1]._data['duration'] = 5
+    expected = copy.deepcopy(ours._data)
+
+    assert merge(base, ours, theirs) == []
+    assert ours._data == expected
+
+
+def test_disjoint_clip_edits_are_combined(versions):
+    base, ours, theirs = versions
+    first, second = (media.id for media in base.timeline.tracks[0].medias)
+
+    ours.timeline.tracks[0].medias[first]._data['duration'] = 5
+    theirs.timeline.tracks[0].medias[first].effects.add_effect(ChromaKeyEffect())
+    theirs.timeline.tracks[0].medias[second]._data['start'] = 25
+
+    assert merge(base, ours, theirs) == []
+    assert _clips(ours) == {first: (0, 5), second: (25, 10)}
+    assert len(ours.timeline.tracks[0].medias[first].effects) == 1
+
+
+def test_same_field_changed_differently_is_a_conflict(versions):
+    base, ours, theirs = versions
+    first = list(base.timeline.tracks[0].medias)[0].id
+    ours.timeline.tracks[0].medias[first]._data['duration'] = 5
+    theirs.timeline.tracks[0].medias[first]._data['duration'] = 7
+
+    conflicts = merge(base, ours, theirs)
+
+    assert [str(conflict) for conflict in conflicts] == [f'clip {first} duration: changed in both versions']
+    assert ours.timeline.tracks[0].medias[first].duration == 5
+
+
+def test_clashing_new_clip_ids_are_renumbered(versions, media_root):
+    base, ours, theirs = versions
+    ours_media = ours.timeline.tracks[1].medias.add_media(list(ours.media_bin)[0], 0, duration=10)
+    their_media = theirs.timeline.tracks[1].medias.add_media(list(theirs.media_bin)[0], 20, duration=10)
+    assert ours_media.id == their_media.id
+
+    assert merge(base, ours, theirs) == []
+
+    ids = [media.id for track in ours.timeline.tracks for media in track.medias]
+    assert len(ids) == len(set(ids))
+    assert _clips(ours, 1) == {ours_media.id: (0, 10), max(ids): (20, 10)}
+
+
+def test_clashing_new_media_bin_ids_are_renumbered(versions, media_root):
+    base, ours, theirs = versions
+    ours.media_bin.import_media(media_root / 'llama.jpg')
+    their_bin_media = theirs.media_bin.import_media(media_root / 'llama.jpg')
+    theirs._data['sourceBin'][-1]['lastMod'] = 'changed'
+    theirs.timeline.tracks[1].medias.add_media(their_bin_media, 0, duration=10)
+
+    assert merge(base, ours, theirs) == []
+
+    bin_ids = [record['id'] for record in ours._data['sourceBin']]
+    assert len(bin_ids) == len(set(bin_ids)) == 3
+    assert list(ours.timeline.tracks[1].medias)[0].source == bin_ids[-1]
+
+
+def test_markers_are_merged_as_a_multiset(versions):
+    base, ours, theirs = versions
+    for project in versions:
+        project.timeline.markers.add('intro', 0)
+
+    ours.timeline.markers.add('ours', 10)
+    theirs.timeline.markers.add('theirs', 20)
+    theirs.timeline.markers.add('ours', 10)
+    theirs.timeline.markers.remove(0)
+
+    assert merge(base, ours, theirs) == []
+    assert [(marker.name, marker.time) for marker in ours.timeline.markers] == [('ours', 10), ('theirs', 20)]
+
+
+def test_overlapping_clip_from_theirs_falls_back_to_ours(versions):
+    base, ours, theirs = versions
+    first, second = (media.id for media in base.timeline.tracks[0].medias)
+    ours.timeline.tracks[0].medias[first]._data['duration'] = 25
+    theirs.timeline.tracks[0].medias[second]._data['start'] = 15
+
+    conflicts = merge(base, ours, theirs)
+
+    assert [conflict.subject for conflict in conflicts] == [f'clip {second}']
+    assert _clips(ours) == {first: (0, 25), second: (20, 10)}
+
+
+def test_different_edit_rates_cannot_be_merged(versions):
+    base, ours, theirs = versions
+    theirs._data['editRate'] = 60
+
+    with pytest.raises(ValueError):
+        merge(base, ours, theirs)
@@ -0,0 +1,191 @@
+import pytest
+
+from camtasia import operations
+from camtasia.effects import ChromaKeyEffect
+from camtasia.project import load_project, new_project
+
+
+def test_apply_effect_across_tracks(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    for track in project.timeline.tracks:
+        track.medias.add_media(bin_media, 0)
+
+    effect = ChromaKeyEffect(softness=0.3)
+    count = operations.apply_effect(project, effect, where=lambda track, media: track.index == 1)
+    assert count == 1
+
+    first, second = project.timeline.tracks
+    assert [len(m.effects) for m in first.medias] == [0]
+    assert [list(m.effects) for m in second.medias] == [[effect]]
+
+
+def test_retime_doubles_times(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    first = track.medias.add_media(bin_media, 0, duration=30)
+    second = track.medias.add_media(bin_media, 30, duration=45)
+    first.markers.add('intro', 10)
+    project.timeline.markers.add('middle', 31)
+
+    operations.retime(project, 60)
+
+    assert project.edit_rate == 60
+    first, second = project.timeline.tracks[0].medias
+    assert (first.start, first.duration) == (0, 60)
+    assert (second.start, second.duration) == (60, 90)
+    assert [m.time for m in first.markers] == [20]
+    assert [m.time for m in project.timeline.markers] == [62]
+
+
+def test_retime_keeps_clips_abutting(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    for start in range(0, 70, 7):
+        track.medias.add_media(bin_media, start, duration=7)
+
+    operations.retime(project, 25)
+
+    medias = sorted(project.timeline.tracks[0].medias, key=lambda m: m.start)
+    for before, after in zip(medias, medias[1:]):
+        assert before.start + before.duration == after.start
+    assert medias[-1].start + medias[-1].duration == 58
+
+
+def test_retime_rounds_fractional_times(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    media = project.timeline.tracks[0].medias.add_media(bin_media, 0, duration=30)
+    media._data['mediaStart'] = 4.9
+
+    operations.retime(project, 25)
+
+    assert media._data['mediaStart'] == 4
+    assert media.duration == 25
+
+
+def _lesson(path, media_root, starts, image='llama.jpg'):
+    new_project(path)
+    lesson = load_project(path)
+    bin_media = lesson.media_bin.import_media(media_root / image)
+    for start in starts:
+        lesson.timeline.tracks[0].medias.add_media(bin_media, start, duration=10)
+    lesson.timeline.markers.add('lesson', starts[0])
+    return lesson
+
+
+def test_concatenate_appends_projects_end_to_end(project, media_root, temp_path):
+    first = _lesson(temp_path / 'first.cmproj', media_root, [0, 10])
+    second = _lesson(temp_path / 'second.cmproj', media_root, [5], image='monkey.jpg')
+
+    starts = operations.concatenate([first, second, first], into=project)
+
+    assert starts == [0, 20, 35]
+    medias = list(project.timeline.tracks[0].medias)
+    assert [media.start for media in medias] == [0, 10, 25, 35, 45]
+    assert len({media.id for media in medias}) == 5
+    assert [(marker.name, marker.time) for marker in project.timeline.markers] == [
+        ('lesson', 0), ('lesson', 25), ('lesson', 35)]
+
+    # The first lesson's media is in the media bin once, however often it's used.
+    assert len(project.media_bin) == 2
+    assert [media.source for media in medias] == [medias[0].source] * 2 + [medias[2].source] + [medias[0].source] * 2
+    for bin_media in project.media_bin:
+        assert (project.file_path / bin_media.source).exists()
+
+    # The inputs are untouched.
+    assert [media.start for media in first.timeline.tracks[0].medias] == [0, 10]
+
+
+def test_concatenate_merges_copies_of_media(project, media_root, temp_path):
+    first = _lesson(temp_path / 'first.cmproj', media_root, [0])
+    second = _lesson(temp_path / 'second.cmproj', media_root, [0])
+    third = _lesson(temp_path / 'third.cmproj', media_root, [0], image='monkey.jpg')
+
+    operations.concatenate([first, second, third], into=project)
+
+    # The lessons each have their own copy of llama.jpg, but it's in the media bin once.
+    assert len(project.media_bin) == 2
+    medias = list(project.timeline.tracks[0].medias)
+    assert medias[0].source == medias[1].source != medias[2].source
+
+
+def test_concatenate_keeps_marker_spans(project, media_root, temp_path):
+    lesson = _lesson(temp_path / 'lesson.cmproj', media_root, [0, 20])
+    keyframe, = lesson.timeline._data['parameters']['toc']['keyframes']
+    keyframe.update(time=10, endTime=15, duration=5)
+    lesson.timeline.markers.reindex()
+
+    operations.concatenate([lesson, lesson], into=project)
+
+    keyframes = project.timeline._data['parameters']['toc']['keyframes']
+    assert [(k['time'], k['endTime'], k['duration']) for k in keyframes] == [(10, 15, 5), (40, 45, 5)]
+    assert [marker.time for marker in project.timeline.markers] == [10, 40]
+    assert keyframe['time'] == 10
+
+
+def test_concatenate_without_copying_media(project, media_root, temp_path):
+    lesson = _lesson(temp_path / 'lesson.cmproj', media_root, [0])
+
+    operations.concatenate([lesson], into=project, copy_media=False)
+
+    bin_media, = project.media_bin
+    assert bin_media.source == (lesson.file_path / list(lesson.media_bin)[0].source).resolve()
+
+
+def test_concatenate_rejects_different_edit_rates(project, media_root, temp_path):
+    lesson = _lesson(temp_path / 'lesson.cmproj', media_root, [0])
+    operations.retime(lesson, 60)
+
+    with pytest.raises(ValueError):
+        operations.concatenate([lesson], into=project)
+    assert len(project.media_bin) == 0
+
+
+def test_split_at_markers(project, media_root, temp_path):
+    image = project.media_bin.import_media(media_root / 'llama.jpg')
+    project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    track.medias.add_media(image, 0, duration=10)
+    crossing = track.medias.add_media(image, 15, duration=20)
+    crossing.markers.add('before', 18)
+    crossing.markers.add('after', 30)
+    project.timeline.markers.add('Part 1: intro', 0)
+    project.timeline.markers.add('part/2', 25)
+    project.save()
+
+    paths = operations.split_at_markers(project, temp_path / 'out')
+
+    assert [path.name for path in paths] == ['000-Part-1-intro.cmproj', '001-part-2.cmproj']
+    first, second = (load_project(path) for path in paths)
+
+    assert [(m.start, m.duration, m.media_start) for m in first.timeline.tracks[0].medias] == [
+        (0, 10, 0), (15, 10, 0)]
+    assert [(m.start, m.duration, m.media_start) for m in second.timeline.tracks[0].medias] == [(0, 10, 10)]
+    assert [marker.name for marker in list(first.timeline.tracks[0].medias)[1].markers] == ['before']
+    assert [marker.name for marker in list(second.timeline.tracks[0].medias)[0].markers] == ['after']
+    assert [(m.name, m.time) for m in second.timeline.markers] == [('part/2', 0)]
+
+    # Only used media is kept, and it's hardlinked.
+    for segment in (first, second):
+        bin_media, = segment.media_bin
+        assert bin_media.id == image.id
+        assert (segment.file_path / bin_media.source).samefile(project.file_path / image.source)
+
+    # The original is untouched.
+    assert len(project.media_bin) == 2
+    assert [m.start for m in project.timeline.tracks[0].medias] == [0, 15]
+
+
+def test_split_at_markers_keeps_marker_spans(project, media_root, temp_path):
+    image = project.media_bin.import_media(media_root / 'llama.jpg')
+    project.timeline.tracks[0].medias.add_media(image, 0, duration=30)
+    project.timeline.markers.add('one', 0)
+    project.timeline.markers.add('two', 10)
+    keyframe, = (keyframe for keyframe in project.timeline._data['parameters']['toc']['keyframes']
+                 if keyframe['time'] == 10)
+    keyframe.update(endTime=15, duration=5)
+    project.save()
+
+    _, second = (load_project(path) for path in operations.split_at_markers(project, temp_path / 'out'))
+
+    keyframe, = second.timeline._data['parameters']['toc']['keyframes']
+    assert (keyframe['time'], keyframe['endTime'], keyframe['duration']) == (0, 5, 5)
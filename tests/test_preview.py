@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from camtasia.effects import ChromaKeyEffect
+
+pytest.importorskip('PIL')
+
+from PIL import Image  # noqa: E402
+
+from camtasia.preview import chroma_key, composite, preview_media, render_previews  # noqa: E402
+
+GREEN = (0.0, 1.0, 0.0)
+RED = (1.0, 0.0, 0.0)
+
+
+def _image(*colors):
+    "A 1xN image of the given colours."
+    return np.array([colors], dtype=np.float32)
+
+
+def test_key_colour_is_transparent():
+    keyed = chroma_key(_image(GREEN, RED), ChromaKeyEffect())
+    assert keyed.shape == (1, 2, 4)
+    assert keyed[0, 0, 3] == 0.0
+    assert keyed[0, 1, 3] == 1.0
+
+
+def test_inverted_key():
+    keyed = chroma_key(_image(GREEN, RED), ChromaKeyEffect(inverted=True))
+    assert keyed[0, 0, 3] == 1.0
+    assert keyed[0, 1, 3] == 0.0
+
+
+def test_softness_gives_partial_alpha():
+    near_green = (0.2, 0.8, 0.2)
+    hard = chroma_key(_image(near_green), ChromaKeyEffect(tolerance=0.1, softness=0.0))
+    soft = chroma_key(_image(near_green), ChromaKeyEffect(tolerance=0.1, softness=1.0))
+    assert hard[0, 0, 3] == 1.0
+    assert 0.0 < soft[0, 0, 3] < 1.0
+
+
+def test_compensation_removes_spill():
+    greenish = (0.5, 0.7, 0.5)
+    plain = chroma_key(_image(greenish), ChromaKeyEffect())
+    compensated = chroma_key(_image(greenish), ChromaKeyEffect(compensation=1.0))
+    assert compensated[0, 0, 1] < plain[0, 0, 1]
+
+
+def test_composite_over_solid_background():
+    keyed = chroma_key(_image(GREEN, RED), ChromaKeyEffect())
+    result = composite(keyed, background=(0.0, 0.0, 1.0))
+    assert np.allclose(result[0, 0], (0.0, 0.0, 1.0))
+    assert np.allclose(result[0, 1], RED)
+
+
+def test_preview_media(project, media_root, temp_path):
+    media = project.media_bin.import_media(media_root / 'llama.jpg')
+    dest = preview_media(project, media.id, ChromaKeyEffect(), temp_path / 'preview.png')
+    with Image.open(dest) as image:
+        assert image.size == (640, 960)
+
+
+def test_render_previews(temp_path):
+    source_dir = temp_path / 'frames'
+    source_dir.mkdir()
+    for index in range(3):
+        Image.new('RGB', (8, 8), (0, 255, 0)).save(source_dir / f'frame-{index}.png')
+
+    dests = render_previews(ChromaKeyEffect(), source_dir, temp_path / 'out', background=(1.0, 0.0, 0.0),
+                            max_workers=2)
+
+    assert [d.name for d in dests] == ['frame-0.png', 'frame-1.png', 'frame-2.png']
+    with Image.open(dests[0]) as image:
+        assert image.getpixel((0, 0)) == (255, 0, 0)
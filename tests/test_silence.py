@@ -0,0 +1,115 @@
+import wave
+
+import numpy as np
+import pytest
+
+from camtasia import operations
+from camtasia.audio import WavReader
+from camtasia.audio.silence import detect_silence
+from camtasia.media_bin import MediaType
+
+SAMPLE_RATE = 8000
+
+
+def _write_wav(path, segments):
+    "Write a mono 16-bit WAV of alternating tone/silence `(is_tone, seconds)` segments."
+    parts = []
+    for is_tone, seconds in segments:
+        t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+        amplitude = 0.5 if is_tone else 0.0
+        parts.append(amplitude * np.sin(2 * np.pi * 440 * t))
+    samples = (np.concatenate(parts) * 32767).astype('<i2')
+
+    with wave.open(str(path), 'wb') as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(SAMPLE_RATE)
+        handle.writeframes(samples.tobytes())
+    return path
+
+
+@pytest.fixture
+def speech_path(temp_path):
+    return _write_wav(temp_path / 'speech.wav', [(True, 1), (False, 1), (True, 1), (False, 0.2), (True, 1)])
+
+
+def test_detects_long_silences_only(speech_path):
+    silences = list(detect_silence(WavReader(speech_path), padding=0, min_duration=0.5))
+    assert len(silences) == 1
+    start, stop = silences[0]
+    assert abs(start - SAMPLE_RATE) <= 80
+    assert abs(stop - 2 * SAMPLE_RATE) <= 80
+
+
+def test_padding_shrinks_silence(speech_path):
+    (unpadded,) = detect_silence(WavReader(speech_path), padding=0)
+    (padded,) = detect_silence(WavReader(speech_path), padding=0.1)
+    assert padded == (unpadded[0] + 800, unpadded[1] - 800)
+
+
+def test_silence_spanning_blocks_is_found_once(temp_path):
+    path = _write_wav(temp_path / 'long.wav', [(True, 1), (False, 10), (True, 1)])
+    silences = list(detect_silence(WavReader(path), padding=0))
+    assert len(silences) == 1
+    assert silences[0][1] - silences[0][0] >= 10 * SAMPLE_RATE - 160
+
+
+def test_trailing_silence_is_not_padded_at_end(temp_path):
+    path = _write_wav(temp_path / 'trailing.wav', [(True, 1), (False, 1)])
+    reader = WavReader(path)
+    (silence,) = detect_silence(reader, padding=0.1)
+    assert silence[1] == reader.frame_count
+
+
+def test_mark_silences(project, speech_path):
+    bin_media = project.media_bin.import_media(speech_path)
+    track = project.timeline.tracks.insert_track(2, 'narration')
+    media = track.medias.add_media(bin_media, 100)
+
+    assert operations.mark_silences(project, padding=0) == 1
+
+    (marker,) = track.medias[media.id].markers
+    assert marker.name == 'silence'
+    assert abs(marker.time - (100 + project.edit_rate)) <= 1
+
+
+def test_cut_silences(project, speech_path):
+    bin_media = project.media_bin.import_media(speech_path)
+    track = project.timeline.tracks.insert_track(2, 'narration')
+    media = track.medias.add_media(bin_media, 100, duration=4 * project.edit_rate)
+
+    assert operations.cut_silences(project, padding=0) == 1
+
+    first, second = track.medias
+    assert first.id == media.id
+    assert first.start == 100
+    assert abs(first.duration - project.edit_rate) <= 1
+    assert abs(second.start - (100 + 2 * project.edit_rate)) <= 1
+    assert second.start + second.duration == 100 + 4 * project.edit_rate
+    assert second.media_start == second.start - 100
+
+
+def test_audio_other_than_wav_is_skipped(project, speech_path, temp_path):
+    narration = project.media_bin.import_media(speech_path)
+    music = project.media_bin.import_media(_write_wav(temp_path / 'music.wav', [(True, 1)]))
+    # Stand in for e.g. an MP3, which the media bin knows as audio but which isn't a WAV file.
+    (project.file_path / music.source).write_bytes(b'ID3' + bytes(1000))
+    assert music.type == MediaType.Audio
+    track = project.timeline.tracks.insert_track(2, 'narration')
+    track.medias.add_media(narration, 0)
+    track.medias.add_media(music, 1000)
+
+    assert operations.mark_silences(project, padding=0) == 1
+
+
+def test_silences_follow_the_clip_scalar(project, speech_path):
+    bin_media = project.media_bin.import_media(speech_path)
+    track = project.timeline.tracks.insert_track(2, 'narration')
+    media = track.medias.add_media(bin_media, 100, duration=2 * project.edit_rate)
+    # Played at double speed, the silence from 1s to 2s of the audio is from 0.5s to 1s on the timeline.
+    media._data['scalar'] = '1/2'
+
+    assert operations.mark_silences(project, padding=0) == 1
+
+    (marker,) = track.medias[media.id].markers
+    assert abs(marker.time - (100 + project.edit_rate // 2)) <= 1
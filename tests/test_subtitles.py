@@ -0,0 +1,91 @@
+import pytest
+
+from camtasia.annotations import CalloutTemplate, callouts, import_subtitles
+from camtasia.annotations.subtitles import read_cues
+
+SRT = """1
+00:00:01,000 --> 00:00:02,500
+Hello
+
+2
+00:00:03,000 --> 00:00:04,000
+<i>Two</i>
+lines
+"""
+
+VTT = """WEBVTT
+
+NOTE this is a comment
+
+intro
+00:01.000 --> 00:02.500 align:start
+Hello
+
+00:00:03.000 --> 00:00:04.000
+<c.loud>Two</c>
+lines
+"""
+
+OVERLAPPING = """1
+00:00:01,000 --> 00:00:03,000
+First
+
+2
+00:00:02,000 --> 00:00:04,000
+Second
+
+3
+00:00:03,500 --> 00:00:05,000
+Third
+"""
+
+
+@pytest.mark.parametrize('content', [SRT, VTT])
+def test_read_cues(content):
+    cues = list(read_cues(content.splitlines(keepends=True)))
+    assert [(c.start, c.stop, c.text) for c in cues] == [
+        (1000, 2500, 'Hello'),
+        (3000, 4000, 'Two\nlines'),
+    ]
+
+
+def test_import_subtitles(project, temp_path):
+    path = temp_path / 'captions.srt'
+    path.write_text(SRT)
+    track = project.timeline.tracks.insert_track(2, 'captions')
+    style = CalloutTemplate(callouts.text('', 'Arial', 'Bold'))
+
+    medias = import_subtitles(track, path, style=style, frame_rate=project.edit_rate)
+
+    assert [(m.start, m.duration) for m in medias] == [(30, 45), (90, 30)]
+    assert [m._data['def']['text'] for m in track.medias] == ['Hello', 'Two\nlines']
+
+
+def test_import_subtitles_rounds_to_nearest_frame(project, temp_path):
+    path = temp_path / 'captions.vtt'
+    path.write_text('WEBVTT\n\n00:00.049 --> 00:00.051\nx\n')
+    track = project.timeline.tracks.insert_track(2, 'captions')
+    (media,) = import_subtitles(track, path, frame_rate=30)
+    assert (media.start, media.duration) == (1, 1)
+
+
+def test_overlapping_subtitles_raise_ValueError(project, temp_path):
+    path = temp_path / 'captions.srt'
+    path.write_text(OVERLAPPING)
+    track = project.timeline.tracks.insert_track(2, 'captions')
+    with pytest.raises(ValueError):
+        import_subtitles(track, path)
+
+
+def test_overlapping_subtitles_split_onto_new_tracks(project, temp_path):
+    path = temp_path / 'captions.srt'
+    path.write_text(OVERLAPPING)
+    track = project.timeline.tracks.insert_track(2, 'captions')
+
+    medias = import_subtitles(track, path, split_overlaps=True)
+
+    assert len(medias) == 3
+    assert len(project.timeline.tracks) == 4
+    assert [m._data['def']['text'] for m in project.timeline.tracks[2].medias] == ['First', 'Third']
+    assert [m._data['def']['text'] for m in project.timeline.tracks[3].medias] == ['Second']
+    assert project.timeline.tracks[3].name == 'captions 2'
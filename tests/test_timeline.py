@@ -1,5 +1,7 @@
 from itertools import islice
 
+import pytest
+
 from camtasia.timeline.marker import Marker
 
 
@@ -31,6 +33,61 @@ class TestTimelineMarkers:
     def test_timeline_initially_has_no_markers(self, project):
         assert len(list(project.timeline.markers)) == 0
 
+    def test_markers_iterate_in_time_order(self, project):
+        markers = project.timeline.markers
+        for time in (30, 10, 20):
+            markers.add(f'marker-{time}', time)
+        assert [m.time for m in markers] == [10, 20, 30]
+
+    def test_duplicate_marker_is_rejected(self, project):
+        markers = project.timeline.markers
+        markers.add('first', 10)
+        with pytest.raises(ValueError):
+            markers.add('second', 10)
+        markers.add('second', 10, duplicates_okay=True)
+        assert [m.name for m in markers.at(10)] == ['first', 'second']
+
+    def test_between_and_nearest(self, project):
+        markers = project.timeline.markers
+        for time in range(0, 100, 10):
+            markers.add(f'marker-{time}', time)
+        assert [m.time for m in markers.between(15, 40)] == [20, 30]
+        assert markers.nearest(24).time == 20
+        assert markers.nearest(25).time == 20
+        assert markers.nearest(26).time == 30
+        assert markers.nearest(1000).time == 90
+
+    def test_nearest_without_markers_raises(self, project):
+        with pytest.raises(ValueError):
+            project.timeline.markers.nearest(0)
+
+    def test_add_many(self, project):
+        markers = project.timeline.markers
+        markers.add('existing', 50)
+        added = markers.add_many([('b', 60), ('a', 40)])
+        assert [m.name for m in added] == ['a', 'b']
+        assert [m.name for m in markers] == ['a', 'existing', 'b']
+
+    def test_add_many_is_all_or_nothing(self, project):
+        markers = project.timeline.markers
+        markers.add('existing', 50)
+        with pytest.raises(ValueError):
+            markers.add_many([('a', 40), ('b', 50)])
+        with pytest.raises(ValueError):
+            markers.add_many([('a', 40), ('b', 40)])
+        assert len(markers) == 1
+
+    def test_remove_and_rename(self, project):
+        markers = project.timeline.markers
+        markers.add('a', 10)
+        markers.add('b', 20)
+        assert markers.rename(20, 'c') == 1
+        assert markers.remove(10) == 1
+        assert list(markers) == [Marker(name='c', time=20)]
+        assert list(project.timeline.markers) == [Marker(name='c', time=20)]
+        with pytest.raises(KeyError):
+            markers.remove(10)
+
 
 class TestCannedTimeline:
     def test_number_tracks(self, simple_video):
@@ -67,3 +124,143 @@ class TestCannedTimeline:
             Marker(time=750, name='marker-5'),
             Marker(time=900, name='marker-6'),
         ]
+
+
+class TestWrapperIdentity:
+    def test_tracks_and_medias_are_stable(self, simple_video):
+        first_pass = [(track, list(track.medias)) for track in simple_video.timeline.tracks]
+        second_pass = [(track, list(track.medias)) for track in simple_video.timeline.tracks]
+        for (track_a, medias_a), (track_b, medias_b) in zip(first_pass, second_pass):
+            assert track_a is track_b
+            assert all(a is b for a, b in zip(medias_a, medias_b))
+
+    def test_media_bin_media_are_stable(self, simple_video):
+        assert all(a is b for a, b in zip(simple_video.media_bin, simple_video.media_bin))
+
+    def test_removed_media_wrapper_is_dropped(self, simple_video):
+        track = simple_video.timeline.tracks[0]
+        media = next(iter(track.medias))
+        del track.medias[media.id]
+        assert all(m is not media for m in track.medias)
+
+    def test_wrappers_are_slotted(self, simple_video):
+        track = simple_video.timeline.tracks[0]
+        media = next(iter(track.medias))
+        for wrapper in (track, media, next(iter(simple_video.media_bin)), Marker(name='m', time=0)):
+            assert not hasattr(wrapper, '__dict__')
+
+
+class TestDerivedValues:
+    def test_values_are_recomputed_after_changes(self, project, media_root):
+        timeline = project.timeline
+        assert timeline.end_frame == 0
+        assert timeline.used_media_ids == frozenset()
+
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = timeline.tracks[0]
+        track.medias.add_media(bin_media, 10, duration=20)
+        track.medias.add_media(bin_media, 30, duration=20)
+        timeline.tracks[1].medias.add_media(bin_media, 100, duration=5)
+
+        assert timeline.end_frame == 105
+        assert timeline.used_media_ids == {bin_media.id}
+        assert timeline.clip_counts == {0: 2, 1: 1}
+        assert timeline.occupancy == {0: ((10, 50),), 1: ((100, 105),)}
+
+    def test_values_are_reused_until_changed(self, project, media_root):
+        timeline = project.timeline
+        occupancy = timeline.occupancy
+        assert timeline.occupancy is occupancy
+
+        version = timeline.version
+        timeline.markers.add('marker', 10)
+        assert timeline.version > version
+        assert timeline.occupancy is not occupancy
+
+
+class TestFlatten:
+    @pytest.fixture
+    def medias(self, project, media_root):
+        image = project.media_bin.import_media(media_root / 'llama.jpg')
+        lower, upper = project.timeline.tracks
+        return (lower.medias.add_media(image, 0, duration=100),
+                upper.medias.add_media(image, 20, duration=30),
+                upper.medias.add_media(image, 50, duration=10))
+
+    def test_topmost_media_is_visible(self, project, medias):
+        lower, first_upper, second_upper = medias
+        segments = project.timeline.flatten()
+        assert [(s.start, s.stop, s.visible) for s in segments] == [
+            (0, 20, lower), (20, 50, first_upper), (50, 60, second_upper), (60, 100, lower)]
+        assert all(s.audible == () for s in segments)
+
+    def test_hidden_tracks_are_skipped(self, project, medias):
+        lower, _, _ = medias
+        project.timeline._data['trackAttributes'][1]['videoHidden'] = True
+        project.timeline.mark_changed()
+        assert [(s.start, s.stop, s.visible) for s in project.timeline.flatten()] == [(0, 100, lower)]
+
+    def test_window(self, project, medias):
+        lower, first_upper, _ = medias
+        segments = project.timeline.flatten(10, 30)
+        assert [(s.start, s.stop, s.visible) for s in segments] == [(10, 20, lower), (20, 30, first_upper)]
+
+    def test_empty_stretches_are_omitted(self, project, media_root):
+        image = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks[0]
+        track.medias.add_media(image, 0, duration=10)
+        track.medias.add_media(image, 10, duration=10)
+        track.medias.add_media(image, 40, duration=10)
+        assert [(s.start, s.stop) for s in project.timeline.flatten()] == [(0, 10), (10, 20), (40, 50)]
+
+
+class TestGaps:
+    @pytest.fixture
+    def image(self, project, media_root):
+        return project.media_bin.import_media(media_root / 'llama.jpg')
+
+    def test_track_gaps(self, project, image):
+        track = project.timeline.tracks[0]
+        for start in (5, 20, 32, 42):
+            track.medias.add_media(image, start, duration=10)
+        assert track.gaps() == [(0, 5), (15, 20), (30, 32)]
+        assert track.gaps(min_frames=3) == [(0, 5), (15, 20)]
+
+    def test_timeline_gaps_need_all_tracks_empty(self, project, image):
+        lower, upper = project.timeline.tracks
+        lower.medias.add_media(image, 0, duration=10)
+        lower.medias.add_media(image, 30, duration=10)
+        upper.medias.add_media(image, 15, duration=10)
+        assert project.timeline.gaps() == [(10, 15), (25, 30)]
+
+    def test_compact_keeps_tracks_in_sync(self, project, image):
+        lower, upper = project.timeline.tracks
+        lower.medias.add_media(image, 10, duration=10)
+        upper.medias.add_media(image, 15, duration=10)
+        lower.medias.add_media(image, 50, duration=10)
+        upper.medias.add_media(image, 50, duration=5)
+        project.timeline.markers.add('in-gap', 40)
+        project.timeline.markers.add('after-gap', 55)
+
+        assert project.timeline.compact() == 35
+
+        assert [m.start for m in lower.medias] == [0, 15]
+        assert [m.start for m in upper.medias] == [5, 15]
+        assert [(m.name, m.time) for m in project.timeline.markers] == [('in-gap', 15), ('after-gap', 20)]
+        assert project.timeline.gaps() == []
+
+    def test_compact_shifts_marker_spans(self, project, image):
+        track = project.timeline.tracks[0]
+        track.medias.add_media(image, 0, duration=10)
+        track.medias.add_media(image, 30, duration=10)
+        toc = project.timeline._data.setdefault('parameters', {}).setdefault('toc', {})
+        keyframes = toc.setdefault('keyframes', [])
+        # A keyframe without an end time, and one whose span crosses the gap.
+        keyframes.append({'value': 'no-end', 'time': 35, 'duration': 2})
+        keyframes.append({'value': 'span', 'time': 5, 'endTime': 35, 'duration': 30})
+        project.timeline.markers.reindex()
+
+        assert project.timeline.compact() == 20
+
+        spans = sorted((k['value'], k['time'], k['endTime'], k['duration']) for k in keyframes)
+        assert spans == [('no-end', 15, 17, 2), ('span', 5, 15, 10)]
@@ -170,3 +170,75 @@ class TestTrackMediaMarkers:
         assert len(markers) == 1
         assert markers[0].name == 'marker-name'
         assert markers[0].time == media.start
+
+    def test_markers_are_queried_in_timeline_time(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        media = track.medias.add_media(bin_media, 100, duration=50)
+        media.markers.add('first', 110)
+        media.markers.add('second', 130)
+        assert [m.name for m in media.markers.between(100, 120)] == ['first']
+        assert media.markers.nearest(125).name == 'second'
+        assert 130 in media.markers
+        media.markers.remove(130, name='second')
+        assert 130 not in media.markers
+
+    def test_cut_leaves_pieces_in_place(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        media = track.medias.add_media(bin_media, 0, duration=100)
+        pieces = track.medias.cut(media.id, [(20, 30), (50, 60)])
+        assert [(p.start, p.duration, p.media_start) for p in pieces] == [(0, 20, 0), (30, 20, 30), (60, 40, 60)]
+        assert len(track.medias) == 3
+        assert pieces[0].id == media.id
+
+    def test_cut_renumbers_nested_media(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        media = track.medias.add_media(bin_media, 0, duration=100)
+        nested_id = project.timeline._media_index.allocate()
+        media._data['medias'] = [{'id': nested_id, '_type': 'IMFile', 'src': bin_media.id, 'start': 0,
+                                  'duration': 100, 'mediaStart': 0, 'mediaDuration': 100}]
+        project.timeline.mark_changed()
+
+        pieces = track.medias.cut(media.id, [(20, 30)])
+
+        nested_ids = [p._data['medias'][0]['id'] for p in pieces]
+        assert nested_ids[0] == nested_id
+        all_ids = [p.id for p in pieces] + nested_ids
+        assert len(set(all_ids)) == len(all_ids)
+        assert project.validate() == []
+
+    def test_cut_scales_media_times(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        media = track.medias.add_media(bin_media, 0, duration=100)
+        media._data['scalar'] = '1/2'
+        media._data['mediaDuration'] = 200
+
+        pieces = track.medias.cut(media.id, [(20, 30)])
+
+        assert [(p.media_start, p._data['mediaDuration']) for p in pieces] == [(0, 40), (60, 140)]
+
+    def test_apply_effect_to_matching_medias(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        first = track.medias.add_media(bin_media, 0)
+        second = track.medias.add_media(bin_media, 1000)
+        effect = ChromaKeyEffect(tolerance=0.2)
+
+        assert track.medias.apply_effect(effect, where=lambda m: m.start > 0) == 1
+        assert len(track.medias[first.id].effects) == 0
+        assert list(track.medias[second.id].effects) == [effect]
+
+    def test_apply_effect_replacing_existing(self, project: Project, media_root: Path):
+        bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+        track = project.timeline.tracks.insert_track(2, 'test-track')
+        media = track.medias.add_media(bin_media, 0, effects=[ChromaKeyEffect()])
+        new_effect = ChromaKeyEffect(tolerance=0.2)
+
+        track.medias.apply_effect(new_effect, replace=True)
+        assert list(track.medias[media.id].effects) == [new_effect]
+
+        track.medias.apply_effect(new_effect)
+        assert list(track.medias[media.id].effects) == [new_effect, new_effect]
@@ -0,0 +1,65 @@
+import pytest
+
+from camtasia.annotations import callouts
+from camtasia.timeline.traversal import MediaIndex, walk
+
+
+def _nested_tracks():
+    return [
+        {'medias': [
+            {'id': 1},
+            {'id': 2, 'medias': [{'id': 3}, {'id': 4, 'medias': [{'id': 5}]}]},
+        ]},
+        {'medias': [
+            {'id': 6, 'tracks': [{'medias': [{'id': 7}]}, {'medias': [{'id': 8}]}]},
+        ]},
+    ]
+
+
+def test_walk_visits_all_records_in_document_order():
+    tracks = _nested_tracks()
+    assert [record['id'] for _, record in walk(tracks)] == [1, 2, 3, 4, 5, 6, 7, 8]
+
+
+def test_walk_paths_locate_records():
+    tracks = _nested_tracks()
+    for path, record in walk(tracks):
+        located = tracks
+        for key in path:
+            located = located[key]
+        assert located is record
+
+
+def test_walk_handles_deep_nesting():
+    tracks = [{'medias': [{'id': 0}]}]
+    record = tracks[0]['medias'][0]
+    for media_id in range(1, 5000):
+        record['medias'] = [{'id': media_id}]
+        record = record['medias'][0]
+    assert sum(1 for _ in walk(tracks)) == 5000
+
+
+def test_media_index_allocates_past_nested_ids():
+    timeline_data = {'id': 2, 'sceneTrack': {'scenes': [{'csml': {'tracks': _nested_tracks()}}]}}
+    index = MediaIndex(timeline_data)
+    assert index[5][0] == (0, 'medias', 1, 'medias', 1, 'medias', 0)
+    assert index.allocate() == 9
+    assert index.allocate(3) == 10
+    index.invalidate()
+    assert index.allocate() == 13
+
+
+def test_timeline_finds_nested_media(project):
+    track = project.timeline.tracks[0]
+    media = track.medias.add_annotation(callouts.text('outer', 'Arial', 'Regular'), 0, 100)
+    media._data['medias'] = [{'id': 1000, 'start': 0, 'duration': 10, 'mediaStart': 0}]
+    project.timeline._media_index.invalidate()
+
+    assert project.timeline.media_by_id(1000).duration == 10
+    # Track.medias only finds media directly on the track, as iterating it does.
+    with pytest.raises(KeyError):
+        track.medias[1000]
+    assert track.medias[media.id] is media
+
+    new_media = track.medias.add_annotation(callouts.text('next', 'Arial', 'Regular'), 200, 100)
+    assert new_media.id == 1001
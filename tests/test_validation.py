@@ -0,0 +1,98 @@
+import pytest
+
+from camtasia.effects import ChromaKeyEffect
+from camtasia.project import load_project
+from camtasia.validation import ValidationError, Validator
+
+
+def _rules(problems):
+    return sorted((problem.rule, problem.subject) for problem in problems)
+
+
+@pytest.fixture
+def clips(project, media_root):
+    bin_media = project.media_bin.import_media(media_root / 'llama.jpg')
+    track = project.timeline.tracks[0]
+    return [track.medias.add_media(bin_media, start, duration=10) for start in (0, 10)]
+
+
+def test_valid_projects_have_no_problems(simple_video, project, clips):
+    assert simple_video.validate() == []
+    assert project.validate() == []
+
+
+def test_structural_problems(project, clips):
+    first, second = clips
+    second._data['start'] = 5
+    first._data['id'] = second.id
+    project._data['sourceBin'][0]['id'] = 99
+    project.timeline._data['trackAttributes'].pop()
+
+    assert _rules(project.validate()) == [
+        ('duplicate-id', f'clip {second.id}'),
+        ('missing-media', f'clip {second.id}'),
+        ('missing-media', f'clip {second.id}'),
+        ('overlap', f'clip {second.id}'),
+        ('track-count', 'timeline'),
+    ]
+
+
+def test_record_problems(project, clips):
+    first, second = clips
+    del first._data['_type']
+    second._data['duration'] = 0
+
+    assert _rules(project.validate()) == [
+        ('bad-duration', f'clip {second.id}'),
+        ('missing-field', f'clip {first.id}'),
+    ]
+
+
+def test_incremental_validation_rechecks_only_changed_tracks(project, clips, media_root):
+    validator = Validator()
+    assert validator.validate(project._data) == []
+    first_track, second_track = validator._tracks
+
+    clips[1]._data['start'] = 5
+    problems = validator.validate(project._data, incremental=True)
+    assert _rules(problems) == [('overlap', f'clip {clips[1].id}')]
+    assert validator._tracks[0] is not first_track
+    assert validator._tracks[1] is second_track
+
+    # Checks across tracks use the remembered results.
+    project.timeline.tracks[1].medias.add_media(project.media_bin[1], 0, duration=10)._data['id'] = clips[0].id
+    problems = validator.validate(project._data, incremental=True)
+    assert _rules(problems) == [('duplicate-id', f'clip {clips[0].id}'), ('overlap', f'clip {clips[1].id}')]
+
+
+def test_incremental_validation_uses_timeline_changes(project, clips, media_root):
+    assert project.validate(incremental=True) == []
+    first_track, second_track = project._validator._tracks
+
+    # Changes through the API mark only their own track as changed.
+    project.timeline.tracks[1].medias.add_media(project.media_bin[1], 0, duration=10)
+    assert project.validate(incremental=True) == []
+    assert project._validator._tracks[0] is first_track
+    assert project._validator._tracks[1] is not second_track
+
+    second_track = project._validator._tracks[1]
+    clips[1].effects.add_effect(ChromaKeyEffect())
+    clips[1].markers.add('marker', 15)
+    assert project.validate(incremental=True) == []
+    assert project._validator._tracks[0] is not first_track
+    assert project._validator._tracks[1] is second_track
+
+    # Direct changes are found without being recorded.
+    clips[1]._data['start'] = 5
+    assert _rules(project.validate(incremental=True)) == [('overlap', f'clip {clips[1].id}')]
+    assert project._validator._tracks[1] is second_track
+
+
+def test_save_with_validation(project, clips):
+    project.save(validate=True)
+
+    clips[1]._data['start'] = 5
+    with pytest.raises(ValidationError) as exc_info:
+        project.save(validate=True)
+    assert [problem.rule for problem in exc_info.value.problems] == ['overlap']
+    assert load_project(project.file_path).validate() == []
@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from camtasia.audio import Waveforms, WavReader
+
+
+@pytest.fixture
+def audio_media(project, media_root):
+    return project.media_bin.import_media(media_root / 'example.wav')
+
+
+def test_wav_reader_reads_all_frames(media_root):
+    reader = WavReader(media_root / 'example.wav')
+    assert reader.sample_rate == 44100
+    assert reader.channels == 2
+    assert sum(len(samples) for _, samples in reader.blocks(10000)) == reader.frame_count == 357210
+
+
+def test_waveform_levels(project, audio_media):
+    waveform = Waveforms(project, levels=(256, 1024))[audio_media.id]
+    assert waveform.levels == (256, 1024)
+    assert waveform.peaks(256).shape == (-(-357210 // 256), 2, 2)
+    assert waveform.peaks(1024).shape == (-(-357210 // 1024), 2, 2)
+
+
+def test_waveform_peaks_match_samples(project, audio_media, media_root):
+    waveform = Waveforms(project, levels=(1024, 4096))[audio_media.id]
+    samples = WavReader(media_root / 'example.wav').read(0, 4096)
+
+    peaks = waveform.peaks(4096)[0].astype(np.float32) / 32767
+    assert np.allclose(peaks[:, 0], samples.min(axis=0), atol=1e-4)
+    assert np.allclose(peaks[:, 1], samples.max(axis=0), atol=1e-4)
+
+
+def test_coarser_levels_are_consistent(project, audio_media):
+    waveform = Waveforms(project, levels=(256, 1024))[audio_media.id]
+    fine = waveform.peaks(256)
+    coarse = waveform.peaks(1024)
+    assert (coarse[0, :, 0] == fine[:4, :, 0].min(axis=0)).all()
+    assert (coarse[0, :, 1] == fine[:4, :, 1].max(axis=0)).all()
+
+
+def test_sidecar_is_reused(project, audio_media):
+    waveforms = Waveforms(project)
+    first = waveforms[audio_media.id]
+    mtime = first.path.stat().st_mtime_ns
+    second = waveforms[audio_media.id]
+    assert second.path == first.path
+    assert second.path.stat().st_mtime_ns == mtime
+
+
+def test_sidecar_is_recomputed_when_audio_changes(project, audio_media):
+    waveforms = Waveforms(project)
+    first = waveforms[audio_media.id]
+
+    audio_path = project.file_path / audio_media.source
+    with audio_path.open('ab') as handle:
+        handle.write(b'\0\0')
+
+    second = waveforms[audio_media.id]
+    assert second.path != first.path
+    assert not first.path.exists()
+
+
+def test_non_audio_media_raises_ValueError(project, media_root):
+    media = project.media_bin.import_media(media_root / 'llama.jpg')
+    with pytest.raises(ValueError):
+        Waveforms(project)[media.id]